@@ -5,6 +5,12 @@ DEFAULT_GUNICORN_CONF=/usr/src/movies_api/gunicorn_conf.py
 export GUNICORN_CONF=${GUNICORN_CONF:-$DEFAULT_GUNICORN_CONF}
 export WORKER_CLASS=${WORKER_CLASS:-"uvicorn.workers.UvicornWorker"}
 
+# Metrics of gunicorn workers are aggregated through files in this directory,
+# leftovers of the previous run must be removed.
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/dev/shm/prometheus}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # Start Gunicorn
 cd src
 exec gunicorn -k "$WORKER_CLASS" -c "$GUNICORN_CONF" "main:app"
\ No newline at end of file
@@ -49,6 +49,17 @@ graceful_timeout = int(graceful_timeout_str)
 timeout = int(timeout_str)
 keepalive = int(keepalive_str)
 
+# Workers size their connection pools by workers count (see core/config.py).
+os.environ["GUNICORN_WORKERS"] = str(workers)
+
+
+def child_exit(server, worker):
+    # Drop live gauges of the dead worker from aggregated metrics.
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
 
 # For debugging and testing
 log_data = {
@@ -1,18 +1,28 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Body, Depends, Request
+from fastapi.responses import StreamingResponse
 
 from core.config import VIEW_CACHE_EXPIRE_IN_SECONDS
 from api.v1.messages import FilmErrorMessage
 from api.v1.utils import (
     CommonQueryParams,
+    FieldsQueryParams,
+    FilmBatchBody,
+    FilmBatchQueryParams,
     FilmQueryParams,
     FilterQueryParams,
     PaginateQueryParams,
+    check_batch_size,
     raise_http_404,
 )
-from models.data_models import Film
-from models.response_models import FilmInfoResponse, FilmSearchResponse
+from models.response_models import (
+    FilmBatchItem,
+    FilmInfoResponse,
+    FilmSearchResponse,
+)
 from services.cache import cache
+from services.catalog import FilmCatalog
 from services.films import FilmService, get_film_service
+from services.pagination import Page
 
 
 router = APIRouter()
@@ -21,13 +31,18 @@ router = APIRouter()
 @router.get('', response_model=list[FilmSearchResponse])
 @cache(
     expire=VIEW_CACHE_EXPIRE_IN_SECONDS,
+    indexes=('movies',),
+    # Pages sorted by imdb_rating are served from catalog snapshot.
+    versions=(FilmCatalog.get_version,),
     serializer_class=FilmSearchResponse,
     serialize_collection=True,
+    list_tags=True,
 )
 async def films_popular(
         request: Request,  # required for cache decorator internal
         filter_params: FilterQueryParams = Depends(),
         paginate_params: PaginateQueryParams = Depends(),
+        fields_params: FieldsQueryParams = Depends(),
         film_service: FilmService = Depends(get_film_service),
 ) -> list[FilmSearchResponse]:
     """
@@ -36,8 +51,10 @@ async def films_popular(
 
     - **page[number]**: The number of the displayed page
     - **page[size]**: The size of the data per page
+    - **page[cursor]**: Cursor of the next page from X-Next-Cursor header
     - **filter[genre]**: Filter by genre
     - **sort**: Field name to use in sort. (-imdb_rating means desc order)
+    - **fields**: Comma separated fields to return (title, imdb_rating)
 
     Example:
     - /api/v1/films?sort=-imdb_rating&page[number]=&lt;int&gt;&page[size]=&lt;int&gt;
@@ -50,19 +67,28 @@ async def films_popular(
     )
     if not films:
         raise_http_404(FilmErrorMessage.not_found_popular_films)
-    return [FilmSearchResponse(**film.dict()) for film in films]
+    return Page(
+        fields_params.project(
+            (FilmSearchResponse(**film.dict()) for film in films),
+            FilmSearchResponse,
+        ),
+        next_cursor=films.next_cursor,
+    )
 
 
 @router.get('/search', response_model=list[FilmSearchResponse])
 @cache(
     expire=VIEW_CACHE_EXPIRE_IN_SECONDS,
+    indexes=('movies',),
     serializer_class=FilmSearchResponse,
     serialize_collection=True,
+    list_tags=True,
 )
 async def film_search_by_text(
         request: Request,
         query_params: CommonQueryParams = Depends(),
         paginate_params: PaginateQueryParams = Depends(),
+        fields_params: FieldsQueryParams = Depends(),
         film_service: FilmService = Depends(get_film_service),
 ) -> list[FilmSearchResponse]:
     """
@@ -71,6 +97,8 @@ async def film_search_by_text(
     - **query**: Word to search by.
     - **page[number]**: The number of the displayed page
     - **page[size]**: The size of the data per page
+    - **page[cursor]**: Cursor of the next page from X-Next-Cursor header
+    - **fields**: Comma separated fields to return (title, imdb_rating)
 
     Example:
 
@@ -80,12 +108,105 @@ async def film_search_by_text(
     films = await film_service.get_films_by_query(query_params, paginate_params)
     if not films:
         raise_http_404(FilmErrorMessage.not_found_current_query)
-    return [FilmSearchResponse(**film.dict()) for film in films]
+    return Page(
+        fields_params.project(
+            (FilmSearchResponse(**film.dict()) for film in films),
+            FilmSearchResponse,
+        ),
+        next_cursor=films.next_cursor,
+    )
+
+
+@router.get(
+    '/export',
+    response_class=StreamingResponse,
+    responses={200: {'content': {'application/x-ndjson': {}}}},
+)
+async def films_export(
+        fields_params: FieldsQueryParams = Depends(),
+        film_service: FilmService = Depends(get_film_service),
+) -> StreamingResponse:
+    """
+    Export all filmworks as NDJSON, one JSON filmwork per line. Response is
+    streamed while filmworks are read, in no particular order:
+
+    - **fields**: Comma separated fields to return (title, description, ...)
+
+    Example:
+
+    - /api/v1/films/export?fields=title,imdb_rating
+    """
+
+    fields = fields_params.include(FilmInfoResponse)
+    if fields is None:
+        fields = FilmInfoResponse.__fields__
+    chunks = await film_service.export_films(fields)
+    if chunks is None:
+        raise_http_404(FilmErrorMessage.not_found_films_to_export)
+    return StreamingResponse(chunks, media_type='application/x-ndjson')
+
+
+async def get_films_batch(
+        film_ids: list[str],
+        film_service: FilmService,
+) -> list[FilmBatchItem]:
+    films = await film_service.get_films_by_ids(film_ids)
+    return [
+        FilmBatchItem(
+            uuid=film_id,
+            found=films[film_id] is not None,
+            film=(
+                FilmInfoResponse(**films[film_id].dict())
+                if films[film_id] is not None else None
+            ),
+        )
+        for film_id in film_ids
+    ]
+
+
+@router.get('/batch', response_model=list[FilmBatchItem])
+async def films_batch(
+        batch_params: FilmBatchQueryParams = Depends(),
+        film_service: FilmService = Depends(get_film_service),
+) -> list[FilmBatchItem]:
+    """
+    Get full info about many filmworks at once, in the order of ids, with
+    found=false for unknown ones:
+
+    - **id**: Filmwork uuid, repeated for every filmwork
+
+    Example:
+
+    - /api/v1/films/batch?id=&lt;film_id:uuid&gt;&id=&lt;film_id:uuid&gt;
+    """
+
+    return await get_films_batch(batch_params.ids, film_service)
+
+
+@router.post('/batch', response_model=list[FilmBatchItem])
+async def films_batch_by_body(
+        body: FilmBatchBody = Body(...),
+        film_service: FilmService = Depends(get_film_service),
+) -> list[FilmBatchItem]:
+    """
+    Get full info about many filmworks at once, in the order of ids, with
+    found=false for unknown ones:
+
+    - **ids**: List of filmworks uuids
+
+    Example:
+
+    - POST /api/v1/films/batch {"ids": [&lt;film_id:uuid&gt;, ...]}
+    """
+
+    check_batch_size(body.ids)
+    return await get_films_batch(body.ids, film_service)
 
 
 @router.get('/{film_id}', response_model=FilmInfoResponse)
 @cache(
     expire=VIEW_CACHE_EXPIRE_IN_SECONDS,
+    indexes=('movies',),
     serializer_class=FilmInfoResponse,
 )
 async def film_details_by_uuid(
@@ -113,32 +234,32 @@ async def film_details_by_uuid(
 @router.get('/{film_id}/similar', response_model=list[FilmSearchResponse])
 @cache(
     expire=VIEW_CACHE_EXPIRE_IN_SECONDS,
+    indexes=('movies',),
     serializer_class=FilmSearchResponse,
     serialize_collection=True,
 )
 async def films_similar(
         request: Request,
         film_params: FilmQueryParams = Depends(),
+        fields_params: FieldsQueryParams = Depends(),
         film_service: FilmService = Depends(get_film_service)
 ) -> list[FilmSearchResponse]:
     """
     Get similar filmworks based on the current one:
 
     - **film_id**: Filmwork uuid
+    - **fields**: Comma separated fields to return (title, imdb_rating)
 
     Example:
 
     - /api/v1/films/&lt;film_id:uuid&gt;/similar
     """
 
-    film = await film_service.get_document_by_id(
-        film_params.film_id,
-        Film,
-        film_service.elastic_index
-    )
-    genres = [g.name for g in film.genre]
-    films = await film_service.get_similar_films(genres)
+    films = await film_service.get_similar_films_by_id(film_params)
     if not films:
         raise_http_404(FilmErrorMessage.not_found_similar_film)
 
-    return [FilmSearchResponse(**film.dict()) for film in films]
+    return fields_params.project(
+        (FilmSearchResponse(**film.dict()) for film in films),
+        FilmSearchResponse,
+    )
@@ -17,8 +17,10 @@ router = APIRouter()
 @router.get('', response_model=list[Genre])
 @cache(
     expire=VIEW_CACHE_EXPIRE_IN_SECONDS,
+    indexes=('genres',),
     serializer_class=Genre,
     serialize_collection=True,
+    list_tags=True,
 )
 async def get_genres(
     request: Request,
@@ -44,6 +46,7 @@ async def get_genres(
 @router.get('/{genre_id}', response_model=Genre)
 @cache(
     expire=VIEW_CACHE_EXPIRE_IN_SECONDS,
+    indexes=('genres',),
     serializer_class=Genre
 )
 async def genre_details_by_uuid(
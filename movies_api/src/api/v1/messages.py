@@ -6,6 +6,7 @@ class FilmErrorMessage(Enum):
     not_found_current_query = 'Not found for the current query'
     not_found_film_work_by_id = 'Filmwork with this ID not found'
     not_found_similar_film = 'Similar films not found'
+    not_found_films_to_export = 'Films to export not found'
 
 
 class GenreErrorMessage(Enum):
@@ -17,3 +18,7 @@ class PersonErrorMessage(Enum):
     not_found_persons = 'Persons not found'
     not_found_info_about_person = 'Info about person not found'
     not_found_films_for_person = 'Films for person not found'
+
+
+class SuggestErrorMessage(Enum):
+    not_ready = 'Suggestions are not ready yet'
@@ -4,11 +4,14 @@ from fastapi import APIRouter, Depends, Request, Query, Path
 from core.config import VIEW_CACHE_EXPIRE_IN_SECONDS
 from api.v1.messages import PersonErrorMessage
 from api.v1.utils import (
+    FieldsQueryParams,
     PaginateQueryParams,
     raise_http_404
 )
+from models.data_models import PersonExt
 from models.response_models import PersonSearchResponse, FilmSearchResponse
 from services.cache import cache
+from services.pagination import Page
 from services.persons import PersonService, get_person_service
 
 router = APIRouter()
@@ -20,11 +23,30 @@ class Role(Enum):
     writer = 'writer'
 
 
+def split_by_roles(
+        persons: list[PersonExt],
+) -> list[PersonSearchResponse]:
+    """Represent persons as a record per person's role (v1 layout)."""
+
+    return [
+        PersonSearchResponse(
+            uuid=person.uuid,
+            full_name=person.full_name,
+            role=person_role.role,
+            film_ids=person_role.film_ids,
+        )
+        for person in persons
+        for person_role in person.roles
+    ]
+
+
 @router.get('/search', response_model=list[PersonSearchResponse])
 @cache(
     expire=VIEW_CACHE_EXPIRE_IN_SECONDS,
+    indexes=('persons',),
     serializer_class=PersonSearchResponse,
     serialize_collection=True,
+    list_tags=True,
 )
 async def search_persons_by_name(
     request: Request,
@@ -34,13 +56,18 @@ async def search_persons_by_name(
         description='Search and return persons whom full_name match query text'
     ),
     paginate_params: PaginateQueryParams = Depends(),
+    fields_params: FieldsQueryParams = Depends(),
     person_service: PersonService = Depends(get_person_service),
 ) -> list[PersonSearchResponse]:
     """
     Get list of persons who name hast query text:
     - **query_text**: Text to use in search by full_name field.
     - **page[number]**: The number of the displayed page
-    - **page[size]**: The size of the data per page
+    - **page[size]**: The size of the data per page, persons with several
+      roles have a record per role in the page
+    - **page[cursor]**: Cursor of the next page from X-Next-Cursor header
+    - **fields**: Comma separated fields to return (full_name, role,
+      film_ids)
 
     Example:
     - /api/v1/persons/search?query=captain&page[number]=&lt;int&gt;&page[size]=&lt;int&gt;
@@ -52,12 +79,16 @@ async def search_persons_by_name(
     )
     if not persons:
         raise_http_404(PersonErrorMessage.not_found_persons)
-    return [PersonSearchResponse(**person.dict()) for person in persons]
+    return Page(
+        fields_params.project(split_by_roles(persons), PersonSearchResponse),
+        next_cursor=persons.next_cursor,
+    )
 
 
 @router.get('/{person_id}', response_model=list[PersonSearchResponse])
 @cache(
     expire=VIEW_CACHE_EXPIRE_IN_SECONDS,
+    indexes=('persons',),
     serializer_class=PersonSearchResponse,
     serialize_collection=True
 )
@@ -80,15 +111,10 @@ async def get_persons_by_uuid(
     - /api/v1/persons/&lt;person_id:uuid&gt;/
     """
 
-    person_ids = [
-        '{0}:{1}'.format(person_id, role.value) for role in (
-            Role.actor, Role.writer, Role.director
-        )
-    ]
-    persons = await person_service.get_persons_by_ids(person_ids)
-    if not persons:
+    person = await person_service.get_person_by_id(person_id)
+    if not person:
         raise_http_404(PersonErrorMessage.not_found_info_about_person)
-    return [PersonSearchResponse(**person.dict()) for person in persons]
+    return split_by_roles([person])
 
 
 @router.get(
@@ -98,6 +124,7 @@ async def get_persons_by_uuid(
 )
 @cache(
     expire=VIEW_CACHE_EXPIRE_IN_SECONDS,
+    indexes=('persons', 'movies'),
     serializer_class=FilmSearchResponse,
     serialize_collection=True
 )
@@ -115,6 +142,7 @@ async def get_person_films(
                     ' director. Default: filter[role]=actor',
         alias='filter[role]',
     ),
+    fields_params: FieldsQueryParams = Depends(),
     person_service: PersonService = Depends(get_person_service),
 ) -> list[FilmSearchResponse]:
     """
@@ -122,6 +150,7 @@ async def get_person_films(
 
     - **person_id**: Person uuid
     - **role**: Mandatory filter (actor|director|writer)
+    - **fields**: Comma separated fields to return (title, imdb_rating)
 
     Example:
 
@@ -129,17 +158,17 @@ async def get_person_films(
     returns all films where person was an actor
     """
 
-    person = await person_service.get_person_by_id(
-        person_id + ':' + role.value
-    )
-    if not person:
+    person = await person_service.get_person_by_id(person_id)
+    person_role = person.get_role(role.value) if person else None
+    if not person_role:
         raise_http_404(
             f'Person not found by uuid: {person_id}'
             f' and role: {role.value}'
         )
-    films = await person_service.get_person_films(
-        film_ids=person.film_ids,
-    )
+    films = person_role.films
     if not films:
         raise_http_404(PersonErrorMessage.not_found_films_for_person)
-    return [FilmSearchResponse(**film.dict()) for film in films]
+    return fields_params.project(
+        (FilmSearchResponse(**film.dict()) for film in films),
+        FilmSearchResponse,
+    )
@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter, HTTPException, Query
+
+from core.config import SUGGEST_TOP_K
+from api.v1.messages import SuggestErrorMessage
+from models.response_models import (
+    FilmSearchResponse,
+    Person,
+    SuggestResponse,
+)
+from services.suggest import SuggestIndexes
+
+router = APIRouter()
+
+
+@router.get('', response_model=SuggestResponse)
+async def suggest(
+        query: str = Query(
+            ...,
+            min_length=1,
+            title='Typed text.',
+            description='Text typed so far, words of titles and names '
+                        'starting with it are suggested.',
+        ),
+        limit: int = Query(
+            SUGGEST_TOP_K,
+            ge=1,
+            le=SUGGEST_TOP_K,
+            title='Max suggestions.',
+            description='Max number of films and of persons to suggest.',
+        ),
+) -> SuggestResponse:
+    """
+    Suggest films by title and persons by name for typeahead, films with
+    higher rating and persons with more films first:
+
+    - **query**: Text typed so far
+    - **limit**: Max number of films and of persons
+
+    Example:
+    - /api/v1/suggest?query=star%20wa
+    """
+
+    films_index = SuggestIndexes.get('movies')
+    persons_index = SuggestIndexes.get('persons')
+    if films_index is None and persons_index is None:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail=SuggestErrorMessage.not_ready.value,
+        )
+    films = films_index.search(query, limit) if films_index else []
+    persons = persons_index.search(query, limit) if persons_index else []
+    return SuggestResponse(
+        films=[
+            FilmSearchResponse(
+                uuid=item.uuid, title=item.text, imdb_rating=item.score,
+            )
+            for item in films
+        ],
+        persons=[
+            Person(uuid=item.uuid, full_name=item.text) for item in persons
+        ],
+    )
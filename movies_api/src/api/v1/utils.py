@@ -1,6 +1,12 @@
 from enum import Enum
 from http import HTTPStatus
+from typing import Iterable, Type
+
 from fastapi import HTTPException, Path, Query
+from pydantic import BaseModel
+
+from core.config import FILMS_BATCH_MAX_SIZE
+from services.pagination import Cursor
 
 
 def raise_http_404(exception_text: str | Enum = 'Not found.'):
@@ -12,6 +18,19 @@ def raise_http_404(exception_text: str | Enum = 'Not found.'):
             exception_text, Enum) else exception_text.value)
 
 
+def normalize_query(query: str | None) -> str | None:
+    """
+    Lowercase text query and collapse whitespaces.
+
+    Search fields are analyzed with lowercase filter, so it doesn't change
+    results, but variants of the same query share one cache entry.
+    """
+
+    if query is None:
+        return None
+    return ' '.join(query.lower().split())
+
+
 class CommonQueryParams:
     """Dependency class to parse text query param."""
 
@@ -23,7 +42,7 @@ class CommonQueryParams:
             description='Search by text word.'
         ),
     ):
-        self.query = query
+        self.query = normalize_query(query)
 
     def __repr__(self):
         return 'query={query}'.format(
@@ -51,14 +70,39 @@ class PaginateQueryParams:
             ge=1,
             le=500,
         ),
+        cursor: str = Query(
+            None,
+            title='Page cursor.',
+            description='Cursor of the page to return from X-Next-Cursor '
+                        'header of the previous page, page[number] is '
+                        'ignored if it is set',
+            alias='page[cursor]',
+        ),
     ):
         self.page_number = page_number
         self.page_size = page_size
+        self.cursor: Cursor | None = None
+        if cursor:
+            try:
+                self.cursor = Cursor.decode(cursor)
+            except ValueError as error:
+                raise HTTPException(
+                    status_code=HTTPStatus.BAD_REQUEST,
+                    detail=str(error),
+                )
+
+    @property
+    def offset(self) -> int:
+        return self.page_size * (self.page_number - 1)
 
     def __repr__(self):
-        return 'page_number={page_number},page_size={page_size}'.format(
-            page_number=self.page_number,
-            page_size=self.page_size
+        return (
+            'page_number={page_number},page_size={page_size},'
+            'cursor={cursor}'
+        ).format(
+            page_number=self.page_number if self.cursor is None else '',
+            page_size=self.page_size,
+            cursor=self.cursor or '',
         )
 
 
@@ -90,6 +134,70 @@ class FilterQueryParams:
         )
 
 
+class FieldsQueryParams:
+    """Dependency class to parse sparse fieldset query param."""
+
+    def __init__(
+        self,
+        fields: str = Query(
+            None,
+            title='Fields to return.',
+            description='Comma separated fields of items to return, all '
+                        'fields by default, uuid is always returned',
+        ),
+    ):
+        self.fields: tuple[str, ...] = tuple(sorted({
+            field.strip() for field in (fields or '').split(',')
+            if field.strip()
+        }))
+
+    def include(self, model: Type[BaseModel]) -> set[str] | None:
+        """
+        Get fields of model to return.
+
+        Args:
+            model: Type[BaseModel] Class of items.
+        Returns:
+            Requested fields with uuid, None if fields aren't set.
+        """
+
+        if not self.fields:
+            return None
+        unknown = set(self.fields) - set(model.__fields__)
+        if unknown:
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail='Unknown fields: {0}.'.format(
+                    ', '.join(sorted(unknown))
+                ),
+            )
+        return {'uuid', *self.fields}
+
+    def project(
+            self,
+            items: Iterable[BaseModel],
+            model: Type[BaseModel],
+    ) -> list[BaseModel | dict]:
+        """
+        Trim items to requested fields.
+
+        Args:
+            items: Iterable[BaseModel] Response models.
+            model: Type[BaseModel] Class of items.
+        Returns:
+            Items as is if fields aren't set, dicts of requested fields
+            otherwise.
+        """
+
+        include = self.include(model)
+        if include is None:
+            return list(items)
+        return [item.dict(include=include) for item in items]
+
+    def __repr__(self):
+        return 'fields={fields}'.format(fields=','.join(self.fields))
+
+
 class FilmQueryParams:
     """Dependency class to parse filmwork uuid query param."""
 
@@ -107,3 +215,35 @@ class FilmQueryParams:
         return 'film_id={film_id}'.format(
             film_id=self.film_id
         )
+
+
+def check_batch_size(ids: list[str]) -> None:
+    """Reject batch requests with more than FILMS_BATCH_MAX_SIZE ids."""
+
+    if len(ids) > FILMS_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail='Too many ids, max {0}.'.format(FILMS_BATCH_MAX_SIZE),
+        )
+
+
+class FilmBatchQueryParams:
+    """Dependency class to parse repeated filmwork uuid query params."""
+
+    def __init__(
+        self,
+        ids: list[str] = Query(
+            ...,
+            title='Filmworks uuids',
+            description='Filmwork uuid, repeated for every filmwork.',
+            alias='id',
+        ),
+    ):
+        check_batch_size(ids)
+        self.ids: list[str] = ids
+
+
+class FilmBatchBody(BaseModel):
+    """Body of filmworks batch request."""
+
+    ids: list[str]
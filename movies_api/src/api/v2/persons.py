@@ -0,0 +1,92 @@
+from fastapi import APIRouter, Depends, Request, Query, Path
+
+from core.config import VIEW_CACHE_EXPIRE_IN_SECONDS
+from api.v1.messages import PersonErrorMessage
+from api.v1.utils import (
+    FieldsQueryParams,
+    PaginateQueryParams,
+    raise_http_404
+)
+from models.response_models import PersonResponse
+from services.cache import cache
+from services.pagination import Page
+from services.persons import PersonService, get_person_service
+
+router = APIRouter()
+
+
+@router.get('/search', response_model=list[PersonResponse])
+@cache(
+    expire=VIEW_CACHE_EXPIRE_IN_SECONDS,
+    indexes=('persons',),
+    serializer_class=PersonResponse,
+    serialize_collection=True,
+    list_tags=True,
+)
+async def search_persons_by_name(
+    request: Request,
+    query: str = Query(
+        None,
+        title='Search by full name field.',
+        description='Search and return persons whom full_name match query text'
+    ),
+    paginate_params: PaginateQueryParams = Depends(),
+    fields_params: FieldsQueryParams = Depends(),
+    person_service: PersonService = Depends(get_person_service),
+) -> list[PersonResponse]:
+    """
+    Get list of persons who name has query text, a record per person:
+    - **query_text**: Text to use in search by full_name field.
+    - **page[number]**: The number of the displayed page
+    - **page[size]**: The size of the data per page
+    - **page[cursor]**: Cursor of the next page from X-Next-Cursor header
+    - **fields**: Comma separated fields to return (full_name, roles)
+
+    Example:
+    - /api/v2/persons/search?query=captain&page[number]=&lt;int&gt;&page[size]=&lt;int&gt;
+    """
+
+    persons = await person_service.get_persons_by_query(
+        query,
+        paginate_params
+    )
+    if not persons:
+        raise_http_404(PersonErrorMessage.not_found_persons)
+    return Page(
+        fields_params.project(
+            (PersonResponse(**person.dict()) for person in persons),
+            PersonResponse,
+        ),
+        next_cursor=persons.next_cursor,
+    )
+
+
+@router.get('/{person_id}', response_model=PersonResponse)
+@cache(
+    expire=VIEW_CACHE_EXPIRE_IN_SECONDS,
+    indexes=('persons',),
+    serializer_class=PersonResponse,
+)
+async def get_person_by_uuid(
+        request: Request,
+        person_id: str = Path(
+            ...,
+            title='Person uuid',
+            description='Person uuid.',
+        ),
+        person_service: PersonService = Depends(get_person_service),
+) -> PersonResponse:
+    """
+    Get person info with all person's roles by uuid:
+
+    - **person_id**: Person uuid
+
+    Example:
+
+    - /api/v2/persons/&lt;person_id:uuid&gt;
+    """
+
+    person = await person_service.get_person_by_id(person_id)
+    if not person:
+        raise_http_404(PersonErrorMessage.not_found_info_about_person)
+    return PersonResponse(**person.dict())
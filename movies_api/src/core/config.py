@@ -9,19 +9,213 @@ logging_config.dictConfig(LOGGING)
 # Название проекта. Используется в Swagger-документации
 PROJECT_NAME = os.getenv('PROJECT_NAME', 'movies')
 
+# Number of gunicorn workers, exported by gunicorn_conf.py. Connection pools
+# are per worker, so total connections budgets are divided by it.
+WORKERS = int(os.getenv('GUNICORN_WORKERS', 1))
+
 # Настройки Redis
 REDIS_HOST = os.getenv('REDIS_HOST', '127.0.0.1')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
+# Max connections of every Redis client of a worker, REDIS_CONNECTIONS_BUDGET
+# sets it as a share of total connections of all workers instead.
+REDIS_POOL_SIZE = int(os.getenv('REDIS_POOL_SIZE', 0)) or max(
+    int(os.getenv('REDIS_CONNECTIONS_BUDGET', 50 * WORKERS)) // WORKERS, 1
+)
+# Wait for a free connection of exhausted pool before failing
+REDIS_POOL_TIMEOUT_IN_SECONDS = float(
+    os.getenv('REDIS_POOL_TIMEOUT_IN_SECONDS', 1)
+)
+REDIS_SOCKET_TIMEOUT_IN_SECONDS = float(
+    os.getenv('REDIS_SOCKET_TIMEOUT_IN_SECONDS', 2)
+)
+REDIS_CONNECT_TIMEOUT_IN_SECONDS = float(
+    os.getenv('REDIS_CONNECT_TIMEOUT_IN_SECONDS', 1)
+)
+REDIS_HEALTH_CHECK_INTERVAL_IN_SECONDS = int(
+    os.getenv('REDIS_HEALTH_CHECK_INTERVAL_IN_SECONDS', 30)
+)
+# Connections of every client opened on startup
+REDIS_PREOPEN_CONNECTIONS = int(os.getenv('REDIS_PREOPEN_CONNECTIONS', 2))
 
 # Настройки Elasticsearch
 ELASTIC_HOST = os.getenv('ELASTIC_HOST', '127.0.0.1')
 ELASTIC_PORT = int(os.getenv('ELASTIC_PORT', 9200))
+# Max connections to every node of a worker, ELASTIC_CONNECTIONS_BUDGET
+# sets it as a share of total connections to node of all workers instead.
+ELASTIC_CONNECTIONS_PER_NODE = int(
+    os.getenv('ELASTIC_CONNECTIONS_PER_NODE', 0)
+) or max(
+    int(os.getenv('ELASTIC_CONNECTIONS_BUDGET', 10 * WORKERS)) // WORKERS, 1
+)
+ELASTIC_REQUEST_TIMEOUT_IN_SECONDS = float(
+    os.getenv('ELASTIC_REQUEST_TIMEOUT_IN_SECONDS', 10)
+)
+ELASTIC_MAX_RETRIES = int(os.getenv('ELASTIC_MAX_RETRIES', 3))
+ELASTIC_RETRY_ON_TIMEOUT = (
+    os.getenv('ELASTIC_RETRY_ON_TIMEOUT', 'false') == 'true'
+)
+ELASTIC_HTTP_COMPRESS = os.getenv('ELASTIC_HTTP_COMPRESS', 'false') == 'true'
+# Discover cluster nodes instead of using ELASTIC_HOST only
+ELASTIC_SNIFF_ON_START = os.getenv('ELASTIC_SNIFF_ON_START', 'false') == 'true'
+ELASTIC_SNIFF_ON_NODE_FAILURE = (
+    os.getenv('ELASTIC_SNIFF_ON_NODE_FAILURE', 'false') == 'true'
+)
+ELASTIC_MIN_DELAY_BETWEEN_SNIFFING_IN_SECONDS = float(
+    os.getenv('ELASTIC_MIN_DELAY_BETWEEN_SNIFFING_IN_SECONDS', 60)
+)
+# Connections opened on startup
+ELASTIC_PREOPEN_CONNECTIONS = int(os.getenv('ELASTIC_PREOPEN_CONNECTIONS', 2))
+# Search timeout, partial results are returned when it expires
+ELASTIC_SEARCH_TIMEOUT = os.getenv('ELASTIC_SEARCH_TIMEOUT', '2s')
+# Concurrent searches issued within the window are sent in one _msearch
+ELASTIC_MSEARCH_ENABLED = os.getenv('ELASTIC_MSEARCH_ENABLED', 'true') == 'true'
+ELASTIC_MSEARCH_WINDOW_IN_SECONDS = float(
+    os.getenv('ELASTIC_MSEARCH_WINDOW_IN_SECONDS', 0.002)
+)
+ELASTIC_MSEARCH_MAX_BATCH = int(os.getenv('ELASTIC_MSEARCH_MAX_BATCH', 50))
 
 # Корень проекта
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Cached data is invalidated by ETL change notifications (see
+# CACHE_ENTITIES_CHANNEL): documents by their uuids, lists by the index they
+# are built from. So TTLs only bound lost notifications.
 UNIT_CACHE_EXPIRE_IN_SECONDS = 60 * 5  # 5 minutes
-VIEW_CACHE_EXPIRE_IN_SECONDS = os.getenv(
+# TTL of cached "document not found" results
+NEGATIVE_CACHE_EXPIRE_IN_SECONDS = int(
+    os.getenv('NEGATIVE_CACHE_EXPIRE_IN_SECONDS', 30)
+)
+VIEW_CACHE_EXPIRE_IN_SECONDS = int(os.getenv(
     'VIEW_CACHE_EXPIRE_IN_SECONDS',
     60 * 60  # 1 hour by default.
+))
+# Stale view cache entries are served while refreshed in background during
+# this period after expiration, 0 disables stale-while-revalidate.
+VIEW_CACHE_STALE_IN_SECONDS = int(
+    os.getenv('VIEW_CACHE_STALE_IN_SECONDS', 60 * 10)
+)
+# Probabilistic early expiration factor (XFetch), 0 disables it.
+VIEW_CACHE_XFETCH_BETA = float(os.getenv('VIEW_CACHE_XFETCH_BETA', 1.0))
+# Relative jitter of view cache TTL, 0.1 means +-10%.
+VIEW_CACHE_TTL_JITTER = float(os.getenv('VIEW_CACHE_TTL_JITTER', 0.1))
+# View cache admission: only keys looked up at least MIN_FREQUENCY times
+# within the last WINDOW lookups of a worker are cached.
+VIEW_CACHE_ADMISSION_ENABLED = (
+    os.getenv('VIEW_CACHE_ADMISSION_ENABLED', 'true') == 'true'
+)
+VIEW_CACHE_ADMISSION_WINDOW = int(
+    os.getenv('VIEW_CACHE_ADMISSION_WINDOW', 10000)
+)
+VIEW_CACHE_ADMISSION_MIN_FREQUENCY = int(
+    os.getenv('VIEW_CACHE_ADMISSION_MIN_FREQUENCY', 2)
+)
+# TTL of larger stored (compressed) payloads is shortened in proportion to
+# their size
+VIEW_CACHE_LARGE_ENTRY_BYTES = int(
+    os.getenv('VIEW_CACHE_LARGE_ENTRY_BYTES', 64 * 1024)
+)
+# Larger stored payloads are never cached
+VIEW_CACHE_MAX_ENTRY_BYTES = int(
+    os.getenv('VIEW_CACHE_MAX_ENTRY_BYTES', 512 * 1024)
+)
+# Payloads of this size and larger are stored gzipped and sent with
+# Content-Encoding to clients accepting it, 0 disables compression.
+VIEW_CACHE_COMPRESS_MIN_BYTES = int(
+    os.getenv('VIEW_CACHE_COMPRESS_MIN_BYTES', 1024)
+)
+VIEW_CACHE_COMPRESS_LEVEL = int(os.getenv('VIEW_CACHE_COMPRESS_LEVEL', 6))
+
+# In-process (per worker) cache tier in front of view cache in Redis
+LOCAL_CACHE_ENABLED = os.getenv('LOCAL_CACHE_ENABLED', 'true') == 'true'
+LOCAL_CACHE_MAX_SIZE_BYTES = int(
+    os.getenv('LOCAL_CACHE_MAX_SIZE_BYTES', 32 * 1024 * 1024)
+)
+LOCAL_CACHE_EXPIRE_IN_SECONDS = int(
+    os.getenv('LOCAL_CACHE_EXPIRE_IN_SECONDS', 60)
 )
+LOCAL_CACHE_HOT_KEY_THRESHOLD = int(
+    os.getenv('LOCAL_CACHE_HOT_KEY_THRESHOLD', 100)
+)
+CACHE_INVALIDATION_CHANNEL = os.getenv(
+    'CACHE_INVALIDATION_CHANNEL',
+    'cache_invalidation:keys',
+)
+# Channel where ETL publishes ids of changed documents
+CACHE_ENTITIES_CHANNEL = os.getenv(
+    'CACHE_ENTITIES_CHANNEL',
+    'cache_invalidation:entities',
+)
+# ETL publishes changed documents to CACHE_ENTITIES_CHANNEL (postgres_to_es
+# REDIS_URL is set)
+ETL_NOTIFICATIONS_ENABLED = (
+    os.getenv('ETL_NOTIFICATIONS_ENABLED', 'true') == 'true'
+)
+
+# Coalescing of concurrent cache misses for the same key
+SINGLE_FLIGHT_TIMEOUT_IN_SECONDS = float(
+    os.getenv('SINGLE_FLIGHT_TIMEOUT_IN_SECONDS', 5)
+)
+SINGLE_FLIGHT_USE_REDIS_LOCK = os.getenv(
+    'SINGLE_FLIGHT_USE_REDIS_LOCK', 'false'
+) == 'true'
+SINGLE_FLIGHT_LOCK_TTL_IN_SECONDS = float(
+    os.getenv('SINGLE_FLIGHT_LOCK_TTL_IN_SECONDS', 10)
+)
+
+# Per-index cache generations, bumped by ETL after index rebuild
+CACHE_GENERATION_PREFIX = os.getenv(
+    'CACHE_GENERATION_PREFIX',
+    'cache_generation:',
+)
+CACHE_GENERATION_REFRESH_IN_SECONDS = float(
+    os.getenv('CACHE_GENERATION_REFRESH_IN_SECONDS', 5)
+)
+
+# Bloom filters of existing documents ids to reject unknown ids in-process,
+# they are only correct while ETL reports ids of new documents.
+ID_FILTER_ENABLED = ETL_NOTIFICATIONS_ENABLED and (
+    os.getenv('ID_FILTER_ENABLED', 'true') == 'true'
+)
+ID_FILTER_INDEXES = ('movies', 'genres', 'persons')
+ID_FILTER_ERROR_RATE = float(os.getenv('ID_FILTER_ERROR_RATE', 0.001))
+ID_FILTER_REBUILD_IN_SECONDS = int(
+    os.getenv('ID_FILTER_REBUILD_IN_SECONDS', 60 * 60)
+)
+
+# View cache warming of hot list pages and popular films
+CACHE_WARMUP_ON_STARTUP = os.getenv('CACHE_WARMUP_ON_STARTUP', 'true') == 'true'
+# Repeat warming every N seconds, 0 means warm on startup only
+CACHE_WARMUP_INTERVAL_IN_SECONDS = int(
+    os.getenv('CACHE_WARMUP_INTERVAL_IN_SECONDS', 0)
+)
+CACHE_WARMUP_PAGES = int(os.getenv('CACHE_WARMUP_PAGES', 3))
+CACHE_WARMUP_PAGE_SIZE = int(os.getenv('CACHE_WARMUP_PAGE_SIZE', 50))
+CACHE_WARMUP_TOP_FILMS = int(os.getenv('CACHE_WARMUP_TOP_FILMS', 100))
+# Max views called per second while warming
+CACHE_WARMUP_RATE = float(os.getenv('CACHE_WARMUP_RATE', 20))
+
+# Keep alive of Elasticsearch point-in-time opened for cursor pagination,
+# empty value disables point-in-time.
+PAGINATION_PIT_KEEP_ALIVE = os.getenv('PAGINATION_PIT_KEEP_ALIVE', '1m')
+
+# Films catalog snapshot written by postgres_to_es, memory-mapped to serve
+# popular films pages, empty value disables it. Snapshot is reloaded when
+# the file is replaced.
+CATALOG_SNAPSHOT_PATH = os.getenv('CATALOG_SNAPSHOT_PATH', '')
+CATALOG_SNAPSHOT_CHECK_INTERVAL_IN_SECONDS = float(
+    os.getenv('CATALOG_SNAPSHOT_CHECK_INTERVAL_IN_SECONDS', 5)
+)
+
+# Typeahead suggestions of films titles and persons names
+SUGGEST_ENABLED = os.getenv('SUGGEST_ENABLED', 'true') == 'true'
+# Max suggestions of a kind, top of frequent prefixes is precomputed for it
+SUGGEST_TOP_K = int(os.getenv('SUGGEST_TOP_K', 10))
+SUGGEST_REBUILD_IN_SECONDS = int(os.getenv('SUGGEST_REBUILD_IN_SECONDS', 600))
+
+# Max number of films ids in one films batch request
+FILMS_BATCH_MAX_SIZE = int(os.getenv('FILMS_BATCH_MAX_SIZE', 100))
+
+# Films NDJSON export: films read from Elasticsearch per search (and held in
+# memory per export), keep alive of its point-in-time between searches.
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+EXPORT_PIT_KEEP_ALIVE = os.getenv('EXPORT_PIT_KEEP_ALIVE', '1m')
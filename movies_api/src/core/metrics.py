@@ -0,0 +1,159 @@
+import os
+import time
+from functools import wraps
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Metrics of all gunicorn workers are aggregated if PROMETHEUS_MULTIPROC_DIR
+# is set (see gunicorn_conf.py), otherwise only current process is exposed.
+MULTIPROCESS_MODE = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5,
+)
+
+REQUEST_LATENCY = Histogram(
+    'movies_api_request_duration_seconds',
+    'HTTP requests latency by endpoint.',
+    ['method', 'endpoint', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'movies_api_requests_in_progress',
+    'HTTP requests in progress.',
+    multiprocess_mode='livesum',
+)
+CACHE_REQUESTS = Counter(
+    'movies_api_cache_requests_total',
+    'Cache lookups by key family and result (hit, miss, stale, negative).',
+    ['family', 'result'],
+)
+REDIS_LATENCY = Histogram(
+    'movies_api_redis_duration_seconds',
+    'Redis calls latency by operation.',
+    ['operation'],
+    buckets=LATENCY_BUCKETS,
+)
+ELASTIC_LATENCY = Histogram(
+    'movies_api_elastic_duration_seconds',
+    'Elasticsearch calls latency by operation.',
+    ['operation'],
+    buckets=LATENCY_BUCKETS,
+)
+BACKEND_IN_PROGRESS = Gauge(
+    'movies_api_backend_calls_in_progress',
+    'Redis and Elasticsearch calls in progress.',
+    ['backend'],
+    multiprocess_mode='livesum',
+)
+
+CLIENT_POOL_SIZE = Gauge(
+    'movies_api_client_pool_max_connections',
+    'Max connections of Redis and Elasticsearch clients pools.',
+    ['client'],
+    multiprocess_mode='livesum',
+)
+CLIENT_POOL_IN_USE = Gauge(
+    'movies_api_client_pool_connections_in_use',
+    'Connections taken from Redis and Elasticsearch clients pools.',
+    ['client'],
+    multiprocess_mode='livesum',
+)
+CLIENT_POOL_WAITING = Gauge(
+    'movies_api_client_pool_waiting',
+    'Calls waiting for a free connection of Redis and Elasticsearch clients '
+    'pools.',
+    ['client'],
+    multiprocess_mode='livesum',
+)
+
+
+def track_latency(histogram: Histogram, backend: str, operation: str):
+    """
+    Decorator of async backend calls to observe their latency.
+
+    Args:
+        histogram: Histogram Latency histogram with 'operation' label.
+        backend: str Backend name for in-progress gauge.
+        operation: str Operation label value.
+    """
+
+    observe = histogram.labels(operation).observe
+    in_progress = BACKEND_IN_PROGRESS.labels(backend)
+
+    def wrapper(func):
+        @wraps(func)
+        async def inner(*args, **kwargs):
+            in_progress.inc()
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                observe(time.perf_counter() - started)
+                in_progress.dec()
+        return inner
+    return wrapper
+
+
+def count_cache_request(family: str, result: str, amount: int = 1) -> None:
+    """Count cache lookups of key family with result."""
+
+    if amount:
+        CACHE_REQUESTS.labels(family, result).inc(amount)
+
+
+class MetricsMiddleware:
+    """ASGI middleware to observe HTTP requests latency."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            # Router puts matched view to scope, label by its name to keep
+            # cardinality bounded.
+            endpoint = scope.get('endpoint')
+            REQUEST_LATENCY.labels(
+                scope['method'],
+                endpoint.__name__ if endpoint else 'unmatched',
+                status,
+            ).observe(time.perf_counter() - started)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Render metrics in Prometheus text format.
+
+    Returns:
+        Tuple of body and content type.
+    """
+
+    if MULTIPROCESS_MODE:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+
+import aioredis
+from aioredis import Redis
+from aioredis.connection import Connection
+from elastic_transport import AiohttpHttpNode, NodeConfig
+from elasticsearch import AsyncElasticsearch
+
+from core import config
+from core.metrics import (
+    CLIENT_POOL_IN_USE,
+    CLIENT_POOL_SIZE,
+    CLIENT_POOL_WAITING,
+)
+from db import elastic, redis
+
+logger = logging.getLogger(__name__)
+
+
+class MeteredConnectionPool(aioredis.BlockingConnectionPool):
+    """
+    Redis connection pool which reports its saturation to metrics.
+
+    Pool is blocking, so calls wait up to 'timeout' for a free connection
+    when 'max_connections' are taken instead of failing at once.
+    """
+
+    def __init__(self, *args, metrics_label: str = 'redis', **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._in_use_ids: set[int] = set()
+        self._in_use = CLIENT_POOL_IN_USE.labels(metrics_label)
+        self._waiting = CLIENT_POOL_WAITING.labels(metrics_label)
+        CLIENT_POOL_SIZE.labels(metrics_label).set(self.max_connections)
+
+    async def get_connection(self, command_name, *keys, **options):
+        self._waiting.inc()
+        try:
+            connection = await super().get_connection(
+                command_name, *keys, **options,
+            )
+        finally:
+            self._waiting.dec()
+        self._in_use_ids.add(id(connection))
+        self._in_use.inc()
+        return connection
+
+    async def release(self, connection: Connection):
+        # Pool releases connections it failed to prepare itself, those were
+        # not counted as taken.
+        if id(connection) in self._in_use_ids:
+            self._in_use_ids.discard(id(connection))
+            self._in_use.dec()
+        await super().release(connection)
+
+    async def preopen(self, count: int) -> None:
+        """Open 'count' connections ahead of the first requests."""
+
+        connections = []
+        try:
+            for _ in range(min(count, self.max_connections)):
+                connections.append(await self.get_connection('PING'))
+        except (aioredis.RedisError, OSError) as e:
+            logger.warning('Redis connections are not opened: %s', e)
+        finally:
+            for connection in connections:
+                await self.release(connection)
+
+
+class MeteredAiohttpHttpNode(AiohttpHttpNode):
+    """
+    Elasticsearch node which reports saturation of its connections to
+    metrics.
+
+    aiohttp doesn't expose its pool, requests beyond 'connections_per_node'
+    wait for a free connection, so requests in flight are split into
+    connections in use and waiting ones.
+    """
+
+    def __init__(self, config: NodeConfig) -> None:
+        super().__init__(config)
+        self._in_flight = 0
+        self._in_use = CLIENT_POOL_IN_USE.labels('elastic')
+        self._waiting = CLIENT_POOL_WAITING.labels('elastic')
+
+    def _track(self, delta: int) -> None:
+        limit = self.config.connections_per_node
+        before, self._in_flight = self._in_flight, self._in_flight + delta
+        self._in_use.inc(min(self._in_flight, limit) - min(before, limit))
+        self._waiting.inc(
+            max(self._in_flight - limit, 0) - max(before - limit, 0)
+        )
+
+    async def perform_request(self, *args, **kwargs):
+        self._track(1)
+        try:
+            return await super().perform_request(*args, **kwargs)
+        finally:
+            self._track(-1)
+
+
+def create_redis(
+        db: int = 0,
+        decode_responses: bool = False,
+        metrics_label: str = 'redis',
+) -> Redis:
+    """
+    Create Redis client with pool configured from settings.
+
+    Args:
+        db: int Redis database number.
+        decode_responses: bool Decode responses to str.
+        metrics_label: str Client label of pool metrics.
+    Returns:
+        Redis client.
+    """
+
+    pool = MeteredConnectionPool.from_url(
+        f'redis://{config.REDIS_HOST}:{config.REDIS_PORT}/{db}',
+        max_connections=config.REDIS_POOL_SIZE,
+        timeout=config.REDIS_POOL_TIMEOUT_IN_SECONDS,
+        socket_timeout=config.REDIS_SOCKET_TIMEOUT_IN_SECONDS,
+        socket_connect_timeout=config.REDIS_CONNECT_TIMEOUT_IN_SECONDS,
+        socket_keepalive=True,
+        health_check_interval=config.REDIS_HEALTH_CHECK_INTERVAL_IN_SECONDS,
+        decode_responses=decode_responses,
+        encoding='utf-8',
+        metrics_label=metrics_label,
+    )
+    return Redis(connection_pool=pool)
+
+
+def create_elastic() -> AsyncElasticsearch:
+    """Create Elasticsearch client with pool configured from settings."""
+
+    hosts = [f'http://{config.ELASTIC_HOST}:{config.ELASTIC_PORT}']
+    CLIENT_POOL_SIZE.labels('elastic').set(
+        config.ELASTIC_CONNECTIONS_PER_NODE * len(hosts)
+    )
+    return AsyncElasticsearch(
+        hosts=hosts,
+        node_class=MeteredAiohttpHttpNode,
+        connections_per_node=config.ELASTIC_CONNECTIONS_PER_NODE,
+        request_timeout=config.ELASTIC_REQUEST_TIMEOUT_IN_SECONDS,
+        max_retries=config.ELASTIC_MAX_RETRIES,
+        retry_on_timeout=config.ELASTIC_RETRY_ON_TIMEOUT,
+        http_compress=config.ELASTIC_HTTP_COMPRESS,
+        sniff_on_start=config.ELASTIC_SNIFF_ON_START,
+        sniff_on_node_failure=config.ELASTIC_SNIFF_ON_NODE_FAILURE,
+        min_delay_between_sniffing=(
+            config.ELASTIC_MIN_DELAY_BETWEEN_SNIFFING_IN_SECONDS
+        ),
+    )
+
+
+async def preopen_elastic(es: AsyncElasticsearch, count: int) -> None:
+    """Open up to 'count' connections by concurrent pings."""
+
+    if count > 0:
+        await asyncio.gather(*(es.ping() for _ in range(count)))
+
+
+async def init_clients() -> None:
+    """
+    Create clients of a worker and open their connections.
+
+    Clients are shared by all services of the worker. Clients of different
+    Redis databases or response decoding can't share connections, as both
+    are connection settings.
+    """
+
+    redis.redis = create_redis(decode_responses=True, metrics_label='redis')
+    # View cache keeps raw response bodies, so the client is binary.
+    redis.cache = create_redis(db=2, metrics_label='redis_cache')
+    elastic.es = create_elastic()
+    await asyncio.gather(
+        redis.redis.connection_pool.preopen(config.REDIS_PREOPEN_CONNECTIONS),
+        redis.cache.connection_pool.preopen(config.REDIS_PREOPEN_CONNECTIONS),
+        preopen_elastic(elastic.es, config.ELASTIC_PREOPEN_CONNECTIONS),
+    )
+
+
+async def close_clients() -> None:
+    """Close clients of a worker."""
+
+    await redis.cache.close()
+    await redis.redis.close()
+    await redis.cache.connection_pool.disconnect()
+    await redis.redis.connection_pool.disconnect()
+    await elastic.es.close()
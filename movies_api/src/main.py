@@ -1,18 +1,37 @@
+import asyncio
 import logging
-import aioredis
+from contextlib import suppress
+from http import HTTPStatus
 import uvicorn as uvicorn
-from elasticsearch import AsyncElasticsearch
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.responses import ORJSONResponse
 
-from api.v1 import films, persons, genres
+from api.v1 import films, persons, genres, suggest
+from api.v2 import persons as persons_v2
 from core import config
 from core.logger import LOGGING
+from core.metrics import MetricsMiddleware, render_metrics
+from db import clients
 from db import elastic
 from db import redis
 from models.data_models import Tags
+from services.admission import CacheAdmission
 from services.cache import CacheAPIResponse
-from services.data_services import RedisService
+from services.catalog import FilmCatalog
+from services.data_services import (
+    ElasticService,
+    RedisService,
+    SearchTimeoutError,
+)
+from services.generations import CacheGenerations
+from services.id_filter import DocumentIdFilters
+from services.invalidation import CacheInvalidationListener
+from services.local_cache import LocalCache
+from services.films import get_film_service
+from services.genres import get_genre_service
+from services.single_flight import SingleFlight
+from services.suggest import SuggestIndexes
+from services.warmup import CacheWarmer, warm_periodically
 
 
 app = FastAPI(
@@ -21,36 +40,142 @@ app = FastAPI(
     openapi_url='/api/openapi.json',
     default_response_class=ORJSONResponse,
 )
+app.add_middleware(MetricsMiddleware)
+invalidation_listener: CacheInvalidationListener | None = None
+cache_warmup_task: asyncio.Task | None = None
+
+
+def get_cache_warmer() -> CacheWarmer:
+    """Create cache warmer which uses the same services as views."""
+
+    return CacheWarmer(
+        film_service=get_film_service(redis=redis.redis, elastic=elastic.es),
+        genre_service=get_genre_service(
+            redis=redis.redis, elastic=elastic.es,
+        ),
+        pages=config.CACHE_WARMUP_PAGES,
+        page_size=config.CACHE_WARMUP_PAGE_SIZE,
+        top_films=config.CACHE_WARMUP_TOP_FILMS,
+        rate=config.CACHE_WARMUP_RATE,
+    )
 
 
 @app.on_event('startup')
 async def startup():
-    redis.redis = aioredis.from_url(
-        f'redis://{config.REDIS_HOST}:{config.REDIS_PORT}',
-        encoding='utf-8',
-        decode_responses=True,
+    await clients.init_clients()
+    CacheGenerations.init(
+        redis=redis.cache,
+        prefix=config.CACHE_GENERATION_PREFIX,
+        refresh_interval=config.CACHE_GENERATION_REFRESH_IN_SECONDS,
     )
-    elastic.es = AsyncElasticsearch(
-        hosts=[
-            f'http://{config.ELASTIC_HOST}:{config.ELASTIC_PORT}',
-        ]
-    )
-    redis.cache = aioredis.from_url(
-        f'redis://{config.REDIS_HOST}:{config.REDIS_PORT}/2',
-        encoding='utf-8',
-        decode_responses=True,
+    local_cache = None
+    if config.LOCAL_CACHE_ENABLED:
+        local_cache = LocalCache(
+            max_size_bytes=config.LOCAL_CACHE_MAX_SIZE_BYTES,
+            ttl=config.LOCAL_CACHE_EXPIRE_IN_SECONDS,
+            hot_key_threshold=config.LOCAL_CACHE_HOT_KEY_THRESHOLD,
+        )
+    view_cache_service = RedisService(
+        redis=redis.cache,
+        local_cache=local_cache,
+        invalidation_channel=config.CACHE_INVALIDATION_CHANNEL,
     )
     CacheAPIResponse.init(
-        redis_service=RedisService(redis=redis.cache),
+        redis_service=view_cache_service,
         expire=config.VIEW_CACHE_EXPIRE_IN_SECONDS,
+        single_flight=SingleFlight(
+            timeout=config.SINGLE_FLIGHT_TIMEOUT_IN_SECONDS,
+            lock_redis=(
+                redis.cache if config.SINGLE_FLIGHT_USE_REDIS_LOCK else None
+            ),
+            lock_ttl=config.SINGLE_FLIGHT_LOCK_TTL_IN_SECONDS,
+        ),
+        stale_period=config.VIEW_CACHE_STALE_IN_SECONDS,
+        xfetch_beta=config.VIEW_CACHE_XFETCH_BETA,
+        jitter=config.VIEW_CACHE_TTL_JITTER,
+        admission=(
+            CacheAdmission(
+                window=config.VIEW_CACHE_ADMISSION_WINDOW,
+                min_frequency=config.VIEW_CACHE_ADMISSION_MIN_FREQUENCY,
+                large_entry_bytes=config.VIEW_CACHE_LARGE_ENTRY_BYTES,
+                max_entry_bytes=config.VIEW_CACHE_MAX_ENTRY_BYTES,
+            )
+            if config.VIEW_CACHE_ADMISSION_ENABLED else None
+        ),
+        compress_min_bytes=config.VIEW_CACHE_COMPRESS_MIN_BYTES,
+        compress_level=config.VIEW_CACHE_COMPRESS_LEVEL,
+    )
+    global invalidation_listener
+    invalidation_listener = CacheInvalidationListener(
+        redis=redis.cache,
+        keys_channel=config.CACHE_INVALIDATION_CHANNEL,
+        entities_channel=config.CACHE_ENTITIES_CHANNEL,
+        local_cache=local_cache,
+        tagged_services=[view_cache_service, RedisService(redis.redis)],
     )
+    invalidation_listener.start()
+    if config.ID_FILTER_ENABLED:
+        DocumentIdFilters.init(
+            elastic=ElasticService(elastic.es),
+            indexes=config.ID_FILTER_INDEXES,
+            error_rate=config.ID_FILTER_ERROR_RATE,
+            rebuild_interval=config.ID_FILTER_REBUILD_IN_SECONDS,
+        )
+    if config.SUGGEST_ENABLED:
+        SuggestIndexes.init(
+            elastic=ElasticService(elastic.es),
+            top_k=config.SUGGEST_TOP_K,
+            rebuild_interval=config.SUGGEST_REBUILD_IN_SECONDS,
+        )
+    if config.CATALOG_SNAPSHOT_PATH:
+        FilmCatalog.init(
+            config.CATALOG_SNAPSHOT_PATH,
+            check_interval=config.CATALOG_SNAPSHOT_CHECK_INTERVAL_IN_SECONDS,
+        )
+    if config.CACHE_WARMUP_ON_STARTUP:
+        global cache_warmup_task
+        cache_warmup_task = asyncio.create_task(warm_periodically(
+            get_cache_warmer(),
+            redis=redis.cache,
+            interval=config.CACHE_WARMUP_INTERVAL_IN_SECONDS,
+            # Only one of workers warms cache per interval (or per deploy).
+            lock_ttl=config.CACHE_WARMUP_INTERVAL_IN_SECONDS or (
+                config.VIEW_CACHE_EXPIRE_IN_SECONDS
+            ),
+        ))
 
 
 @app.on_event('shutdown')
 async def shutdown():
-    await redis.cache.close()
-    await redis.redis.close()
-    await elastic.es.close()
+    if invalidation_listener is not None:
+        await invalidation_listener.stop()
+    await DocumentIdFilters.stop()
+    await FilmCatalog.stop()
+    await SuggestIndexes.stop()
+    if cache_warmup_task is not None:
+        cache_warmup_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await cache_warmup_task
+    await clients.close_clients()
+
+
+@app.exception_handler(SearchTimeoutError)
+async def search_timeout(request: Request, exc: SearchTimeoutError):
+    """Don't pass partial results of timed out search as full ones."""
+
+    return ORJSONResponse(
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+        content={'detail': 'Search has timed out, try again later'},
+    )
+
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics():
+    """Expose metrics in Prometheus text format."""
+
+    body, content_type = render_metrics()
+    return Response(content=body, headers={'Content-Type': content_type})
+
 
 app.include_router(films.router, prefix='/api/v1/films', tags=[Tags.filmworks])
 app.include_router(
@@ -59,6 +184,16 @@ app.include_router(
     tags=[Tags.persons]
 )
 app.include_router(genres.router, prefix='/api/v1/genres', tags=[Tags.genres])
+app.include_router(
+    suggest.router,
+    prefix='/api/v1/suggest',
+    tags=[Tags.suggest],
+)
+app.include_router(
+    persons_v2.router,
+    prefix='/api/v2/persons',
+    tags=[Tags.persons]
+)
 
 if __name__ == '__main__':
     uvicorn.run(
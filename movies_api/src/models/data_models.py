@@ -1,6 +1,8 @@
 from typing import TypeVar
 from enum import Enum
 
+from pydantic import BaseModel
+
 from models.base_models import Base
 
 
@@ -17,13 +19,6 @@ class Person(Base):
     full_name: str
 
 
-class PersonExt(Person):
-    """Representation of document in persons index into Elasticsearch."""
-
-    role: str
-    film_ids: list[str]
-
-
 class Film(Base):
     """Representation of document in movies index into Elasticsearch."""
 
@@ -36,6 +31,8 @@ class Film(Base):
     writers_names: list[str] = []
     actors: list[Person] = []
     writers: list[Person] = []
+    # Precomputed by ETL, empty until computed for new or reindexed films.
+    similar_ids: list[str] = []
 
 
 class FilmShort(Base):
@@ -45,6 +42,28 @@ class FilmShort(Base):
     imdb_rating: float = None
 
 
+class PersonRole(BaseModel):
+    """Person's role with related films, part of PersonExt."""
+
+    role: str
+    film_ids: list[str] = []
+    films: list[FilmShort] = []
+
+
+class PersonExt(Person):
+    """Representation of document in persons index into Elasticsearch."""
+
+    roles: list[PersonRole] = []
+
+    def get_role(self, role: str) -> PersonRole | None:
+        """Get person's role by its name, if person has it."""
+
+        for person_role in self.roles:
+            if person_role.role == role:
+                return person_role
+        return None
+
+
 # Type that represents data from Elasticsearch.
 ModelType = TypeVar('ModelType', Film, Genre, Person, PersonExt, FilmShort)
 
@@ -55,3 +74,4 @@ class Tags(Enum):
     filmworks = 'films'
     persons = 'persons'
     genres = 'genres'
+    suggest = 'suggest'
@@ -1,5 +1,7 @@
 from typing import TypeVar
 
+from pydantic import BaseModel
+
 from models.base_models import Base
 
 
@@ -27,6 +29,14 @@ class FilmInfoResponse(Base):
     directors: list[Person]
 
 
+class FilmBatchItem(BaseModel):
+    """Filmwork of batch response, film is null if it's not found."""
+
+    uuid: str
+    found: bool
+    film: FilmInfoResponse | None = None
+
+
 class FilmSearchResponse(Base):
     """Film model for search response."""
 
@@ -41,10 +51,31 @@ class PersonSearchResponse(Person):
     film_ids: list[str]
 
 
+class PersonRoleResponse(BaseModel):
+    """Person's role in person response."""
+
+    role: str
+    film_ids: list[str]
+
+
+class PersonResponse(Person):
+    """Person with all person's roles response."""
+
+    roles: list[PersonRoleResponse]
+
+
+class SuggestResponse(BaseModel):
+    """Films and persons suggested for typed text."""
+
+    films: list[FilmSearchResponse]
+    persons: list[Person]
+
+
 # Custom type for typing
 ModelResponseType = TypeVar(
     'ModelResponseType',
     FilmInfoResponse,
     FilmSearchResponse,
     PersonSearchResponse,
+    PersonResponse,
 )
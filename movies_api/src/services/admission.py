@@ -0,0 +1,132 @@
+import hashlib
+import math
+
+# Byte translation table to halve all counters of a row at once.
+HALVE_TABLE = bytes(count >> 1 for count in range(256))
+
+
+class CountMinSketch:
+    """
+    Compact approximate counter of string keys frequencies.
+
+    Estimates never underestimate real counts (until aging) and overestimate
+    them by at most 'error_rate' * total with 'confidence' probability.
+    Counters saturate at 'max_count'.
+    """
+
+    def __init__(
+            self,
+            error_rate: float = 0.001,
+            confidence: float = 0.99,
+            max_count: int = 15,
+    ) -> None:
+        self.width = max(math.ceil(math.e / error_rate), 8)
+        self.depth = max(math.ceil(math.log(1 / (1 - confidence))), 1)
+        self.max_count = max_count
+        self.rows = [bytearray(self.width) for _ in range(self.depth)]
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        # Double hashing: position in i-th row is h1 + i * h2.
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.depth):
+            yield (h1 + i * h2) % self.width
+
+    def add(self, key: str) -> int:
+        """
+        Count key occurrence.
+
+        Returns:
+            Estimated frequency of key including this occurrence.
+        """
+
+        estimate = self.max_count
+        for row, position in zip(self.rows, self._positions(key)):
+            if row[position] < self.max_count:
+                row[position] += 1
+            estimate = min(estimate, row[position])
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        """Get estimated frequency of key."""
+
+        return min(
+            row[position]
+            for row, position in zip(self.rows, self._positions(key))
+        )
+
+    def halve(self) -> None:
+        """Halve all counters to forget old frequencies."""
+
+        for row in self.rows:
+            row[:] = row.translate(HALVE_TABLE)
+
+
+class CacheAdmission:
+    """
+    Admission policy of view cache (TinyLFU-like).
+
+    Frequencies of looked up keys are counted in-process (per worker) with
+    count-min sketch aged every 'window' lookups, so only keys requested at
+    least 'min_frequency' times recently are admitted to the cache and
+    one-off queries don't evict hot entries.
+
+    Size of stored (possibly compressed) payloads is accounted as well:
+    payloads larger than 'max_entry_bytes' are never cached, and TTL of
+    payloads larger than 'large_entry_bytes' is shortened in proportion to
+    their size.
+    """
+
+    def __init__(
+            self,
+            window: int = 10000,
+            min_frequency: int = 2,
+            large_entry_bytes: int = 64 * 1024,
+            max_entry_bytes: int = 512 * 1024,
+    ) -> None:
+        self.window = window
+        self.min_frequency = min_frequency
+        self.large_entry_bytes = large_entry_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.sketch = CountMinSketch(error_rate=1 / window)
+        self._lookups = 0
+
+    def record(self, key: str) -> int:
+        """
+        Count lookup of key.
+
+        Returns:
+            Estimated number of key lookups in the current window.
+        """
+
+        self._lookups += 1
+        if self._lookups >= self.window:
+            self._lookups = 0
+            self.sketch.halve()
+        return self.sketch.add(key)
+
+    def admit(self, key: str, size: int, expire: int) -> int | None:
+        """
+        Decide whether to cache a payload and for how long.
+
+        Args:
+            key: str Cache key, its lookups must be recorded before.
+            size: int Payload size in bytes.
+            expire: int Requested TTL in seconds.
+        Returns:
+            TTL in seconds or None if payload must not be cached.
+        """
+
+        if self.sketch.estimate(key) < self.min_frequency:
+            return None
+        return self.expire_for_size(size, expire)
+
+    def expire_for_size(self, size: int, expire: int) -> int | None:
+        """Shorten TTL of large payloads, None if payload is too large."""
+
+        if size > self.max_entry_bytes:
+            return None
+        if size > self.large_entry_bytes:
+            return max(expire * self.large_entry_bytes // size, 1)
+        return expire
@@ -1,7 +1,16 @@
 from typing import Type
 
+from core import config
+from core.metrics import count_cache_request
 from models.data_models import ModelType
 from services.data_services import RedisService, ElasticService
+from services.generations import CacheGenerations
+from services.id_filter import DocumentIdFilters
+from services.single_flight import SingleFlight
+
+# Cached value of documents which don't exist in index.
+NOT_FOUND_MARKER = '!not_found'
+NOT_FOUND = object()
 
 
 class BaseService:
@@ -12,6 +21,13 @@ class BaseService:
     def __init__(self, redis: RedisService, elastic: ElasticService) -> None:
         self.redis = redis
         self.elastic = elastic
+        self.single_flight = SingleFlight(
+            timeout=config.SINGLE_FLIGHT_TIMEOUT_IN_SECONDS,
+            lock_redis=(
+                redis.redis if config.SINGLE_FLIGHT_USE_REDIS_LOCK else None
+            ),
+            lock_ttl=config.SINGLE_FLIGHT_LOCK_TTL_IN_SECONDS,
+        )
 
     async def get_document_by_id(
             self,
@@ -22,6 +38,9 @@ class BaseService:
         """
         Get document from Elasticsearch index by _id.
 
+        Unknown ids are rejected by index id filter or cached as not found
+        for a short time.
+
         Args:
             item_id: str Document _id in Elasticsearch index.
             serialize_to_model: Type[ModelType] Model to serialize data to.
@@ -29,32 +48,157 @@ class BaseService:
         Returns:
             The document representation as Pydantic Type[ModelType].
         """
+        if not DocumentIdFilters.might_exist(index, item_id):
+            return None
+        generation, = await CacheGenerations.get(index)
         key = self.key_builder(
             index_name=self.elastic_index,
             model_name=serialize_to_model.__name__,
             uuid=item_id,
+            generation=generation,
         )
-        item = await self.redis.get_from_cache(
-            key=key,
-            serialize_model=serialize_to_model,
-        )
-        if not item:
-            item = await self.elastic.get_from_elastic_by_id(
+
+        async def load():
+            return self._decode_cached(
+                await self.redis.get_raw(key), serialize_to_model,
+            )
+
+        async def fetch_and_store():
+            document = await self.elastic.get_from_elastic_by_id(
                 model=serialize_to_model,
                 index=index,
                 uuid=item_id
             )
-            if not item:
-                return None
-            await self.redis.put_to_cache(key=key, data=item)
-        return item
+            if document:
+                await self.redis.put_to_cache(
+                    key=key, data=document, tags=(item_id,),
+                )
+                return document
+            # Tagged, so it is dropped as soon as ETL indexes the document.
+            await self.redis.set_raw(
+                key,
+                NOT_FOUND_MARKER,
+                expire=config.NEGATIVE_CACHE_EXPIRE_IN_SECONDS,
+                tags=(item_id,),
+            )
+            return NOT_FOUND
+
+        family = f'{index}.{serialize_to_model.__name__}'
+        item = await load()
+        if item is None:
+            count_cache_request(family, 'miss')
+            item = await self.single_flight.do(
+                key, fetch_and_store, load=load,
+            )
+        else:
+            count_cache_request(
+                family, 'negative' if item is NOT_FOUND else 'hit',
+            )
+        return None if item is NOT_FOUND else item
+
+    async def get_documents_by_ids(
+            self,
+            item_ids: list[str],
+            serialize_to_model: Type[ModelType],
+            index: str,
+    ) -> dict[str, ModelType | None]:
+        """
+        Get many documents from Elasticsearch index by _id (read-through).
+
+        All ids are looked up in cache with one MGET, only misses are
+        fetched from Elasticsearch with one mget and cache is back-filled
+        in one pipeline (not found documents are cached as negative
+        entries).
+
+        Args:
+            item_ids: list[str] Documents _id in Elasticsearch index.
+            serialize_to_model: Type[ModelType] Model to serialize data to.
+            index: str Elasticsearch index name.
+        Returns:
+            Dict of _id to document or None if not found, in the order of
+            item_ids.
+        """
+        documents = dict.fromkeys(item_ids)
+        candidates = [
+            item_id for item_id in documents
+            if DocumentIdFilters.might_exist(index, item_id)
+        ]
+        generation, = await CacheGenerations.get(index)
+        keys = {
+            item_id: self.key_builder(
+                index_name=index,
+                model_name=serialize_to_model.__name__,
+                uuid=item_id,
+                generation=generation,
+            )
+            for item_id in candidates
+        }
+        cached = await self.redis.get_many_raw(list(keys.values()))
+        missed = []
+        negative = 0
+        for item_id, data in zip(keys, cached):
+            document = self._decode_cached(data, serialize_to_model)
+            if document is None:
+                missed.append(item_id)
+            elif document is NOT_FOUND:
+                negative += 1
+            else:
+                documents[item_id] = document
+        family = f'{index}.{serialize_to_model.__name__}'
+        count_cache_request(family, 'miss', len(missed))
+        count_cache_request(family, 'negative', negative)
+        count_cache_request(family, 'hit', len(keys) - len(missed) - negative)
+
+        fetched = await self.elastic.get_map_from_elastic_by_ids(
+            model=serialize_to_model,
+            index=index,
+            ids=missed,
+        )
+        back_fill = []
+        for item_id in missed:
+            document = fetched.get(item_id)
+            if document is None:
+                back_fill.append((
+                    keys[item_id],
+                    NOT_FOUND_MARKER,
+                    config.NEGATIVE_CACHE_EXPIRE_IN_SECONDS,
+                    (item_id,),
+                ))
+                continue
+            documents[item_id] = document
+            back_fill.append((
+                keys[item_id],
+                self.redis.serialize(document),
+                config.UNIT_CACHE_EXPIRE_IN_SECONDS,
+                (item_id,),
+            ))
+        await self.redis.set_many_raw(back_fill)
+        return documents
+
+    def _decode_cached(
+            self,
+            data: bytes | str | None,
+            serialize_to_model: Type[ModelType],
+    ) -> ModelType | object | None:
+        """
+        Decode cached document.
+
+        Returns:
+            Document, NOT_FOUND for negative entry or None on cache miss.
+        """
+        if not data:
+            return None
+        if data in (NOT_FOUND_MARKER, NOT_FOUND_MARKER.encode()):
+            return NOT_FOUND
+        return self.redis.deserialize(data, serialize_to_model)
 
     def key_builder(
             self,
             index_name: str = '',
             model_name: str = '',
             uuid: str = '',
-            separator: str = '::') -> str:
+            separator: str = '::',
+            generation: int = 0) -> str:
         """
         Build key for data in redis storage.
         Params:
@@ -62,11 +206,16 @@ class BaseService:
             model_name: str Pydantic model representation name.
             uuid: str Entity uuid.
             separator: str Separator. default = '::'
+            generation: int Cache generation of the index.
 
         Returns:
-            '{index_name}{separator}{model_name}{separator}{uuid}'
+            '{index_name}{separator}g{generation}{separator}{model_name}'
+            '{separator}{uuid}'
         """
-        return f'{index_name}{separator}{model_name}{separator}{uuid}'
+        return (
+            f'{index_name}{separator}g{generation}{separator}'
+            f'{model_name}{separator}{uuid}'
+        )
 
     def __repr__(self) -> str:
         return self.__class__.__name__
@@ -1,10 +1,26 @@
+import asyncio
+import hashlib
 import logging
+import math
+import time
+from enum import Enum
+from http import HTTPStatus
 from functools import wraps
-from typing import Type
+from typing import Callable, Type
 
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from core.metrics import count_cache_request
 from models.response_models import ModelResponseType
 from models.data_models import ModelType
+from services.admission import CacheAdmission
+from services.cache_entry import CacheEntry
+from services.base_service import BaseService
 from services.data_services import RedisService
+from services.generations import CacheGenerations
+from services.pagination import Page
+from services.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +32,14 @@ class CacheAPIResponse:
     _redis_service = None
     _prefix = None
     _expire = None
+    _single_flight = None
+    _stale_period = None
+    _xfetch_beta = None
+    _jitter = None
+    _admission = None
+    _compress_min_bytes = 0
+    _compress_level = 6
+    _background_tasks = set()
 
     @classmethod
     def init(
@@ -23,13 +47,46 @@ class CacheAPIResponse:
             redis_service: RedisService,
             prefix: str = 'response_cache:',
             expire: int = 3600,
+            single_flight: SingleFlight = None,
+            stale_period: int = 0,
+            xfetch_beta: float = 1.0,
+            jitter: float = 0.0,
+            admission: CacheAdmission | None = None,
+            compress_min_bytes: int = 0,
+            compress_level: int = 6,
     ):
+        """
+        Init cache settings.
+
+        Args:
+            redis_service: RedisService Service to store cache entries.
+            prefix: str Cache keys prefix.
+            expire: int Default soft TTL in seconds.
+            single_flight: SingleFlight Coalescer of concurrent misses.
+            stale_period: int Seconds to serve stale entries while they are
+                refreshed in background, 0 disables stale-while-revalidate.
+            xfetch_beta: float Probabilistic early expiration factor,
+                0 disables early refresh.
+            jitter: float Relative TTL jitter, 0.1 means +-10%.
+            admission: CacheAdmission Policy deciding which entries are
+                worth caching, all entries are cached if not set.
+            compress_min_bytes: int Min response body size to store it
+                gzipped, 0 disables compression.
+            compress_level: int Gzip compression level.
+        """
         if cls._init:
             return
         cls._init = True
         cls._redis_service = redis_service
         cls._prefix = prefix
         cls._expire = expire
+        cls._single_flight = single_flight or SingleFlight()
+        cls._stale_period = stale_period
+        cls._xfetch_beta = xfetch_beta
+        cls._jitter = jitter
+        cls._admission = admission
+        cls._compress_min_bytes = compress_min_bytes
+        cls._compress_level = compress_level
 
     @classmethod
     def get_redis_service(cls) -> RedisService:
@@ -43,47 +100,281 @@ class CacheAPIResponse:
     def get_expire(cls) -> int:
         return cls._expire
 
+    @classmethod
+    def get_single_flight(cls) -> SingleFlight:
+        return cls._single_flight
+
+    @classmethod
+    def get_stale_period(cls) -> int:
+        return cls._stale_period
+
+    @classmethod
+    def get_xfetch_beta(cls) -> float:
+        return cls._xfetch_beta
+
+    @classmethod
+    def get_jitter(cls) -> float:
+        return cls._jitter
+
+    @classmethod
+    def get_admission(cls) -> CacheAdmission | None:
+        return cls._admission
+
+    @classmethod
+    def get_compress_min_bytes(cls) -> int:
+        return cls._compress_min_bytes
+
+    @classmethod
+    def get_compress_level(cls) -> int:
+        return cls._compress_level
+
+    @classmethod
+    def refresh_in_background(cls, key: str, refresh) -> None:
+        """
+        Run 'refresh' coroutine function in background task, concurrent
+        refreshes of the same key are coalesced.
+        """
+
+        async def run():
+            try:
+                await cls._single_flight.do(key, refresh)
+            except Exception:
+                logger.exception('Background refresh of %s failed.', key)
 
-def compose_key(prefix, func, *args, **kwargs):
+        task = asyncio.create_task(run())
+        cls._background_tasks.add(task)
+        task.add_done_callback(cls._background_tasks.discard)
+
+
+def index_list_tag(index: str) -> str:
+    """
+    Get tag of cached lists built from index.
+
+    Lists might change with any document of index (e.g. a new film joins
+    search results), not only with documents they already contain.
+    """
+
+    return f'list:{index}'
+
+
+def canonical_value(value) -> str:
+    """Represent view argument value the same way for equal values."""
+
+    if isinstance(value, Enum):
+        return str(value.value)
+    if isinstance(value, str):
+        return value
+    return repr(value)
+
+
+def compose_key(prefix, func, generations=(), *args, **kwargs):
     """
-    Compose key from function arguments.
+    Compose fixed-length key from function arguments.
+
+    Arguments are canonicalized (sorted by name, services skipped) and
+    hashed, generations of indexes the view depends on are folded into the
+    key, so bumping a generation makes all its keys unreachable at once.
 
     Args:
         prefix: str Prefix to use
         func: func Function object (FastAPI view function)
+        generations: tuple[int | str, ...] Generations of indexes and
+            versions of other sources view depends on
         args: Function args parameters
         kwargs: Function kwargs parameters
     Returns:
-        The cache key
+        The cache key '{prefix}{module}.{name}:g{generations}:{hash}'
     """
-    kwargs_str = ','.join(
-        [str(v) for k, v in kwargs['kwargs'].items()]
+    params = '&'.join(
+        f'{name}={canonical_value(value)}'
+        for name, value in sorted(kwargs['kwargs'].items())
+        if not isinstance(value, BaseService)
     )
+    params_hash = hashlib.blake2b(
+        f'{args}?{params}'.encode(), digest_size=16,
+    ).hexdigest()
+    generation = '.'.join(str(g) for g in generations)
     cache_key = (
-        f'{prefix}:{func.__module__}::{func.__name__}::{args}::{kwargs_str}'
+        f'{prefix}{func.__module__}.{func.__name__}:g{generation}:'
+        f'{params_hash}'
     )
     return cache_key
 
 
+def collect_tags(data) -> set[str]:
+    """
+    Collect uuids of all entities data consists of.
+
+    Args:
+        data: Pydantic model, dict or list of them.
+    Returns:
+        Set of 'uuid' and 'film_ids' values found at any depth.
+    """
+
+    tags = set()
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, BaseModel):
+            item = item.dict()
+        if isinstance(item, dict):
+            for key, value in item.items():
+                if key == 'uuid' and isinstance(value, str):
+                    tags.add(value)
+                elif key == 'film_ids' and isinstance(value, list):
+                    tags.update(value)
+                else:
+                    stack.append(value)
+        elif isinstance(item, list):
+            stack.extend(item)
+    return tags
+
+
+def etag_matches(
+        if_none_match: str | None,
+        etag: str,
+        encoding: str | None = None,
+) -> bool:
+    """
+    Check If-None-Match request header against entity tag.
+
+    Weak comparison is used as RFC 7232 requires for If-None-Match. Tags of
+    representations in 'encoding' ('{etag}-{encoding}') match as well, they
+    differ in content coding only.
+    """
+
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        candidate = candidate.removeprefix('W/').strip('"')
+        if encoding:
+            candidate = candidate.removesuffix(f'-{encoding}')
+        if candidate == etag:
+            return True
+    return False
+
+
+def accepts_encoding(accept_encoding: str | None, encoding: str) -> bool:
+    """
+    Check whether Accept-Encoding request header accepts content coding.
+
+    Args:
+        accept_encoding: str | None Accept-Encoding header value.
+        encoding: str Content coding, e.g. 'gzip'.
+    Returns:
+        True if coding is listed (or matched by '*') with non-zero quality.
+    """
+
+    if not accept_encoding:
+        return False
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    quality = qualities.get(encoding, qualities.get('*', 0.0))
+    return quality > 0
+
+
+def response_headers(data) -> dict[str, str]:
+    """Get headers view result adds to response body."""
+
+    if isinstance(data, Page) and data.next_cursor is not None:
+        return {'X-Next-Cursor': data.next_cursor.encode()}
+    return {}
+
+
+def make_response(entry: CacheEntry, request: Request) -> Response:
+    """
+    Build response from cache entry.
+
+    Payload is the final response body, so it is sent as is, without
+    parsing and validation against view 'response_model'. Compressed
+    payload is sent with Content-Encoding to clients accepting it and
+    decompressed for others. Clients are allowed to reuse the body until
+    the entry becomes stale and then to revalidate it with If-None-Match,
+    which is answered with 304 Not Modified if the entry hash still matches.
+    """
+
+    compressed = entry.encoding is not None and accepts_encoding(
+        request.headers.get('accept-encoding'), entry.encoding,
+    )
+    etag = f'{entry.etag}-{entry.encoding}' if compressed else entry.etag
+    headers = {
+        **entry.headers,
+        'ETag': f'"{etag}"',
+        'Cache-Control': f'public, max-age={entry.max_age()}',
+    }
+    if entry.encoding is not None:
+        headers['Vary'] = 'Accept-Encoding'
+    if etag_matches(
+            request.headers.get('if-none-match'), entry.etag, entry.encoding,
+    ):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+    if compressed:
+        headers['Content-Encoding'] = entry.encoding
+    return Response(
+        content=entry.payload if compressed else entry.decompressed(),
+        media_type='application/json',
+        headers=headers,
+    )
+
+
 def cache(
     serializer_class: Type[ModelType] | Type[ModelResponseType] = None,
     expire: int = None,
     serialize_collection: bool = False,
+    indexes: tuple[str, ...] = (),
+    versions: tuple[Callable[[], str], ...] = (),
+    list_tags: bool = False,
 ):
     """
     Cache FastAPI view function decorator.
 
+    Cache stores serialized response body and the view returns it as
+    Response for both hits and misses.
+
+    Entries become stale after 'expire' seconds (or earlier, see
+    CacheEntry.is_stale). In stale-while-revalidate mode stale entries are
+    still returned while a background task refreshes them, until they are
+    dropped by Redis after the additional stale period.
+
+    Entries are tagged with uuids of entities they contain, so they are
+    invalidated when ETL reports these entities changed. Search and list
+    views (list_tags) are tagged with their 'indexes' as well (see
+    index_list_tag), so they are invalidated when any document of these
+    indexes changes, as a changed or new document might enter their results.
+
     Args:
         serializer_class: Type[ModelType] | Type[ModelResponseType]
-            Pydantic class to use for serialize cached data.
+            Pydantic class of view results.
         expire: int Expire time in seconds
         serialize_collection: bool Boolean flag to set serialize single item
             or collection of classes 'serializer_class'
+        indexes: tuple[str, ...] Elasticsearch indexes view data comes from,
+            their cache generations are folded into the key.
+        versions: tuple[Callable[[], str], ...] Getters of versions of other
+            sources of view data (e.g. catalog snapshot), folded into the
+            key as well.
+        list_tags: bool Tag entries with list tags of 'indexes', for views
+            whose results are selected by a query rather than by ids.
     Returns:
         Cached result
     """
 
     def wrapper(func):
+        family = f'{func.__module__}.{func.__name__}'
+
         @wraps(func)
         async def inner(*args, **kwargs):
             nonlocal expire
@@ -100,28 +391,96 @@ def cache(
             serialize_collection = serialize_collection
             redis_service = CacheAPIResponse.get_redis_service()
             prefix = CacheAPIResponse.get_prefix()
+            stale_period = CacheAPIResponse.get_stale_period()
+            admission = CacheAPIResponse.get_admission()
+            # Cache warmer requests are admitted regardless of frequency.
+            warmup = request.scope.get('cache_warmup', False)
 
             cache_key = compose_key(
                 prefix,
                 func,
+                (
+                    *await CacheGenerations.get(*indexes),
+                    *(version() for version in versions),
+                ),
                 args=args,
                 kwargs=copy_kwargs,
             )
-            cached_value = await redis_service.get_from_cache(
-                key=cache_key,
-                serialize_model=serializer_class,
-                serialize_collection=serialize_collection,
-            )
-            if cached_value is not None:
-                logger.info('Cache key %s hit !', cache_key)
-                return cached_value
-            execution_result = await func(*args, **kwargs)
-            await redis_service.put_to_cache(
-                data=execution_result,
-                key=cache_key,
-                serialize_collection=serialize_collection,
-                expire=expire
+
+            async def load() -> CacheEntry | None:
+                raw = await redis_service.get_raw(cache_key)
+                return CacheEntry.decode(raw) if raw else None
+
+            async def execute_and_store() -> CacheEntry:
+                started = time.monotonic()
+                execution_result = await func(*args, **kwargs)
+                payload = redis_service.serialize(
+                    execution_result, serialize_collection
+                )
+                entry = CacheEntry.create(
+                    payload=payload,
+                    expire=expire,
+                    delta=time.monotonic() - started,
+                    jitter=CacheAPIResponse.get_jitter(),
+                    headers=response_headers(execution_result),
+                    compress_min_bytes=(
+                        CacheAPIResponse.get_compress_min_bytes()
+                    ),
+                    compress_level=CacheAPIResponse.get_compress_level(),
+                )
+                # Admission accounts size of the stored (possibly
+                # compressed) payload, it is what the entry costs in cache,
+                # so it is decided after compression.
+                entry_expire = expire
+                if admission is not None and warmup:
+                    entry_expire = admission.expire_for_size(
+                        len(entry.payload), expire,
+                    )
+                elif admission is not None:
+                    entry_expire = admission.admit(
+                        cache_key, len(entry.payload), expire,
+                    )
+                if entry_expire is None:
+                    count_cache_request(family, 'rejected')
+                    return entry
+                if entry_expire != expire:
+                    # Shortened TTL applies to the soft TTL as well, the
+                    # hard one is derived from it.
+                    entry.expire_in(
+                        entry_expire, CacheAPIResponse.get_jitter(),
+                    )
+                # Entry depends on entities of result and on path params.
+                tags = collect_tags(execution_result)
+                tags.update(request.path_params.values())
+                if list_tags:
+                    tags.update(index_list_tag(index) for index in indexes)
+                await redis_service.set_raw(
+                    cache_key,
+                    entry.encode(),
+                    expire=math.ceil(
+                        entry.soft_expire_at - time.time() + stale_period
+                    ),
+                    tags=tags,
+                )
+                return entry
+
+            if admission is not None:
+                admission.record(cache_key)
+            entry = await load()
+            if entry is not None:
+                if not entry.is_stale(CacheAPIResponse.get_xfetch_beta()):
+                    count_cache_request(family, 'hit')
+                    return make_response(entry, request)
+                if stale_period:
+                    count_cache_request(family, 'stale')
+                    CacheAPIResponse.refresh_in_background(
+                        cache_key, execute_and_store
+                    )
+                    return make_response(entry, request)
+            count_cache_request(family, 'miss')
+            entry = await CacheAPIResponse.get_single_flight().do(
+                cache_key, execute_and_store, load=load,
             )
-            return execution_result
+            return make_response(entry, request)
         return inner
     return wrapper
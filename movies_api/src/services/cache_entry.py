@@ -0,0 +1,182 @@
+import gzip
+import math
+import random
+import time
+from hashlib import blake2b
+
+import orjson
+
+# Bump on any change of entry header or payload format, entries written
+# with other versions are treated as misses.
+CACHE_SCHEMA_VERSION = 5
+
+
+class CacheEntry:
+    """
+    View cache entry stored in Redis.
+
+    Entry is a JSON header line with metadata followed by the payload, which
+    is the final serialized response body:
+        - 'v' schema version of entry;
+        - 'soft_expire_at' timestamp after which the entry is stale, while
+          Redis keeps it until the hard TTL;
+        - 'delta' seconds spent to compute the payload, used for
+          probabilistic early expiration (XFetch);
+        - 'etag' hash of the uncompressed payload, used as HTTP entity tag;
+        - 'headers' additional response headers (e.g. next page cursor);
+        - 'encoding' content coding of the payload, None if it's stored
+          uncompressed.
+    """
+
+    separator = b'\n'
+
+    def __init__(
+            self,
+            payload: bytes,
+            soft_expire_at: float,
+            delta: float = 0.0,
+            etag: str | None = None,
+            headers: dict[str, str] | None = None,
+            encoding: str | None = None,
+    ) -> None:
+        self.payload = payload
+        self.soft_expire_at = soft_expire_at
+        self.delta = delta
+        self.etag = etag or self.hash_payload(payload)
+        self.headers = headers or {}
+        self.encoding = encoding
+
+    @staticmethod
+    def hash_payload(payload: bytes) -> str:
+        """Get content hash of payload."""
+
+        return blake2b(payload, digest_size=16).hexdigest()
+
+    @classmethod
+    def create(
+            cls,
+            payload: bytes | str,
+            expire: int,
+            delta: float = 0.0,
+            jitter: float = 0.0,
+            headers: dict[str, str] | None = None,
+            compress_min_bytes: int = 0,
+            compress_level: int = 6,
+    ) -> 'CacheEntry':
+        """
+        Create entry which becomes stale in 'expire' seconds +- jitter.
+
+        Payloads of 'compress_min_bytes' and more are stored gzipped, if
+        it makes them smaller, so compression happens once per entry.
+
+        Args:
+            payload: bytes | str Serialized response body.
+            expire: int Soft TTL in seconds.
+            delta: float Time spent to compute payload in seconds.
+            jitter: float Relative TTL jitter, 0.1 means +-10%.
+            headers: dict[str, str] Additional response headers.
+            compress_min_bytes: int Min payload size to compress, 0 disables
+                compression.
+            compress_level: int Gzip compression level.
+        Returns:
+            CacheEntry instance.
+        """
+
+        if isinstance(payload, str):
+            payload = payload.encode()
+        etag = cls.hash_payload(payload)
+        encoding = None
+        if compress_min_bytes and len(payload) >= compress_min_bytes:
+            # Fixed mtime keeps gzip output the same for the same payload.
+            compressed = gzip.compress(payload, compress_level, mtime=0)
+            if len(compressed) < len(payload):
+                payload, encoding = compressed, 'gzip'
+        entry = cls(
+            payload,
+            0.0,
+            delta,
+            etag,
+            headers=headers,
+            encoding=encoding,
+        )
+        entry.expire_in(expire, jitter)
+        return entry
+
+    def expire_in(self, expire: float, jitter: float = 0.0) -> None:
+        """Make entry stale in 'expire' seconds +- jitter from now."""
+
+        if jitter:
+            expire = expire * random.uniform(1 - jitter, 1 + jitter)
+        self.soft_expire_at = time.time() + expire
+
+    @classmethod
+    def decode(cls, raw: bytes) -> 'CacheEntry | None':
+        """
+        Restore entry from Redis value.
+
+        Returns:
+            CacheEntry or None if value is malformed or written with other
+            schema version.
+        """
+
+        header, separator, payload = raw.partition(cls.separator)
+        if not separator:
+            return None
+        try:
+            meta = orjson.loads(header)
+            if meta.get('v') != CACHE_SCHEMA_VERSION:
+                return None
+            return cls(
+                payload,
+                meta['soft_expire_at'],
+                meta['delta'],
+                meta['etag'],
+                meta['headers'],
+                meta['encoding'],
+            )
+        except (orjson.JSONDecodeError, KeyError, TypeError, AttributeError):
+            return None
+
+    def encode(self) -> bytes:
+        """Serialize entry to store it in Redis."""
+
+        header = orjson.dumps({
+            'v': CACHE_SCHEMA_VERSION,
+            'soft_expire_at': self.soft_expire_at,
+            'delta': self.delta,
+            'etag': self.etag,
+            'headers': self.headers,
+            'encoding': self.encoding,
+        })
+        return header + self.separator + self.payload
+
+    def decompressed(self) -> bytes:
+        """Get uncompressed payload."""
+
+        if self.encoding is None:
+            return self.payload
+        return gzip.decompress(self.payload)
+
+    def is_stale(self, beta: float = 1.0) -> bool:
+        """
+        Check whether entry should be recomputed.
+
+        Entry is considered stale after its soft TTL or earlier with the
+        probability growing as expiration approaches (XFetch algorithm):
+            now - delta * beta * ln(rand()) >= soft_expire_at
+
+        Args:
+            beta: float Early expiration factor, 0 disables early refresh.
+        Returns:
+            True if entry should be refreshed.
+        """
+
+        early = 0.0
+        if beta and self.delta:
+            early = -self.delta * beta * math.log(1.0 - random.random())
+        return time.time() + early >= self.soft_expire_at
+
+    def max_age(self) -> int:
+        """Seconds left until entry becomes stale."""
+
+        return max(0, int(self.soft_expire_at - time.time()))
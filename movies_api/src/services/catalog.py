@@ -0,0 +1,275 @@
+import asyncio
+import bisect
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+from typing import Sequence
+
+from models.data_models import FilmShort
+from services.pagination import Cursor, Page
+
+logger = logging.getLogger(__name__)
+
+# Snapshot file layout, see postgres_to_es/postgres_to_es/catalog.py.
+MAGIC = b'MCAT'
+FORMAT_VERSION = 1
+UUID_SIZE = 36
+SECTIONS = (
+    'ratings',
+    'uuids',
+    'title_offsets',
+    'titles',
+    'asc_order',
+    'uuid_order',
+    'genre_uuids',
+    'genre_offsets',
+    'genre_desc',
+    'genre_asc',
+)
+HEADER = struct.Struct('<4sIII' + 'QQ' * len(SECTIONS))
+FLOAT32 = struct.Struct('<f')
+
+
+def to_float32(value: float) -> float:
+    """Round value to float32, Elasticsearch sorts float fields with it."""
+
+    return FLOAT32.unpack(FLOAT32.pack(value))[0]
+
+
+class CatalogSnapshot:
+    """
+    Read-only memory-mapped films catalog snapshot written by ETL.
+
+    Films are stored in columns pre-sorted by imdb_rating (desc and asc,
+    overall and per genre), so sorted pages are slices of the columns.
+    Pages are in the same order as Elasticsearch sorts films by imdb_rating
+    with uuid tiebreaker. Mapped pages are shared by all workers.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            self._mmap = mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ,
+            )
+        self.version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        buffer = memoryview(self._mmap)
+        magic, version, self.films_count, genres_count, *layout = (
+            HEADER.unpack_from(buffer)
+        )
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f'Unsupported catalog snapshot {path}.')
+        if sys.byteorder != 'little':
+            raise ValueError('Catalog snapshot is little endian.')
+        sections = {
+            name: buffer[offset:offset + length]
+            for name, offset, length in zip(
+                SECTIONS, layout[::2], layout[1::2],
+            )
+        }
+        self._ratings = sections['ratings'].cast('d')
+        self._uuids = sections['uuids']
+        self._title_offsets = sections['title_offsets'].cast('I')
+        self._titles = sections['titles']
+        self._asc_order = sections['asc_order'].cast('I')
+        self._uuid_order = sections['uuid_order'].cast('I')
+        genre_uuids = bytes(sections['genre_uuids']).decode()
+        self._genres = {
+            genre_uuids[index * UUID_SIZE:(index + 1) * UUID_SIZE]: index
+            for index in range(genres_count)
+        }
+        self._genre_offsets = sections['genre_offsets'].cast('I')
+        self._genre_desc = sections['genre_desc'].cast('I')
+        self._genre_asc = sections['genre_asc'].cast('I')
+
+    def uuid(self, row: int) -> str:
+        return bytes(
+            self._uuids[row * UUID_SIZE:(row + 1) * UUID_SIZE]
+        ).decode()
+
+    def rating(self, row: int) -> float | None:
+        rating = self._ratings[row]
+        return None if math.isnan(rating) else rating
+
+    def film(self, row: int) -> FilmShort:
+        title = self._titles[
+            self._title_offsets[row]:self._title_offsets[row + 1]
+        ]
+        return FilmShort(
+            uuid=self.uuid(row),
+            title=bytes(title).decode(),
+            imdb_rating=self.rating(row),
+        )
+
+    def find(self, uuid: str) -> int | None:
+        """Get row of film by uuid."""
+
+        position = bisect.bisect_left(self._uuid_order, uuid, key=self.uuid)
+        if position < self.films_count:
+            row = self._uuid_order[position]
+            if self.uuid(row) == uuid:
+                return row
+        return None
+
+    def sort_key(self, row: int, descending: bool) -> tuple:
+        """Sort key of film as Elasticsearch sorts, missing ratings last."""
+
+        rating = self.rating(row)
+        if rating is None:
+            return True, 0.0, self.uuid(row)
+        rating = to_float32(rating)
+        return False, -rating if descending else rating, self.uuid(row)
+
+    def sequence(self, genre: str | None, descending: bool) -> Sequence[int]:
+        """Rows of films of genre (or all films) in imdb_rating order."""
+
+        if genre is None:
+            return range(self.films_count) if descending else self._asc_order
+        index = self._genres.get(genre)
+        if index is None:
+            return ()
+        rows = self._genre_desc if descending else self._genre_asc
+        return rows[
+            self._genre_offsets[index]:self._genre_offsets[index + 1]
+        ]
+
+    def page(
+            self,
+            genre: str | None,
+            descending: bool,
+            size: int,
+            offset: int = 0,
+            cursor: Cursor | None = None,
+    ) -> Page | None:
+        """
+        Get page of films sorted by imdb_rating.
+
+        Args:
+            genre: str | None Genre uuid to filter films by.
+            descending: bool Sort order.
+            size: int Page size.
+            offset: int Page offset, ignored if cursor is set.
+            cursor: Cursor | None Cursor with [imdb_rating, uuid] of the last
+                film of the previous page.
+        Returns:
+            Page with cursor of the next page if the page is full, None if
+            the cursor can't be resolved in snapshot.
+        """
+
+        rows = self.sequence(genre, descending)
+        start = offset
+        if cursor is not None:
+            if cursor.pit_id or len(cursor.search_after) != 2:
+                return None
+            row = self.find(str(cursor.search_after[1]))
+            if row is None:
+                return None
+            start = bisect.bisect_right(
+                rows,
+                self.sort_key(row, descending),
+                key=lambda item: self.sort_key(item, descending),
+            )
+        page_rows = rows[start:start + size]
+        next_cursor = None
+        if len(page_rows) == size:
+            last = page_rows[-1]
+            rating = self.rating(last)
+            next_cursor = Cursor([
+                None if rating is None else to_float32(rating),
+                self.uuid(last),
+            ])
+        return Page(
+            [self.film(row) for row in page_rows], next_cursor=next_cursor,
+        )
+
+
+class FilmCatalog:
+    """
+    Current catalog snapshot of the worker.
+
+    Snapshot file is checked periodically and remapped when ETL replaces
+    it, requests in progress keep reading the snapshot they started with.
+    """
+
+    _path: str | None = None
+    _check_interval: float = 5
+    _snapshot: CatalogSnapshot | None = None
+    _task: asyncio.Task | None = None
+
+    @classmethod
+    def init(cls, path: str, check_interval: float = 5) -> None:
+        """Map snapshot and start watching it for new versions."""
+
+        cls._path = path
+        cls._check_interval = check_interval
+        cls._snapshot = None
+        cls.reload()
+        cls._task = asyncio.create_task(cls._watch())
+
+    @classmethod
+    async def stop(cls) -> None:
+        if cls._task is None:
+            return
+        cls._task.cancel()
+        try:
+            await cls._task
+        except asyncio.CancelledError:
+            pass
+        cls._task = None
+
+    @classmethod
+    def get(cls) -> CatalogSnapshot | None:
+        return cls._snapshot
+
+    @classmethod
+    def get_version(cls) -> str:
+        """
+        Version of the mapped snapshot to fold into cache keys of views
+        served from it, '' if no snapshot is mapped.
+
+        Entries cached from a previous snapshot become unreachable once the
+        worker maps the new one, even if cached after ETL invalidated the
+        films of the new snapshot.
+        """
+
+        if cls._snapshot is None:
+            return ''
+        _, mtime_ns, size = cls._snapshot.version
+        return f'{mtime_ns:x}-{size:x}'
+
+    @classmethod
+    def reload(cls) -> bool:
+        """
+        Map snapshot file if it's changed.
+
+        Returns:
+            True if new snapshot is mapped.
+        """
+
+        try:
+            stat = os.stat(cls._path)
+        except FileNotFoundError:
+            return False
+        version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if cls._snapshot is not None and cls._snapshot.version == version:
+            return False
+        try:
+            snapshot = CatalogSnapshot(cls._path)
+        except (OSError, ValueError, struct.error):
+            logger.exception('Catalog snapshot %s is not mapped.', cls._path)
+            return False
+        # Previous snapshot is unmapped when the last reader drops it.
+        cls._snapshot = snapshot
+        logger.info(
+            'Catalog snapshot of %s films mapped.', snapshot.films_count,
+        )
+        return True
+
+    @classmethod
+    async def _watch(cls) -> None:
+        while True:
+            await asyncio.sleep(cls._check_interval)
+            cls.reload()
@@ -1,18 +1,246 @@
-from typing import Type
+import asyncio
+from typing import AsyncIterator, Iterable, Type
 
 import orjson
 from aioredis import Redis
 from elasticsearch import AsyncElasticsearch, NotFoundError
+from elasticsearch.helpers import async_scan
 
-from core.config import UNIT_CACHE_EXPIRE_IN_SECONDS
+from core.config import (
+    PAGINATION_PIT_KEEP_ALIVE,
+    UNIT_CACHE_EXPIRE_IN_SECONDS,
+)
+from core.metrics import ELASTIC_LATENCY, REDIS_LATENCY, track_latency
 from models.data_models import ModelType
+from services.local_cache import LocalCache
+from services.pagination import Cursor, Page
+from services.search_batcher import SearchBatcher
+
+
+# Max '_shard_doc' sort value (long).
+SHARD_DOC_MAX = 2 ** 63 - 1
+
+# Add key to tag sets, their TTL is extended to the key TTL but never
+# shortened, as they might hold longer living keys.
+TAG_KEY_SCRIPT = """
+for _, tag_key in ipairs(KEYS) do
+    redis.call('sadd', tag_key, ARGV[1])
+    if redis.call('ttl', tag_key) < tonumber(ARGV[2]) then
+        redis.call('expire', tag_key, ARGV[2])
+    end
+end
+return 0
+"""
+
+
+class SearchTimeoutError(Exception):
+    """Search has timed out in Elasticsearch, its hits are partial."""
+
+
+def source_fields(model: Type[ModelType]) -> list[str]:
+    """Get fields of documents _source to fetch to build model."""
+
+    return list(model.__fields__)
 
 
 class RedisService:
-    """Class for maintaining Redis interaction."""
+    """
+    Class for maintaining Redis interaction.
+
+    If 'local_cache' is set, it is used as in-process tier in front of Redis.
+    Keys might be tagged with entity uuids (see set_raw), tags are kept as
+    Redis sets '{tag_prefix}{tag}' of keys to invalidate them all at once.
+    """
 
-    def __init__(self, redis: Redis) -> None:
+    tag_prefix: str = 'cache_tag:'
+
+    def __init__(
+            self,
+            redis: Redis,
+            local_cache: LocalCache | None = None,
+            invalidation_channel: str | None = None,
+    ) -> None:
         self.redis = redis
+        self.local_cache = local_cache
+        self.invalidation_channel = invalidation_channel
+
+    async def get_raw(self, key: str) -> bytes | str | None:
+        """
+        Get raw value from local tier or from Redis.
+
+        Args:
+            key: key of item stored in Redis
+        Returns:
+            Raw stored value or None.
+        """
+
+        if self.local_cache is not None:
+            data = self.local_cache.get(key)
+            if data is not None:
+                return data
+        data, = await self._fetch_many([key])
+        return data
+
+    async def set_raw(
+            self,
+            key: str,
+            data: bytes | str,
+            expire: int,
+            tags: Iterable[str] = (),
+    ) -> None:
+        """
+        Put raw value to Redis and to local tier.
+
+        Args:
+            key: key to use for store data in Redis
+            data: bytes | str Value to store.
+            expire: int TTL in seconds.
+            tags: Iterable[str] Entity uuids the value depends on.
+        """
+
+        await self.set_many_raw([(key, data, expire, tags)])
+
+    async def get_many_raw(
+            self,
+            keys: list[str],
+    ) -> list[bytes | str | None]:
+        """
+        Get raw values of many keys in one round trip (MGET).
+
+        Args:
+            keys: list[str] Keys of items stored in Redis.
+        Returns:
+            Raw stored values or None in the order of keys.
+        """
+
+        if not keys:
+            return []
+        if self.local_cache is None:
+            return await self._fetch_many(keys)
+        values = [self.local_cache.get(key) for key in keys]
+        missed = [key for key, value in zip(keys, values) if value is None]
+        if not missed:
+            return values
+        fetched = dict(zip(missed, await self._fetch_many(missed)))
+        return [
+            value if value is not None else fetched[key]
+            for key, value in zip(keys, values)
+        ]
+
+    @track_latency(REDIS_LATENCY, 'redis', 'mget')
+    async def _fetch_many(self, keys: list[str]) -> list[bytes | str | None]:
+        """
+        Get values from Redis, put them to local tier if it is set.
+
+        Local entries never outlive Redis ones, so PTTL of keys is read in
+        the same pipeline.
+        """
+
+        if self.local_cache is None:
+            return await self.redis.mget(keys)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.mget(keys)
+            for key in keys:
+                pipe.pttl(key)
+            fetched, *ttls_ms = await pipe.execute()
+        for key, data, ttl_ms in zip(keys, fetched, ttls_ms):
+            if data is not None:
+                # Negative pttl means key without expiration.
+                expire = ttl_ms / 1000 if ttl_ms >= 0 else None
+                self.local_cache.set(key, data, expire=expire)
+        return fetched
+
+    @track_latency(REDIS_LATENCY, 'redis', 'set')
+    async def set_many_raw(
+            self,
+            items: list[tuple[str, bytes | str, int, Iterable[str]]],
+    ) -> None:
+        """
+        Put many raw values in one pipeline, workers are notified to drop
+        previous values of keys from their local tiers.
+
+        Args:
+            items: list of (key, data, expire, tags) tuples, see set_raw.
+        """
+
+        if not items:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, data, expire, tags in items:
+                pipe.set(key, data, ex=expire)
+                tag_keys = [f'{self.tag_prefix}{tag}' for tag in set(tags)]
+                if tag_keys:
+                    pipe.eval(
+                        TAG_KEY_SCRIPT, len(tag_keys), *tag_keys, key, expire,
+                    )
+            if self.invalidation_channel:
+                # Other workers might keep previous values in local tiers.
+                pipe.publish(
+                    self.invalidation_channel,
+                    self._keys_message([key for key, _, _, _ in items]),
+                )
+            await pipe.execute()
+        if self.local_cache is not None:
+            for key, data, expire, _ in items:
+                self.local_cache.set(key, data, expire=expire)
+
+    @track_latency(REDIS_LATENCY, 'redis', 'delete')
+    async def invalidate(self, *keys: str) -> None:
+        """
+        Delete keys from Redis and notify all workers to drop them from
+        their local tiers.
+
+        Args:
+            keys: Keys to delete.
+        """
+
+        if not keys:
+            return
+        await self.redis.delete(*keys)
+        if self.local_cache is not None:
+            self.local_cache.delete(*keys)
+        if self.invalidation_channel:
+            await self.redis.publish(
+                self.invalidation_channel,
+                self._keys_message(keys),
+            )
+
+    def _keys_message(self, keys: Iterable[str]) -> bytes:
+        """
+        Build message of keys channel, the worker which published it skips
+        it by its local tier id.
+        """
+
+        return orjson.dumps({
+            'origin': self.local_cache.id if self.local_cache else None,
+            'keys': list(keys),
+        })
+
+    @track_latency(REDIS_LATENCY, 'redis', 'invalidate_tags')
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """
+        Invalidate all keys tagged with any of tags.
+
+        Args:
+            tags: Iterable[str] Entity uuids.
+        Returns:
+            Number of invalidated keys.
+        """
+
+        tag_keys = [f'{self.tag_prefix}{tag}' for tag in set(tags)]
+        if not tag_keys:
+            return 0
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            pipe.delete(*tag_keys)
+            *members, _ = await pipe.execute()
+        keys = {
+            key.decode() if isinstance(key, bytes) else key
+            for tagged_keys in members for key in tagged_keys
+        }
+        await self.invalidate(*keys)
+        return len(keys)
 
     async def get_from_cache(
             self,
@@ -32,14 +260,10 @@ class RedisService:
             Pydantic model entity filled with deserialized data from Redis.
         """
 
-        data = await self.redis.get(key)
+        data = await self.get_raw(key)
         if not data:
             return None
-        if not serialize_collection:
-            result = serialize_model.parse_raw(data)
-        else:
-            result = [serialize_model(**item) for item in orjson.loads(data)]
-        return result
+        return self.deserialize(data, serialize_model, serialize_collection)
 
     async def put_to_cache(
         self,
@@ -47,6 +271,7 @@ class RedisService:
         key: str = None,
         expire: int = UNIT_CACHE_EXPIRE_IN_SECONDS,
         serialize_collection: bool = False,
+        tags: Iterable[str] = (),
     ) -> None:
         """
         Put unit data to Redis cache.
@@ -58,25 +283,101 @@ class RedisService:
             serialize_collection: bool Serialize collection if True or single
             item if value False.
             expire: int TTL in seconds.
+            tags: Iterable[str] Entity uuids the data depends on.
+        """
+
+        await self.set_raw(
+            key, self.serialize(data, serialize_collection), expire, tags,
+        )
+
+    @staticmethod
+    def serialize(
+            data: ModelType | list[ModelType],
+            serialize_collection: bool = False,
+    ) -> bytes | str:
+        """
+        Serialize model or collection of models to JSON.
+
+        Args:
+            data: Type[ModelType] | list[ModelType] One item or collection
+            of items.
+            serialize_collection: bool Serialize collection if True or single
+            item if value False.
+        Returns:
+            JSON representation of data.
         """
 
         if not serialize_collection:
-            data = data.json()
+            return data.json()
         elif serialize_collection and isinstance(data, list):
-            data = orjson.dumps([item.dict() for item in data])
-        else:
-            raise ValueError(
-                'Cache candidate is not single instance or not list of models.'
-            )
-        await self.redis.set(key, data, ex=expire)
+            # Items might be already projected to dicts of sparse fieldset.
+            return orjson.dumps([
+                item if isinstance(item, dict) else item.dict()
+                for item in data
+            ])
+        raise ValueError(
+            'Cache candidate is not single instance or not list of models.'
+        )
+
+    @staticmethod
+    def deserialize(
+            data: bytes | str,
+            serialize_model: Type[ModelType],
+            serialize_collection: bool = False,
+    ) -> ModelType | list[ModelType]:
+        """
+        Deserialize JSON to model or collection of models.
+
+        Args:
+            data: bytes | str JSON representation of data.
+            serialize_model: class of item (Film, Person, Genre)
+            serialize_collection: bool Serialize collection if True or
+            single item if False.
+        Returns:
+            Pydantic model entity or list of entities.
+        """
+
+        if not serialize_collection:
+            return serialize_model.parse_raw(data)
+        return [serialize_model(**item) for item in orjson.loads(data)]
 
 
 class ElasticService:
-    """Class for maintaining Elastic interaction."""
+    """
+    Class for maintaining Elastic interaction.
+
+    Only fields of the requested model are fetched from documents _source,
+    so narrow models (e.g. FilmShort) don't pull whole documents.
 
-    def __init__(self, elastic: AsyncElasticsearch) -> None:
+    If 'batcher' is set, concurrent searches are sent in _msearch batches.
+    """
+
+    def __init__(
+            self,
+            elastic: AsyncElasticsearch,
+            batcher: SearchBatcher | None = None,
+    ) -> None:
         self.elastic = elastic
+        self.batcher = batcher
+
+    async def _search(self, params: dict) -> dict:
+        """
+        Search directly or in batch, return response body.
+
+        Raises:
+            SearchTimeoutError if search has timed out with partial hits.
+        """
+
+        if self.batcher is not None:
+            doc = await self.batcher.search(params)
+        else:
+            doc = (await self.elastic.search(**params)).body
+        if doc.get('timed_out'):
+            # Partial hits must be neither cached nor taken for the result.
+            raise SearchTimeoutError(params.get('index'))
+        return doc
 
+    @track_latency(ELASTIC_LATENCY, 'elastic', 'search')
     async def search_in_elastic(
             self,
             model: Type[ModelType],
@@ -93,12 +394,100 @@ class ElasticService:
             List search results as list of Pydantic models 'model'.
         """
 
+        params = {'source_includes': source_fields(model), **params}
         try:
-            doc = await self.elastic.search(**params)
+            doc = await self._search(params)
         except NotFoundError:
             return None
-        return [model(**d['_source']) for d in doc.body['hits']['hits']]
+        return [model(**d['_source']) for d in doc['hits']['hits']]
+
+    @track_latency(ELASTIC_LATENCY, 'elastic', 'search')
+    async def search_page_in_elastic(
+            self,
+            model: Type[ModelType],
+            params: dict,
+            sort: list[dict],
+            cursor: Cursor | None = None,
+            keep_alive: str = PAGINATION_PIT_KEEP_ALIVE,
+    ) -> Page | None:
+        """
+        Search page of results after cursor position (search_after).
+
+        The first page is read from the live index. Point-in-time is opened
+        when the next page is requested (most first pages, e.g. of one-off
+        searches, are never followed) and passed along in cursors, so
+        further iteration is not affected by concurrent index updates. If
+        point-in-time has expired, search continues in the live index from
+        the same position.
 
+        Args:
+            model: Type[ModelType] Pydantic model to serialize search
+            results to.
+            params: dict Params for search with 'index' and 'size', 'from_'
+                is used for the first page only.
+            sort: list[dict] Sort, must end with unique field tiebreaker.
+            cursor: Cursor Position to search after, first page if None.
+            keep_alive: str Point-in-time keep alive, '' disables it.
+        Returns:
+            Page of Pydantic models 'model' with cursor of the next page.
+        """
+
+        index = params['index']
+        params = {
+            'source_includes': source_fields(model), **params, 'sort': sort,
+        }
+        pit_id = cursor.pit_id if cursor is not None else None
+        if cursor is not None:
+            params.pop('from_', None)
+            params['search_after'] = cursor.search_after
+        if keep_alive and cursor is not None and not pit_id:
+            pit_id = await self.open_point_in_time(index, keep_alive)
+            if pit_id is None:
+                return None
+            # Hits read from point-in-time have implicit '_shard_doc'
+            # tiebreaker value last. Sort ends with unique field, so any
+            # other hit is after the cursor hit with the max value.
+            params['search_after'] = [*cursor.search_after, SHARD_DOC_MAX]
+        try:
+            if pit_id:
+                doc = await self._search_in_pit(params, pit_id, keep_alive)
+            else:
+                doc = await self._search(params)
+        except NotFoundError:
+            if not pit_id:
+                return None
+            # Point-in-time has expired, continue in the live index. Hits
+            # read from it have implicit '_shard_doc' tiebreaker value last.
+            pit_id = None
+            if cursor is not None:
+                params['search_after'] = cursor.search_after[:len(sort)]
+            try:
+                doc = await self._search(params)
+            except NotFoundError:
+                return None
+        hits = doc['hits']['hits']
+        next_cursor = None
+        if hits and len(hits) == params['size']:
+            next_cursor = Cursor(
+                search_after=hits[-1]['sort'],
+                pit_id=doc.get('pit_id') if pit_id else None,
+            )
+        return Page(
+            (model(**hit['_source']) for hit in hits),
+            next_cursor=next_cursor,
+        )
+
+    async def _search_in_pit(
+            self,
+            params: dict,
+            pit_id: str,
+            keep_alive: str,
+    ):
+        params = {key: value for key, value in params.items() if key != 'index'}
+        params['pit'] = {'id': pit_id, 'keep_alive': keep_alive or '1m'}
+        return await self._search(params)
+
+    @track_latency(ELASTIC_LATENCY, 'elastic', 'get')
     async def get_from_elastic_by_id(
             self,
             model: Type[ModelType],
@@ -116,11 +505,14 @@ class ElasticService:
         """
 
         try:
-            doc = await self.elastic.get(index=index, id=uuid)
+            doc = await self.elastic.get(
+                index=index, id=uuid, source_includes=source_fields(model),
+            )
         except NotFoundError:
             return None
         return model(**doc['_source'])
 
+    @track_latency(ELASTIC_LATENCY, 'elastic', 'mget')
     async def get_from_elastic_by_ids(
             self,
             model: Type[ModelType],
@@ -138,10 +530,171 @@ class ElasticService:
         """
 
         try:
-            docs = await self.elastic.mget(index=index, ids=ids)
+            docs = await self.elastic.mget(
+                index=index, ids=ids, source_includes=source_fields(model),
+            )
         except NotFoundError:
             return None
         return [
             model(**doc['_source']) for doc in docs.get('docs', [])
             if doc.get('found')
         ]
+
+    @track_latency(ELASTIC_LATENCY, 'elastic', 'mget')
+    async def get_map_from_elastic_by_ids(
+            self,
+            model: Type[ModelType],
+            index: str,
+            ids: list[str],
+    ) -> dict[str, ModelType]:
+        """
+        Get entities from Elasticsearch by entity ids (mget) keyed by _id.
+        Args:
+            model: ModelType Pydantic model to serialize result to.
+            index: Index name
+            ids: list[str]: Entity _id we're looking for.
+        Returns:
+             Dict of found entities _id to ModelType instance.
+        """
+
+        if not ids:
+            return {}
+        try:
+            docs = await self.elastic.mget(
+                index=index, ids=ids, source_includes=source_fields(model),
+            )
+        except NotFoundError:
+            return {}
+        return {
+            doc['_id']: model(**doc['_source'])
+            for doc in docs.get('docs', []) if doc.get('found')
+        }
+
+    @track_latency(ELASTIC_LATENCY, 'elastic', 'count')
+    async def count_in_elastic(self, index: str) -> int:
+        """Get number of documents in index."""
+
+        response = await self.elastic.count(index=index)
+        return response['count']
+
+    async def scan_ids_in_elastic(self, index: str) -> AsyncIterator[str]:
+        """
+        Iterate over _id of all documents in index (scroll).
+
+        Args:
+            index: Index name
+        Returns:
+            Async iterator of documents _id.
+        """
+
+        async for hit in async_scan(
+                self.elastic,
+                index=index,
+                query={'_source': False},
+                size=5000,
+        ):
+            yield hit['_id']
+
+    async def scan_in_elastic(
+            self, index: str, source_includes: list[str],
+    ) -> AsyncIterator[dict]:
+        """
+        Iterate over _source of all documents in index (scroll).
+
+        Args:
+            index: Index name
+            source_includes: list[str] Fields of _source to fetch.
+        Returns:
+            Async iterator of documents _source.
+        """
+
+        async for hit in async_scan(
+                self.elastic,
+                index=index,
+                query={'_source': {'includes': source_includes}},
+                size=5000,
+        ):
+            yield hit.get('_source', {})
+
+    @track_latency(ELASTIC_LATENCY, 'elastic', 'open_pit')
+    async def open_point_in_time(
+            self, index: str, keep_alive: str,
+    ) -> str | None:
+        """
+        Open point-in-time of index.
+
+        Args:
+            index: Index name
+            keep_alive: str Point-in-time keep alive.
+        Returns:
+            Point-in-time id, None if index doesn't exist.
+        """
+
+        try:
+            response = await self.elastic.open_point_in_time(
+                index=index, keep_alive=keep_alive,
+            )
+        except NotFoundError:
+            return None
+        return response['id']
+
+    async def iterate_point_in_time(
+            self,
+            index: str,
+            source_includes: list[str],
+            batch_size: int,
+            keep_alive: str,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Iterate over _source of all documents of index point-in-time in
+        batches (search_after).
+
+        Point-in-time is opened when the first batch is requested and
+        closed when iteration ends or the iterator is closed, so an
+        iterator which is never started doesn't hold it. Hits are sorted by
+        '_shard_doc', the cheapest sort in point-in-time. Only one batch is
+        held at a time, the next one is searched when the consumer asks for
+        it.
+
+        Args:
+            index: str Index name, nothing is iterated if it doesn't exist.
+            source_includes: list[str] Fields of _source to fetch.
+            batch_size: int Number of documents per search.
+            keep_alive: str Point-in-time keep alive, extended by every
+                search.
+        Returns:
+            Async iterator of batches of documents _source.
+        """
+
+        params = {
+            'source_includes': source_includes,
+            'size': batch_size,
+            'sort': [{'_shard_doc': 'asc'}],
+            'track_total_hits': False,
+        }
+        pit_id = await self.open_point_in_time(index, keep_alive)
+        if pit_id is None:
+            return
+        try:
+            while True:
+                response = await self.elastic.search(
+                    **params, pit={'id': pit_id, 'keep_alive': keep_alive},
+                )
+                # Point-in-time id might change between searches.
+                pit_id = response.get('pit_id') or pit_id
+                hits = response['hits']['hits']
+                if hits:
+                    yield [hit.get('_source', {}) for hit in hits]
+                if len(hits) < batch_size:
+                    break
+                params['search_after'] = hits[-1]['sort']
+        finally:
+            # Consumer might be cancelled (client disconnected), don't leave
+            # point-in-time open until it expires.
+            await asyncio.shield(self._close_point_in_time(pit_id))
+
+    async def _close_point_in_time(self, pit_id: str) -> None:
+        try:
+            await self.elastic.close_point_in_time(id=pit_id)
+        except NotFoundError:
+            pass
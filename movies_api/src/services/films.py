@@ -1,15 +1,23 @@
 from functools import lru_cache
+from typing import AsyncIterator, Iterable
+
+import orjson
 from aioredis import Redis
-from elasticsearch import AsyncElasticsearch
+from elasticsearch import AsyncElasticsearch, NotFoundError
 from fastapi import Depends
 
 from api.v1.utils import FilterQueryParams, PaginateQueryParams, \
     CommonQueryParams, FilmQueryParams
+from core.config import EXPORT_BATCH_SIZE, EXPORT_PIT_KEEP_ALIVE
 from db.elastic import get_elastic
 from db.redis import get_redis
-from models.data_models import Film
+from models.data_models import Film, FilmShort
+from services.catalog import FilmCatalog
 from services.data_services import ElasticService, RedisService
 from services.base_service import BaseService
+from services.pagination import Page
+from services.query_builder import SearchQuery, multi_match, nested, term
+from services.search_batcher import get_search_batcher
 
 
 class FilmService(BaseService):
@@ -31,46 +39,72 @@ class FilmService(BaseService):
             index=self.elastic_index,
         )
 
+    async def get_films_by_ids(
+            self, film_ids: list[str],
+    ) -> dict[str, Film | None]:
+        """
+        Get filmworks by uuids with one cache lookup and one Elasticsearch
+        request for the cache misses.
+
+        Args:
+            film_ids: list[str] Filmworks uuids.
+        Returns:
+            Dict of uuid to filmwork or None if it's not found, in the order
+            of film_ids.
+        """
+
+        return await self.get_documents_by_ids(
+            item_ids=film_ids,
+            serialize_to_model=Film,
+            index=self.elastic_index,
+        )
+
+    async def get_similar_films_by_id(
+            self,
+            film_params: FilmQueryParams,
+    ) -> list[FilmShort] | None:
+        """
+        Get films similar to the film.
+
+        Similar films precomputed by ETL are fetched by ids at once, films
+        without them are matched by genres.
+
+        Args:
+            film_params: FilmQueryParams Filmwork params [uuid].
+        Returns:
+            List of the entity of FilmShort or None if film doesn't exist.
+        """
+
+        film = await self.get_film_by_id(film_params)
+        if film is None:
+            return None
+        if not film.similar_ids:
+            return await self.get_similar_films([g.uuid for g in film.genre])
+        films = await self.get_documents_by_ids(
+            item_ids=film.similar_ids,
+            serialize_to_model=FilmShort,
+            index=self.elastic_index,
+        )
+        return [film for film in films.values() if film] or None
+
     async def get_similar_films(
             self,
-            genre_names: list[str]
-    ) -> list[Film] | None:
+            genre_ids: list[str]
+    ) -> list[FilmShort] | None:
         """
         Get similar films by genres.
 
         Args:
-            genre_names: list[str] List of genres names for search
+            genre_ids: list[str] List of genres uuids films must belong to
         Returns:
-            List of the entity of Film search results.
+            List of the entity of FilmShort search results.
         """
 
-        search_field = []
-        for g_name in genre_names:
-            search_field.append(
-                {
-                    'nested': {
-                        'path': 'genre',
-                        'query': {
-                            'bool': {
-                                'should': {
-                                    'match_phrase': {
-                                        'genre.name': g_name
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
-            )
-        params = {
-            'index': self.elastic_index,
-            'query': {
-                'bool': {
-                    'must': search_field
-                }
-            }
-        }
-        films = await self.elastic.search_in_elastic(Film, params)
+        params = SearchQuery(self.elastic_index).filter(*(
+            nested('genre', term('genre.uuid', genre_id))
+            for genre_id in genre_ids
+        )).build()
+        films = await self.elastic.search_in_elastic(FilmShort, params)
         if not films:
             return None
         return films
@@ -79,61 +113,49 @@ class FilmService(BaseService):
             self,
             filter_params: FilterQueryParams,
             paginate_params: PaginateQueryParams,
-    ) -> list[Film] | None:
+    ) -> Page | None:
         """
         Get sorted films with pagination.
 
         Args:
             filter_params: FilterQueryParams Params for filtering
-            paginate_params: PaginateQueryParams Paginate params [size, number]
+            paginate_params: PaginateQueryParams Paginate params
+                [size, number, cursor]
         Returns:
-            List of the entity of Film search results.
+            Page of the entity of FilmShort search results.
         """
 
         sort_field = filter_params.sort
         filter_genre = filter_params.filter_genre
-        page_number = paginate_params.page_number
-        page_size = paginate_params.page_size
 
         if sort_field.startswith('-'):
             sort_field = sort_field[1:]
             order = 'desc'
         else:
             order = 'asc'
-        params = {
-            'index': self.elastic_index,
-        }
+        snapshot = FilmCatalog.get()
+        if snapshot is not None and sort_field == 'imdb_rating':
+            films = snapshot.page(
+                filter_genre,
+                descending=order == 'desc',
+                size=paginate_params.page_size,
+                offset=paginate_params.offset,
+                cursor=paginate_params.cursor,
+            )
+            if films is not None:
+                return films or None
+        query = SearchQuery(
+            self.elastic_index,
+            size=paginate_params.page_size,
+            offset=paginate_params.offset,
+        )
         if filter_genre:
-            params.update({
-                'query': {
-                    'bool': {
-                        'must': {
-                            'nested': {
-                                'path': 'genre',
-                                'query': {
-                                    'bool': {
-                                        'should': {
-                                            'match_phrase': {
-                                                'genre.uuid': filter_genre
-                                            }
-                                        }
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }})
-        params.update({
-            'sort': {
-                sort_field: {
-                    'order': order
-                }
-            },
-            'from_': page_size * (page_number - 1),
-            'size': page_size
-        })
-
-        films = await self.elastic.search_in_elastic(Film, params)
+            query.filter(nested('genre', term('genre.uuid', filter_genre)))
+        sort = [{sort_field: {'order': order}}, {'uuid': {'order': 'asc'}}]
+
+        films = await self.elastic.search_page_in_elastic(
+            FilmShort, query.build(), sort, cursor=paginate_params.cursor,
+        )
         if not films:
             return None
         return films
@@ -142,44 +164,67 @@ class FilmService(BaseService):
             self,
             query_params: CommonQueryParams,
             paginate_params: PaginateQueryParams,
-    ) -> list[Film] | None:
+    ) -> Page | list:
         """
         Get films by query with pagination.
 
         Args:
             query_params: CommonQueryParams The query params by search
-            paginate_params: PaginateQueryParams Paginate params [size, number]
+            paginate_params: PaginateQueryParams Paginate params
+                [size, number, cursor]
         Returns:
-            List of the entity of Film search results.
+            Page of the entity of FilmShort search results.
         """
 
-        query = query_params.query
-        page_size = paginate_params.page_size
-        page_number = paginate_params.page_number
-        params = {
-            'index': self.elastic_index,
-            'body': {
-                'query': {
-                    'bool': {
-                        'must': [
-                            {
-                                'multi_match': {
-                                    'query': query,
-                                    'fields': ['title', 'description'],
-                                }
-                            }
-                        ],
-                    }
-                }
-            },
-            'from_': page_size * (page_number - 1),
-            'size': page_size
-        }
-        films = await self.elastic.search_in_elastic(Film, params)
+        params = SearchQuery(
+            self.elastic_index,
+            size=paginate_params.page_size,
+            offset=paginate_params.offset,
+        ).must(
+            multi_match(query_params.query, ['title', 'description']),
+        ).build()
+        sort = ['_score', {'uuid': {'order': 'asc'}}]
+        films = await self.elastic.search_page_in_elastic(
+            FilmShort, params, sort, cursor=paginate_params.cursor,
+        )
         if not films:
             return []
         return films
 
+    async def export_films(
+            self, fields: Iterable[str],
+    ) -> AsyncIterator[bytes] | None:
+        """
+        Export all films as NDJSON, one film per line.
+
+        Films are read from point-in-time opened when the first chunk is
+        requested, so the export is consistent while the index is updated.
+        Point-in-time is never opened if the response isn't streamed.
+
+        Args:
+            fields: Iterable[str] Fields of films to export.
+        Returns:
+            Async iterator of NDJSON chunks (a chunk per batch of films),
+            None if there are no films to export.
+        """
+
+        try:
+            count = await self.elastic.count_in_elastic(self.elastic_index)
+        except NotFoundError:
+            return None
+        if not count:
+            return None
+        return self._ndjson_chunks(list(fields))
+
+    async def _ndjson_chunks(self, fields: list[str]) -> AsyncIterator[bytes]:
+        async for sources in self.elastic.iterate_point_in_time(
+                self.elastic_index,
+                fields,
+                EXPORT_BATCH_SIZE,
+                EXPORT_PIT_KEEP_ALIVE,
+        ):
+            yield b''.join(orjson.dumps(source) + b'\n' for source in sources)
+
 
 @lru_cache()
 def get_film_service(
@@ -198,5 +243,7 @@ def get_film_service(
 
     return FilmService(
         redis=RedisService(redis),
-        elastic=ElasticService(elastic)
+        elastic=ElasticService(
+            elastic, batcher=get_search_batcher(elastic),
+        ),
     )
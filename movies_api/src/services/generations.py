@@ -0,0 +1,72 @@
+import math
+import time
+
+from aioredis import Redis
+
+
+class CacheGenerations:
+    """
+    Per-index cache generation numbers.
+
+    Generation of an index is a Redis counter bumped by ETL when the index
+    is rebuilt. It is folded into every cache key built from the index
+    data, so all these keys become unreachable at once after the bump and
+    expire by TTL.
+
+    Values are kept in-process and re-read from Redis not more often than
+    every 'refresh_interval' seconds.
+    """
+
+    _redis = None
+    _prefix = None
+    _refresh_interval = None
+    _values: dict[str, tuple[int, float]] = {}
+
+    @classmethod
+    def init(
+            cls,
+            redis: Redis,
+            prefix: str = 'cache_generation:',
+            refresh_interval: float = 5.0,
+    ):
+        cls._redis = redis
+        cls._prefix = prefix
+        cls._refresh_interval = refresh_interval
+        cls._values = {}
+
+    @classmethod
+    async def get(cls, *indexes: str) -> tuple[int, ...]:
+        """
+        Get current generations of indexes.
+
+        Args:
+            indexes: str Elasticsearch index names.
+        Returns:
+            Generation numbers in the order of indexes, zeros if generations
+            are not initialized.
+        """
+
+        if cls._redis is None:
+            return (0,) * len(indexes)
+        now = time.monotonic()
+        read_before = now - cls._refresh_interval
+        # Values are (generation, read at), unread ones are outdated.
+        outdated = [
+            index for index in indexes
+            if cls._values.get(index, (0, -math.inf))[1] <= read_before
+        ]
+        if outdated:
+            values = await cls._redis.mget(
+                [f'{cls._prefix}{index}' for index in outdated]
+            )
+            for index, value in zip(outdated, values):
+                cls._values[index] = (int(value or 0), now)
+        return tuple(cls._values[index][0] for index in indexes)
+
+    @classmethod
+    async def bump(cls, index: str) -> int:
+        """Start new generation of index cache, return its number."""
+
+        generation = await cls._redis.incr(f'{cls._prefix}{index}')
+        cls._values[index] = (generation, time.monotonic())
+        return generation
@@ -9,6 +9,8 @@ from db.redis import get_redis
 from models.data_models import Genre
 from services.data_services import ElasticService, RedisService
 from services.base_service import BaseService
+from services.query_builder import SearchQuery
+from services.search_batcher import get_search_batcher
 
 
 class GenreService(BaseService):
@@ -37,15 +39,11 @@ class GenreService(BaseService):
             List of  entities of Genre search results.
         """
 
-        page_size = paginate_params.page_size
-        page_number = paginate_params.page_number
-        params = {
-            'index': self.elastic_index,
-        }
-        params.update({
-            'from_': page_size * (page_number - 1),
-            'size': page_size
-        })
+        params = SearchQuery(
+            self.elastic_index,
+            size=paginate_params.page_size,
+            offset=paginate_params.offset,
+        ).build()
         genres = await self.elastic.search_in_elastic(Genre, params)
         if not genres:
             return None
@@ -69,5 +67,7 @@ def get_genre_service(
 
     return GenreService(
         redis=RedisService(redis),
-        elastic=ElasticService(elastic)
+        elastic=ElasticService(
+            elastic, batcher=get_search_batcher(elastic),
+        ),
     )
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from typing import Iterable
+
+from services.bloom import BloomFilter
+from services.data_services import ElasticService
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentIdFilters:
+    """
+    Per-index Bloom filters of existing documents _id.
+
+    Filters are built at startup by scrolling indexes, updated with ids of
+    changed documents reported by ETL and rebuilt periodically (deleted
+    documents), when they are saturated or when ETL reports might have been
+    lost (see reset). Ids absent in a filter certainly don't exist, so
+    lookups of them are rejected in-process. Until the filter of an index is
+    built every id is considered as existing.
+    """
+
+    _elastic: ElasticService | None = None
+    _error_rate = None
+    _rebuild_interval = None
+    _filters: dict[str, BloomFilter] = {}
+    _pending: dict[str, set[str]] = {}
+    # Bumped by reset, filters built before it are discarded.
+    _epoch: int = 0
+    _rebuild: asyncio.Event | None = None
+    _task: asyncio.Task | None = None
+
+    @classmethod
+    def init(
+            cls,
+            elastic: ElasticService,
+            indexes: Iterable[str],
+            error_rate: float = 0.001,
+            rebuild_interval: float = 3600,
+    ):
+        """Start building filters of indexes in background task."""
+
+        cls._elastic = elastic
+        cls._error_rate = error_rate
+        cls._rebuild_interval = rebuild_interval
+        cls._filters = {}
+        cls._pending = {}
+        cls._rebuild = asyncio.Event()
+        cls._task = asyncio.create_task(cls._build_forever(tuple(indexes)))
+
+    @classmethod
+    async def stop(cls) -> None:
+        if cls._task is None:
+            return
+        cls._task.cancel()
+        try:
+            await cls._task
+        except asyncio.CancelledError:
+            pass
+        cls._task = None
+
+    @classmethod
+    def might_exist(cls, index: str, document_id: str) -> bool:
+        """False only if document certainly doesn't exist in index."""
+
+        bloom = cls._filters.get(index)
+        return bloom is None or document_id in bloom
+
+    @classmethod
+    def add(cls, index: str, ids: Iterable[str]) -> None:
+        """Register ids of new or changed documents."""
+
+        ids = list(ids)
+        if index in cls._pending:
+            cls._pending[index].update(ids)
+        bloom = cls._filters.get(index)
+        if bloom is None:
+            return
+        bloom.update(ids)
+        if bloom.is_saturated and not cls._rebuild_requested():
+            # Filter still has no false negatives, but more false positives.
+            logger.warning('Id filter of %s index is saturated.', index)
+            cls.request_rebuild()
+
+    @classmethod
+    def reset(cls) -> None:
+        """
+        Forget filters and rebuild them, as ids of changed documents might
+        have been missed (e.g. while ETL notifications channel was lost).
+        Every id is considered as existing until filters are rebuilt.
+        """
+
+        cls._epoch += 1
+        cls._filters = {}
+        cls.request_rebuild()
+
+    @classmethod
+    def request_rebuild(cls) -> None:
+        """Rebuild filters without waiting for the rebuild interval."""
+
+        if cls._rebuild is not None:
+            cls._rebuild.set()
+
+    @classmethod
+    def _rebuild_requested(cls) -> bool:
+        return cls._rebuild is not None and cls._rebuild.is_set()
+
+    @classmethod
+    async def build(cls, index: str) -> None:
+        """(Re)build filter of index by scrolling all its documents ids."""
+
+        epoch = cls._epoch
+        cls._pending[index] = set()
+        try:
+            count = await cls._elastic.count_in_elastic(index)
+            # Leave room for documents added until the next rebuild.
+            bloom = BloomFilter(
+                capacity=max(count * 2, 1024), error_rate=cls._error_rate,
+            )
+            async for document_id in cls._elastic.scan_ids_in_elastic(index):
+                bloom.add(document_id)
+            bloom.update(cls._pending[index])
+        finally:
+            cls._pending.pop(index, None)
+        if epoch != cls._epoch:
+            logger.info('Id filter of %s index is reset while built.', index)
+            return
+        cls._filters[index] = bloom
+        logger.info(
+            'Id filter of %s index built with %s ids.', index, bloom.count,
+        )
+
+    @classmethod
+    async def _build_forever(cls, indexes: tuple[str, ...]) -> None:
+        while True:
+            # Requests made while building are served by the next round.
+            cls._rebuild.clear()
+            for index in indexes:
+                try:
+                    await cls.build(index)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    # Keep previous filter, it still has no false negatives
+                    # for documents indexed before.
+                    logger.exception('Id filter of %s build failed.', index)
+            try:
+                await asyncio.wait_for(
+                    cls._rebuild.wait(), cls._rebuild_interval,
+                )
+            except asyncio.TimeoutError:
+                pass
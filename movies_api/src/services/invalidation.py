@@ -0,0 +1,147 @@
+import asyncio
+import logging
+
+import orjson
+from aioredis import Redis
+from aioredis.exceptions import ConnectionError as RedisConnectionError
+
+from services.cache import index_list_tag
+from services.data_services import RedisService
+from services.id_filter import DocumentIdFilters
+from services.local_cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheInvalidationListener:
+    """
+    Listen Redis pub/sub channels to invalidate cache of the current worker.
+
+    - 'keys_channel' messages are published by RedisService when keys are
+      overwritten or invalidated: {"origin": "<local tier id>", "keys":
+      [...]}. Keys are dropped from the local cache tier unless the message
+      was published by the current worker.
+    - 'entities_channel' messages are published by ETL after documents
+      update: {"index": "movies", "ids": ["<uuid>", ...]}. All keys tagged
+      with these ids or with the list tag of the index are invalidated in
+      every 'tagged_services' and ids are added to id filter of the index.
+    """
+
+    def __init__(
+            self,
+            redis: Redis,
+            keys_channel: str,
+            entities_channel: str,
+            local_cache: LocalCache | None = None,
+            tagged_services: list[RedisService] = None,
+            reconnect_delay: float = 1.0,
+    ) -> None:
+        self.redis = redis
+        self.keys_channel = keys_channel
+        self.entities_channel = entities_channel
+        self.local_cache = local_cache
+        self.tagged_services = tagged_services or []
+        self.reconnect_delay = reconnect_delay
+        self._disconnected = False
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start listening in background task."""
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        """Cancel background task."""
+
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _listen_forever(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except (RedisConnectionError, OSError):
+                logger.warning(
+                    'Cache invalidation channel lost, reconnect in %s s.',
+                    self.reconnect_delay,
+                )
+            self._disconnected = True
+            self.reset_local_state()
+            await asyncio.sleep(self.reconnect_delay)
+
+    def reset_local_state(self) -> None:
+        """
+        Drop state kept up to date by messages, as they might have been lost
+        while disconnected: local cache tier and id filters.
+        """
+
+        if self.local_cache is not None:
+            self.local_cache.clear()
+        DocumentIdFilters.reset()
+
+    async def _listen(self) -> None:
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.keys_channel, self.entities_channel)
+        if self._disconnected:
+            # State might have been updated by other workers or from Redis
+            # while messages were lost, drop it once more after subscribing.
+            self._disconnected = False
+            self.reset_local_state()
+        try:
+            async for message in pubsub.listen():
+                channel = message['channel']
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                if channel == self.keys_channel:
+                    self.handle_keys_message(message['data'])
+                elif channel == self.entities_channel:
+                    await self.handle_entities_message(message['data'])
+        finally:
+            await pubsub.close()
+
+    def handle_keys_message(self, data: bytes | str) -> None:
+        """Drop keys listed in the message from the local cache tier."""
+
+        if self.local_cache is None:
+            return
+        try:
+            message = orjson.loads(data)
+            origin, keys = message['origin'], message['keys']
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            logger.error('Malformed cache invalidation message %s.', data)
+            return
+        # Own local tier is already up to date.
+        if origin != self.local_cache.id:
+            self.local_cache.delete(*keys)
+
+    async def handle_entities_message(self, data: bytes | str) -> None:
+        """
+        Invalidate all cache keys tagged with changed entities ids and all
+        cached lists of the index.
+        """
+
+        try:
+            message = orjson.loads(data)
+            index, ids = message['index'], message['ids']
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            logger.error('Malformed entities change message %s.', data)
+            return
+        DocumentIdFilters.add(index, ids)
+        for service in self.tagged_services:
+            invalidated = await service.invalidate_tags(
+                [*ids, index_list_tag(index)]
+            )
+            if invalidated:
+                logger.info(
+                    'Invalidated %s cache keys after %s docs of %s changed.',
+                    invalidated, len(ids), index,
+                )
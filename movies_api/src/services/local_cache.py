@@ -0,0 +1,108 @@
+import logging
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCacheEntry:
+    """Value stored in the in-process cache tier."""
+
+    __slots__ = ('value', 'size', 'expires_at', 'hits')
+
+    def __init__(self, value: bytes | str, expires_at: float) -> None:
+        self.value = value
+        self.size = len(value)
+        self.expires_at = expires_at
+        self.hits = 0
+
+
+class LocalCache:
+    """
+    Bounded in-process (per gunicorn worker) cache tier with LRU eviction.
+
+    Entries are capped by total size in bytes and never live longer than
+    'ttl' seconds or the TTL of their Redis counterpart, whichever is less.
+    Keys read at least 'hot_key_threshold' times are reported as hot.
+    """
+
+    def __init__(
+            self,
+            max_size_bytes: int,
+            ttl: int,
+            hot_key_threshold: int = 100,
+    ) -> None:
+        self.max_size_bytes = max_size_bytes
+        self.ttl = ttl
+        self.hot_key_threshold = hot_key_threshold
+        # Tells own invalidation messages from ones of other workers.
+        self.id = uuid.uuid4().hex
+        self.size_bytes = 0
+        self._entries: OrderedDict[str, LocalCacheEntry] = OrderedDict()
+
+    def get(self, key: str) -> bytes | str | None:
+        """
+        Get value by key, expired entries are dropped on access.
+
+        Args:
+            key: str Cache key.
+        Returns:
+            Stored value or None.
+        """
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        entry.hits += 1
+        if entry.hits == self.hot_key_threshold:
+            logger.info('Local cache key %s is hot.', key)
+        return entry.value
+
+    def set(
+            self,
+            key: str,
+            value: bytes | str,
+            expire: float | None = None,
+    ) -> None:
+        """
+        Put value to the local tier.
+
+        Args:
+            key: str Cache key.
+            value: bytes | str Value to store.
+            expire: float | None Remaining TTL of Redis counterpart in
+                seconds, local TTL is used if not set.
+        """
+
+        ttl = self.ttl if expire is None else min(self.ttl, expire)
+        if ttl <= 0 or len(value) > self.max_size_bytes:
+            return
+        self.delete(key)
+        entry = LocalCacheEntry(value, time.monotonic() + ttl)
+        self._entries[key] = entry
+        self.size_bytes += entry.size
+        while self.size_bytes > self.max_size_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= evicted.size
+
+    def delete(self, *keys: str) -> None:
+        """Drop entries by keys."""
+
+        for key in keys:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.size_bytes -= entry.size
+
+    def clear(self) -> None:
+        """Drop all entries."""
+
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,53 @@
+import base64
+import binascii
+
+import orjson
+
+
+class Cursor:
+    """
+    Opaque position in search results for search_after pagination.
+
+    Cursor keeps sort values of the last returned hit and id of
+    Elasticsearch point-in-time the results were read from, if any.
+    Clients pass it back as is, so it is encoded as urlsafe base64 JSON.
+    """
+
+    def __init__(self, search_after: list, pit_id: str | None = None) -> None:
+        self.search_after = search_after
+        self.pit_id = pit_id
+
+    def encode(self) -> str:
+        data = {'sa': self.search_after}
+        if self.pit_id:
+            data['pit'] = self.pit_id
+        return base64.urlsafe_b64encode(orjson.dumps(data)).decode()
+
+    @classmethod
+    def decode(cls, value: str) -> 'Cursor':
+        """
+        Restore cursor encoded by Cursor.encode().
+
+        Raises:
+            ValueError if value is not a valid cursor.
+        """
+
+        try:
+            data = orjson.loads(base64.urlsafe_b64decode(value.encode()))
+            search_after, pit_id = data['sa'], data.get('pit')
+        except (binascii.Error, orjson.JSONDecodeError, KeyError, TypeError):
+            raise ValueError('Malformed cursor.')
+        if not isinstance(search_after, list) or not search_after:
+            raise ValueError('Malformed cursor.')
+        return cls(search_after, pit_id)
+
+    def __repr__(self):
+        return self.encode()
+
+
+class Page(list):
+    """List of page items with cursor of the next page, if there is one."""
+
+    def __init__(self, items=(), next_cursor: Cursor | None = None) -> None:
+        super().__init__(items)
+        self.next_cursor = next_cursor
@@ -6,9 +6,16 @@ from fastapi import Depends
 from api.v1.utils import PaginateQueryParams
 from db.elastic import get_elastic
 from db.redis import get_redis
-from models.data_models import PersonExt, FilmShort
+from models.data_models import PersonExt
 from services.base_service import BaseService
 from services.data_services import ElasticService, RedisService
+from services.pagination import Page
+from services.query_builder import SearchQuery, match
+from services.search_batcher import get_search_batcher
+
+# Search results are represented without films summaries of roles, which
+# make up most of the person document.
+SEARCH_SOURCE_INCLUDES = ['uuid', 'full_name', 'roles.role', 'roles.film_ids']
 
 
 class PersonService(BaseService):
@@ -17,7 +24,12 @@ class PersonService(BaseService):
     elastic_index: str = 'persons'
 
     async def get_person_by_id(self, person_id: str) -> PersonExt | None:
-        """Return PersonExt by its _id."""
+        """
+        Return PersonExt by person uuid.
+
+        Person document has all person's roles with summaries of related
+        films, so person and filmography are read in one request.
+        """
 
         return await self.get_document_by_id(
             person_id,
@@ -25,84 +37,40 @@ class PersonService(BaseService):
             self.elastic_index,
         )
 
-    async def get_persons_by_ids(
-            self, person_ids: [str],
-    ) -> list[PersonExt] | None:
-        """
-        Get persons list by their ids.
-
-        Args:
-            person_ids: list[str] list of ids.
-        Returns:
-            List of entities PersonExt
-        """
-
-        persons = await self.elastic.get_from_elastic_by_ids(
-            index=self.elastic_index,
-            ids=person_ids,
-            model=PersonExt,
-        )
-        return persons
-
     async def get_persons_by_query(
             self,
             query: str,
             paginate_params: PaginateQueryParams,
-    ) -> list[PersonExt] | None:
+    ) -> Page | None:
         """
         Gets persons by query with pagination.
 
         Args:
             query: str The query string by search
-            paginate_params: PaginateQueryParams Paginate params [size, number]
+            paginate_params: PaginateQueryParams Paginate params
+                [size, number, cursor]
         Returns:
-            List of the entity of PersonExt search results.
+            Page of the entity of PersonExt search results, roles have no
+            films summaries.
         """
 
-        page_size = paginate_params.page_size
-        page_number = paginate_params.page_number
         if not query:
             return None
 
-        params = {
-            'index': self.elastic_index,
-            'body': {
-                'query': {
-                    'bool': {
-                        'must': [
-                            {'match': {'full_name': query}}
-                        ],
-                    }
-                }
-            },
-            'from_': page_size * (page_number - 1),
-            'size': page_size
-        }
-        persons = await self.elastic.search_in_elastic(PersonExt, params)
+        params = SearchQuery(
+            self.elastic_index,
+            size=paginate_params.page_size,
+            offset=paginate_params.offset,
+        ).must(match('full_name', query)).build()
+        params['source_includes'] = SEARCH_SOURCE_INCLUDES
+        sort = ['_score', {'uuid': {'order': 'asc'}}]
+        persons = await self.elastic.search_page_in_elastic(
+            PersonExt, params, sort, cursor=paginate_params.cursor,
+        )
         if not persons:
             return None
         return persons
 
-    async def get_person_films(
-            self,
-            film_ids: list[str],
-    ) -> list[FilmShort] | None:
-        """
-        Get person's films.
-
-        Args:
-            film_ids: list[str]: List of film_ids
-        Returns:
-            List of entities of FilmShort search results.
-        """
-
-        films = await self.elastic.get_from_elastic_by_ids(
-            index='movies',
-            ids=film_ids,
-            model=FilmShort,
-        )
-        return films
-
 
 @lru_cache()
 def get_person_service(
@@ -121,5 +89,7 @@ def get_person_service(
 
     return PersonService(
         redis=RedisService(redis),
-        elastic=ElasticService(elastic)
+        elastic=ElasticService(
+            elastic, batcher=get_search_batcher(elastic),
+        ),
     )
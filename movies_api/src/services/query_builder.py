@@ -0,0 +1,121 @@
+from core.config import ELASTIC_SEARCH_TIMEOUT
+
+
+def term(field: str, value) -> dict:
+    """Exact match of keyword field."""
+
+    return {'term': {field: value}}
+
+
+def terms(field: str, values: list) -> dict:
+    """Exact match of keyword field with any of values."""
+
+    return {'terms': {field: values}}
+
+
+def match(field: str, query: str) -> dict:
+    """Full text match of analyzed field."""
+
+    return {'match': {field: query}}
+
+
+def multi_match(query: str, fields: list[str]) -> dict:
+    """Full text match of any of analyzed fields."""
+
+    return {'multi_match': {'query': query, 'fields': fields}}
+
+
+def nested(path: str, *filters: dict) -> dict:
+    """Non-scoring match of nested objects at 'path' with all filters."""
+
+    return {
+        'nested': {
+            'path': path,
+            'query': {'bool': {'filter': list(filters)}},
+        }
+    }
+
+
+class SearchQuery:
+    """
+    Builder of Elasticsearch search params.
+
+    Scoring (full text) clauses go to bool 'must', while constraints which
+    don't affect relevance go to 'filter' context, so they are not scored
+    and Elasticsearch caches them in node query cache. Total hits are not
+    tracked and search is limited by timeout by default.
+
+    Example:
+        SearchQuery('movies', size=50).filter(
+            nested('genre', term('genre.uuid', genre_id)),
+        ).build()
+    """
+
+    def __init__(
+            self,
+            index: str,
+            size: int | None = None,
+            offset: int = 0,
+    ) -> None:
+        self.index = index
+        self.size = size
+        self.offset = offset
+        self._must: list[dict] = []
+        self._filter: list[dict] = []
+        self._must_not: list[dict] = []
+
+    def must(self, *clauses: dict) -> 'SearchQuery':
+        """Add scoring clauses all of which must match."""
+
+        self._must.extend(clauses)
+        return self
+
+    def filter(self, *clauses: dict) -> 'SearchQuery':
+        """Add non-scoring clauses all of which must match."""
+
+        self._filter.extend(clauses)
+        return self
+
+    def exclude(self, *clauses: dict) -> 'SearchQuery':
+        """Add non-scoring clauses none of which must match."""
+
+        self._must_not.extend(clauses)
+        return self
+
+    def build(
+            self,
+            track_total_hits: bool | int = False,
+            timeout: str = ELASTIC_SEARCH_TIMEOUT,
+    ) -> dict:
+        """
+        Build params for AsyncElasticsearch.search().
+
+        Args:
+            track_total_hits: bool | int Count total hits accurately (True)
+                or up to the number.
+            timeout: str Search timeout, partial results are returned
+                when it expires.
+        Returns:
+            Dict of search params.
+        """
+
+        params = {
+            'index': self.index,
+            'track_total_hits': track_total_hits,
+        }
+        if timeout:
+            params['timeout'] = timeout
+        query = {
+            clause: clauses for clause, clauses in (
+                ('must', self._must),
+                ('filter', self._filter),
+                ('must_not', self._must_not),
+            ) if clauses
+        }
+        if query:
+            params['query'] = {'bool': query}
+        if self.size is not None:
+            params['size'] = self.size
+        if self.offset:
+            params['from_'] = self.offset
+        return params
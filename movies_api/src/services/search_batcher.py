@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from functools import lru_cache
+
+from elasticsearch import ApiError, AsyncElasticsearch, NotFoundError
+
+from core.config import (
+    ELASTIC_MSEARCH_ENABLED,
+    ELASTIC_MSEARCH_MAX_BATCH,
+    ELASTIC_MSEARCH_WINDOW_IN_SECONDS,
+)
+from core.metrics import ELASTIC_LATENCY, track_latency
+
+logger = logging.getLogger(__name__)
+
+
+def to_msearch(params: dict) -> tuple[dict, dict]:
+    """
+    Convert AsyncElasticsearch.search() params to _msearch header and body.
+
+    Args:
+        params: dict Search params.
+    Returns:
+        Tuple of header and body of the search in _msearch request.
+    """
+
+    header, body = {}, dict(params.get('body') or {})
+    for key, value in params.items():
+        if key == 'index':
+            header['index'] = value
+        elif key == 'from_':
+            body['from'] = value
+        elif key == 'source_includes':
+            body['_source'] = {'includes': value}
+        elif key != 'body':
+            body[key] = value
+    return header, body
+
+
+class SearchBatcher:
+    """
+    Batch concurrent searches into _msearch requests (DataLoader-like).
+
+    Searches issued within 'window' seconds after the first one in the same
+    event loop are sent as one _msearch request, or earlier when
+    'max_batch' searches are collected. Results and errors are passed back
+    to each caller as if it called search() itself.
+    """
+
+    def __init__(
+            self,
+            elastic: AsyncElasticsearch,
+            window: float = 0.002,
+            max_batch: int = 50,
+    ) -> None:
+        self.elastic = elastic
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def search(self, params: dict) -> dict:
+        """
+        Search with params of AsyncElasticsearch.search().
+
+        Returns:
+            Search response body.
+        """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((params, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._execute(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        if len(batch) == 1:
+            (params, future), = batch
+            try:
+                response = await self.elastic.search(**params)
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+                return
+            if not future.done():
+                future.set_result(response.body)
+            return
+
+        try:
+            response = await self._msearch(batch)
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, future), item in zip(batch, response['responses']):
+            if future.done():
+                continue
+            if 'error' in item:
+                error_class = (
+                    NotFoundError if item.get('status') == 404 else ApiError
+                )
+                error = item['error']
+                future.set_exception(error_class(
+                    message=(
+                        error.get('type', 'search_error')
+                        if isinstance(error, dict) else str(error)
+                    ),
+                    meta=response.meta,
+                    body=item,
+                ))
+            else:
+                future.set_result(item)
+
+    @track_latency(ELASTIC_LATENCY, 'elastic', 'msearch')
+    async def _msearch(self, batch: list[tuple[dict, asyncio.Future]]):
+        searches = []
+        for params, _ in batch:
+            searches.extend(to_msearch(params))
+        logger.debug('Send %s searches in one _msearch.', len(batch))
+        return await self.elastic.msearch(searches=searches)
+
+
+@lru_cache()
+def get_search_batcher(elastic: AsyncElasticsearch) -> SearchBatcher | None:
+    """Get batcher shared by all services of the client if it's enabled."""
+
+    if not ELASTIC_MSEARCH_ENABLED:
+        return None
+    return SearchBatcher(
+        elastic,
+        window=ELASTIC_MSEARCH_WINDOW_IN_SECONDS,
+        max_batch=ELASTIC_MSEARCH_MAX_BATCH,
+    )
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, TypeVar
+
+from aioredis import Redis
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Delete lock only if it is still held by the same owner.
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one backend call.
+
+    The first caller (leader) runs 'func', the rest (followers) await the
+    leader's result up to 'timeout' seconds and run 'func' themselves when
+    it is exceeded.
+
+    If 'lock_redis' is set, leaders of different workers additionally
+    compete for a Redis lock: the loser polls 'load' (usually cache read)
+    until the winner has stored the result.
+    """
+
+    def __init__(
+            self,
+            timeout: float = 5.0,
+            lock_redis: Redis | None = None,
+            lock_ttl: float = 10.0,
+            poll_interval: float = 0.05,
+            lock_prefix: str = 'single_flight:',
+    ) -> None:
+        self.timeout = timeout
+        self.lock_redis = lock_redis
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self.lock_prefix = lock_prefix
+        self._calls: dict[str, asyncio.Future] = {}
+
+    async def do(
+            self,
+            key: str,
+            func: Callable[[], Awaitable[T]],
+            load: Callable[[], Awaitable[T | None]] | None = None,
+    ) -> T:
+        """
+        Run 'func' once for all concurrent callers with the same key.
+
+        Args:
+            key: str Coalescing key (usually cache key).
+            func: Coroutine function which loads and caches the value.
+            load: Coroutine function which reads already cached value,
+                enables cross-worker Redis lock if 'lock_redis' is set.
+        Returns:
+            Result of 'func'.
+        """
+
+        future = self._calls.get(key)
+        if future is not None:
+            return await self._follow(future, func)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            if self.lock_redis is not None and load is not None:
+                result = await self._locked(key, func, load)
+            else:
+                result = await func()
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark exception as retrieved if there are no followers.
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._calls.pop(key, None)
+
+    async def _follow(
+            self,
+            future: asyncio.Future,
+            func: Callable[[], Awaitable[T]],
+    ) -> T:
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(future), self.timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                'Single flight leader timed out after %s s.', self.timeout
+            )
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+        return await func()
+
+    async def _locked(
+            self,
+            key: str,
+            func: Callable[[], Awaitable[T]],
+            load: Callable[[], Awaitable[T | None]],
+    ) -> T:
+        lock_key = f'{self.lock_prefix}{key}'
+        token = uuid.uuid4().hex
+        acquired = await self.lock_redis.set(
+            lock_key, token, nx=True, px=int(self.lock_ttl * 1000),
+        )
+        if acquired:
+            try:
+                return await func()
+            finally:
+                await self.lock_redis.eval(
+                    RELEASE_LOCK_SCRIPT, 1, lock_key, token
+                )
+
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            result = await load()
+            if result is not None:
+                return result
+            if not await self.lock_redis.exists(lock_key):
+                # Leader finished without caching anything (e.g. not found).
+                return await func()
+        logger.warning(
+            'Single flight lock %s wait timed out after %s s.',
+            lock_key, self.timeout,
+        )
+        return await func()
@@ -0,0 +1,214 @@
+import asyncio
+import bisect
+import heapq
+import logging
+import re
+from array import array
+from typing import Callable, Iterable, NamedTuple
+
+from services.data_services import ElasticService
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r'\w+')
+# Sorts after any key with the same prefix.
+PREFIX_END = '\U0010ffff'
+
+
+def normalize(text: str) -> str:
+    """Casefold text and keep its words separated by single spaces."""
+
+    return ' '.join(WORD_RE.findall(text.casefold()))
+
+
+class Suggestion(NamedTuple):
+    uuid: str
+    text: str
+    score: float
+
+
+class PrefixIndex:
+    """
+    Prefix index of texts with top K by score of dense prefixes.
+
+    Every tail of a normalized text starting at a word is a key ('the dark
+    knight' -> 'dark knight', 'knight'), so prefix of any word matches. Keys
+    are sorted, keys with a prefix form a range found by bisect. Top K of
+    prefixes matched by more than 'dense_threshold' keys are precomputed
+    (like top K in trie nodes), so a lookup ranks at most that many keys.
+    """
+
+    def __init__(
+            self,
+            items: Iterable[Suggestion],
+            top_k: int = 10,
+            dense_threshold: int = 64,
+    ) -> None:
+        self.items = list(items)
+        self.top_k = top_k
+        pairs = sorted({
+            (key, item_id)
+            for item_id, item in enumerate(self.items)
+            for key in self._tails(normalize(item.text))
+        })
+        self._keys = [key for key, _ in pairs]
+        self._item_ids = array('I', (item_id for _, item_id in pairs))
+        self._dense: dict[str, list[int]] = {}
+        for key in dict.fromkeys(self._keys):
+            for length in range(1, len(key) + 1):
+                prefix = key[:length]
+                if prefix in self._dense:
+                    continue
+                start, stop = self._range(prefix)
+                # Longer prefixes match the same or fewer keys.
+                if stop - start <= dense_threshold:
+                    break
+                self._dense[prefix] = self._rank(start, stop, top_k)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @staticmethod
+    def _tails(text: str) -> Iterable[str]:
+        start = 0
+        while text:
+            yield text[start:]
+            start = text.find(' ', start) + 1
+            if not start:
+                break
+
+    def _range(self, prefix: str) -> tuple[int, int]:
+        return (
+            bisect.bisect_left(self._keys, prefix),
+            bisect.bisect_left(self._keys, prefix + PREFIX_END),
+        )
+
+    def _rank(self, start: int, stop: int, limit: int) -> list[int]:
+        item_ids = sorted(set(self._item_ids[start:stop]))
+        return heapq.nlargest(
+            limit, item_ids, key=lambda item_id: self.items[item_id].score,
+        )
+
+    def search(
+            self, prefix: str, limit: int | None = None,
+    ) -> list[Suggestion]:
+        """
+        Get items with text words starting with prefix, best scored first.
+
+        Args:
+            prefix: str Text typed so far.
+            limit: int | None Max number of items, up to top_k.
+        Returns:
+            List of suggestions.
+        """
+
+        prefix = normalize(prefix)
+        limit = min(limit or self.top_k, self.top_k)
+        if not prefix:
+            return []
+        item_ids = self._dense.get(prefix)
+        if item_ids is None:
+            item_ids = self._rank(*self._range(prefix), limit)
+        return [self.items[item_id] for item_id in item_ids[:limit]]
+
+
+def film_suggestion(source: dict) -> Suggestion:
+    return Suggestion(
+        source['uuid'], source['title'], source.get('imdb_rating') or 0.0,
+    )
+
+
+def person_suggestion(source: dict) -> Suggestion:
+    # Persons known by more films go first.
+    film_ids = {
+        film_id
+        for role in source.get('roles') or []
+        for film_id in role.get('film_ids') or []
+    }
+    return Suggestion(source['uuid'], source['full_name'], len(film_ids))
+
+
+class SuggestIndexes:
+    """
+    Per-index prefix indexes of films titles and persons names.
+
+    Indexes are built in background by scrolling Elasticsearch indexes and
+    rebuilt periodically, until an index is built it has no suggestions.
+    """
+
+    sources: dict[str, tuple[list[str], Callable[[dict], Suggestion]]] = {
+        'movies': (['uuid', 'title', 'imdb_rating'], film_suggestion),
+        'persons': (
+            ['uuid', 'full_name', 'roles.film_ids'], person_suggestion,
+        ),
+    }
+
+    _elastic: ElasticService | None = None
+    _top_k: int = 10
+    _rebuild_interval: float = 600
+    _indexes: dict[str, PrefixIndex] = {}
+    _task: asyncio.Task | None = None
+
+    @classmethod
+    def init(
+            cls,
+            elastic: ElasticService,
+            top_k: int = 10,
+            rebuild_interval: float = 600,
+    ) -> None:
+        """Start building indexes in background task."""
+
+        cls._elastic = elastic
+        cls._top_k = top_k
+        cls._rebuild_interval = rebuild_interval
+        cls._indexes = {}
+        cls._task = asyncio.create_task(cls._build_forever())
+
+    @classmethod
+    async def stop(cls) -> None:
+        if cls._task is None:
+            return
+        cls._task.cancel()
+        try:
+            await cls._task
+        except asyncio.CancelledError:
+            pass
+        cls._task = None
+
+    @classmethod
+    def get(cls, index: str) -> PrefixIndex | None:
+        return cls._indexes.get(index)
+
+    @classmethod
+    async def build(cls, index: str) -> None:
+        """(Re)build prefix index of Elasticsearch index."""
+
+        fields, to_suggestion = cls.sources[index]
+        items = [
+            to_suggestion(source)
+            async for source in cls._elastic.scan_in_elastic(index, fields)
+        ]
+        # Sorting keys takes a while for large catalogs, don't block loop.
+        prefix_index = await asyncio.get_running_loop().run_in_executor(
+            None, PrefixIndex, items, cls._top_k,
+        )
+        cls._indexes[index] = prefix_index
+        logger.info(
+            'Suggest index of %s built with %s items.',
+            index, len(prefix_index),
+        )
+
+    @classmethod
+    async def _build_forever(cls) -> None:
+        while True:
+            for index in cls.sources:
+                try:
+                    await cls.build(index)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    # Keep previous index, it's just a bit outdated.
+                    logger.exception(
+                        'Suggest index of %s build failed.', index,
+                    )
+            await asyncio.sleep(cls._rebuild_interval)
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import time
+
+import orjson
+from aioredis import Redis
+from fastapi import HTTPException, Request, Response
+
+from api.v1 import films, genres
+from api.v1.utils import (
+    FieldsQueryParams,
+    FilmQueryParams,
+    FilterQueryParams,
+    PaginateQueryParams,
+)
+from services.data_services import SearchTimeoutError
+from services.films import FilmService
+from services.genres import GenreService
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Limit rate of operations to 'rate' per second."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate
+        self._next_at = 0.0
+
+    async def wait(self) -> None:
+        now = time.monotonic()
+        self._next_at = max(self._next_at, now)
+        delay = self._next_at - now
+        self._next_at += self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class CacheWarmer:
+    """
+    Fill view cache with hot pages through the same views clients call:
+    genres list, first 'pages' pages of popular films for all films and
+    per genre, details of 'top_films' most popular films.
+
+    Views are called not more often than 'rate' times per second.
+    """
+
+    def __init__(
+            self,
+            film_service: FilmService,
+            genre_service: GenreService,
+            pages: int = 3,
+            page_size: int = 50,
+            top_films: int = 100,
+            rate: float = 20,
+    ) -> None:
+        self.film_service = film_service
+        self.genre_service = genre_service
+        self.pages = pages
+        self.page_size = page_size
+        self.top_films = top_films
+        self.rate_limiter = RateLimiter(rate)
+
+    async def warm(self) -> int:
+        """
+        Warm view cache.
+
+        Returns:
+            Number of views called.
+        """
+
+        started = time.monotonic()
+        calls = 0
+        genre_ids = []
+        page_number = 1
+        while True:
+            page = await self._call_view(
+                genres.get_genres,
+                paginate_params=PaginateQueryParams(
+                    page_number=page_number,
+                    page_size=self.page_size,
+                    cursor=None,
+                ),
+                genre_service=self.genre_service,
+            )
+            calls += 1
+            genre_ids.extend(genre['uuid'] for genre in page)
+            if len(page) < self.page_size:
+                break
+            page_number += 1
+
+        top_film_ids = []
+        for genre_id in [None, *genre_ids]:
+            for page_number in range(1, self.pages + 1):
+                page = await self._call_view(
+                    films.films_popular,
+                    filter_params=FilterQueryParams(
+                        filter_genre=genre_id, sort='-imdb_rating',
+                    ),
+                    paginate_params=PaginateQueryParams(
+                        page_number=page_number,
+                        page_size=self.page_size,
+                        cursor=None,
+                    ),
+                    fields_params=FieldsQueryParams(fields=None),
+                    film_service=self.film_service,
+                )
+                calls += 1
+                if genre_id is None:
+                    top_film_ids.extend(film['uuid'] for film in page)
+                if len(page) < self.page_size:
+                    break
+
+        for film_id in top_film_ids[:self.top_films]:
+            await self._call_view(
+                films.film_details_by_uuid,
+                path_params={'film_id': film_id},
+                film_params=FilmQueryParams(film_id=film_id),
+                film_service=self.film_service,
+            )
+            calls += 1
+
+        logger.info(
+            'Cache warmed with %s views in %.1f s.',
+            calls, time.monotonic() - started,
+        )
+        return calls
+
+    async def warm_exclusive(self, redis: Redis, lock_ttl: int) -> int:
+        """
+        Warm view cache unless another worker has done it during the last
+        'lock_ttl' seconds.
+
+        Returns:
+            Number of views called.
+        """
+
+        if not await redis.set('cache_warmup:lock', 1, nx=True, ex=lock_ttl):
+            return 0
+        return await self.warm()
+
+    async def _call_view(self, view, path_params: dict = None, **kwargs):
+        await self.rate_limiter.wait()
+        request = Request({
+            'type': 'http',
+            'method': 'GET',
+            'path_params': path_params or {},
+            'headers': [],
+            'query_string': b'',
+            'cache_warmup': True,
+        })
+        try:
+            response: Response = await view(request=request, **kwargs)
+        except (HTTPException, SearchTimeoutError):
+            return []
+        return orjson.loads(response.body)
+
+
+async def warm_periodically(
+        warmer: CacheWarmer,
+        redis: Redis,
+        interval: int,
+        lock_ttl: int,
+) -> None:
+    """
+    Warm view cache once in one of workers, then every 'interval' seconds
+    if it is set.
+    """
+
+    while True:
+        try:
+            await warmer.warm_exclusive(redis, lock_ttl)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception('Cache warming failed.')
+        if not interval:
+            return
+        await asyncio.sleep(interval)
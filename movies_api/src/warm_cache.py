@@ -0,0 +1,36 @@
+"""
+Warm view cache from command line:
+
+    python warm_cache.py [--interval SECONDS]
+"""
+import argparse
+import asyncio
+
+import main
+
+
+async def warm(interval: int) -> None:
+    # Warming is run here, not in the background task of the app.
+    main.config.CACHE_WARMUP_ON_STARTUP = False
+    await main.startup()
+    try:
+        warmer = main.get_cache_warmer()
+        while True:
+            await warmer.warm()
+            if not interval:
+                break
+            await asyncio.sleep(interval)
+    finally:
+        await main.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Warm movies API cache.')
+    parser.add_argument(
+        '--interval',
+        type=int,
+        default=0,
+        help='Repeat warming every N seconds, run once if not set.',
+    )
+    args = parser.parse_args()
+    asyncio.run(warm(args.interval))
@@ -0,0 +1,22 @@
+import fakeredis.aioredis
+import pytest
+
+from services.cache import CacheAPIResponse
+from services.data_services import RedisService
+
+
+@pytest.fixture
+def view_cache():
+    """
+    Init view cache with fake Redis, settings are CacheAPIResponse.init
+    kwargs. Must be called inside the event loop of the test.
+    """
+
+    def init(**settings) -> RedisService:
+        CacheAPIResponse._init = False
+        service = RedisService(fakeredis.aioredis.FakeRedis())
+        CacheAPIResponse.init(service, **settings)
+        return service
+
+    yield init
+    CacheAPIResponse._init = False
@@ -0,0 +1,54 @@
+from services.admission import CacheAdmission, CountMinSketch
+
+
+def test_sketch_never_underestimates():
+    sketch = CountMinSketch(error_rate=0.01, max_count=255)
+    counts = {f'key{i}': i % 7 + 1 for i in range(500)}
+    for key, count in counts.items():
+        for _ in range(count):
+            sketch.add(key)
+    for key, count in counts.items():
+        assert sketch.estimate(key) >= count
+    # Overestimate is bounded by error_rate * total with 99% confidence.
+    bound = 0.01 * sum(counts.values())
+    overestimated = sum(
+        sketch.estimate(key) - count > bound for key, count in counts.items()
+    )
+    assert overestimated < 25
+
+
+def test_sketch_counters_saturate_and_halve():
+    sketch = CountMinSketch(max_count=15)
+    for _ in range(100):
+        sketch.add('hot')
+    assert sketch.estimate('hot') == 15
+    sketch.halve()
+    assert sketch.estimate('hot') == 7
+    assert sketch.estimate('cold') == 0
+
+
+def test_one_off_keys_are_not_admitted():
+    admission = CacheAdmission(window=100, min_frequency=2)
+    admission.record('once')
+    assert admission.admit('once', 10, 60) is None
+    admission.record('twice')
+    admission.record('twice')
+    assert admission.admit('twice', 10, 60) == 60
+
+
+def test_frequencies_age_every_window():
+    admission = CacheAdmission(window=10, min_frequency=2)
+    admission.record('key')
+    admission.record('key')
+    for i in range(10):
+        admission.record(f'other{i}')
+    assert admission.admit('key', 10, 60) is None
+
+
+def test_ttl_of_large_payloads_is_shortened():
+    admission = CacheAdmission(large_entry_bytes=100, max_entry_bytes=1000)
+    assert admission.expire_for_size(100, 60) == 60
+    assert admission.expire_for_size(200, 60) == 30
+    assert admission.expire_for_size(1000, 60) == 6
+    assert admission.expire_for_size(1001, 60) is None
+    assert admission.expire_for_size(999, 1) == 1
@@ -0,0 +1,62 @@
+import time
+
+import orjson
+
+from services.cache_entry import CACHE_SCHEMA_VERSION, CacheEntry
+
+
+def test_entry_survives_encode_decode():
+    entry = CacheEntry.create(
+        b'{"a": 1}', expire=60, delta=0.5, headers={'X-Next-Cursor': 'c'},
+    )
+    decoded = CacheEntry.decode(entry.encode())
+    assert decoded.payload == b'{"a": 1}'
+    assert decoded.soft_expire_at == entry.soft_expire_at
+    assert decoded.delta == 0.5
+    assert decoded.etag == CacheEntry.hash_payload(b'{"a": 1}')
+    assert decoded.headers == {'X-Next-Cursor': 'c'}
+
+
+def test_payload_may_contain_separator():
+    payload = b'[\n1,\n2\n]'
+    decoded = CacheEntry.decode(CacheEntry.create(payload, 60).encode())
+    assert decoded.payload == payload
+
+
+def test_malformed_or_outdated_entries_are_misses():
+    entry = CacheEntry.create(b'{}', 60)
+    header, _, payload = entry.encode().partition(CacheEntry.separator)
+    meta = orjson.loads(header)
+    meta['v'] = CACHE_SCHEMA_VERSION - 1
+    outdated = orjson.dumps(meta) + CacheEntry.separator + payload
+    assert CacheEntry.decode(outdated) is None
+    assert CacheEntry.decode(b'{}') is None
+    assert CacheEntry.decode(b'not json\n{}') is None
+    assert CacheEntry.decode(b'[]\n{}') is None
+    assert CacheEntry.decode(b'{"v": %d}\n{}' % CACHE_SCHEMA_VERSION) is None
+
+
+def test_jitter_keeps_ttl_in_bounds():
+    for _ in range(100):
+        entry = CacheEntry.create(b'{}', expire=100, jitter=0.1)
+        assert 89 <= entry.soft_expire_at - time.time() <= 110
+
+
+def test_entry_is_stale_after_soft_ttl():
+    fresh = CacheEntry(b'{}', time.time() + 60)
+    expired = CacheEntry(b'{}', time.time() - 1)
+    assert not fresh.is_stale(beta=0)
+    assert expired.is_stale(beta=0)
+    assert fresh.max_age() in (59, 60)
+    assert expired.max_age() == 0
+
+
+def test_xfetch_refreshes_expensive_entries_early():
+    # Recompute takes as long as the entry has left, it is refreshed
+    # early with probability 1/e.
+    expensive = CacheEntry(b'{}', time.time() + 10, delta=10)
+    stale = sum(expensive.is_stale(beta=1.0) for _ in range(1000))
+    assert 250 < stale < 500
+    cheap = CacheEntry(b'{}', time.time() + 10, delta=0.001)
+    assert not any(cheap.is_stale(beta=1.0) for _ in range(1000))
+    assert not any(expensive.is_stale(beta=0) for _ in range(1000))
@@ -0,0 +1,79 @@
+import asyncio
+from enum import Enum
+
+import fakeredis.aioredis
+import pytest
+
+from services.base_service import BaseService
+from services.cache import compose_key
+from services.generations import CacheGenerations
+
+
+class Sort(Enum):
+    asc = 'asc'
+
+
+async def view(request, query: str, sort: str):
+    pass
+
+
+def key(generations=(), **kwargs) -> str:
+    return compose_key('cache:', view, generations, args=(), kwargs=kwargs)
+
+
+@pytest.fixture
+def generations():
+    """Init generations with fake Redis, return the Redis."""
+
+    redis = fakeredis.aioredis.FakeRedis()
+    CacheGenerations.init(redis, refresh_interval=60)
+    yield redis
+    CacheGenerations._redis = None
+    CacheGenerations._values = {}
+
+
+def test_key_is_stable_across_argument_order():
+    assert key(query='star', sort='asc') == key(sort='asc', query='star')
+    assert key(query='star', sort=Sort.asc) == key(query='star', sort='asc')
+
+
+def test_key_depends_on_arguments_only():
+    service = BaseService(None, None)
+    assert key(query='star', service=service) == key(query='star')
+    assert key(query='star') != key(query='wars')
+    assert key(query='star').startswith(f'cache:{__name__}.view:')
+
+
+def test_generation_bump_changes_key():
+    assert key((1,), query='star') != key((2,), query='star')
+    assert key((1, 'v1'), query='star') != key((1, 'v2'), query='star')
+
+
+def test_generations_are_zeros_when_not_initialized():
+    assert asyncio.run(CacheGenerations.get('movies', 'persons')) == (0, 0)
+
+
+def test_bump_changes_generation_of_index_only(generations):
+    async def scenario():
+        before = await CacheGenerations.get('movies', 'persons')
+        await CacheGenerations.bump('movies')
+        return before, await CacheGenerations.get('movies', 'persons')
+
+    before, after = asyncio.run(scenario())
+    assert before == (0, 0)
+    assert after == (1, 0)
+    assert key(before, query='star') != key(after, query='star')
+
+
+def test_generation_bumped_by_etl_is_read_after_refresh_interval(
+        generations,
+):
+    async def scenario():
+        await CacheGenerations.get('movies')
+        # ETL bumps the counter in Redis directly.
+        await generations.incr('cache_generation:movies')
+        cached = await CacheGenerations.get('movies')
+        CacheGenerations._refresh_interval = 0
+        return cached, await CacheGenerations.get('movies')
+
+    assert asyncio.run(scenario()) == ((0,), (1,))
@@ -0,0 +1,109 @@
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+from services.catalog import CatalogSnapshot, FilmCatalog, to_float32
+
+# Snapshot is written by ETL, its writer is imported from the ETL package.
+pytest.importorskip('numpy')
+sys.path.insert(0, str(Path(__file__).parents[2] / 'postgres_to_es'))
+from postgres_to_es.catalog import build_snapshot  # noqa: E402
+
+DRAMA, COMEDY = str(uuid.UUID(int=1)), str(uuid.UUID(int=2))
+FILMS = [
+    (str(uuid.UUID(int=10 + i)), f'Фильм {i}', rating, genres)
+    for i, (rating, genres) in enumerate([
+        (7.1, [DRAMA]),
+        (None, [COMEDY]),
+        (9.3, [DRAMA, COMEDY]),
+        (7.1, [COMEDY]),
+        (5.0, []),
+        # Equal to 7.1 with float32 precision, as Elasticsearch compares.
+        (7.1000001, [DRAMA]),
+    ])
+]
+
+
+def expected(genre=None, descending=True):
+    """Films as Elasticsearch sorts them, missing ratings last."""
+
+    films = [film for film in FILMS if genre is None or genre in film[3]]
+    rated = sorted(
+        (film for film in films if film[2] is not None),
+        key=lambda film: (
+            -to_float32(film[2]) if descending else to_float32(film[2]),
+            film[0],
+        ),
+    )
+    unrated = sorted(
+        (film for film in films if film[2] is None), key=lambda f: f[0],
+    )
+    return [film[0] for film in rated + unrated]
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    path = tmp_path / 'catalog.bin'
+    path.write_bytes(build_snapshot(FILMS))
+    return path
+
+
+def iterate(snapshot, genre, descending, size=2):
+    uuids, cursor = [], None
+    while True:
+        page = snapshot.page(genre, descending, size, cursor=cursor)
+        uuids.extend(film.uuid for film in page)
+        cursor = page.next_cursor
+        if cursor is None:
+            return uuids
+
+
+@pytest.mark.parametrize('genre', [None, DRAMA, COMEDY])
+@pytest.mark.parametrize('descending', [True, False])
+def test_pages_are_sorted_as_elasticsearch_sorts(
+        snapshot_path, genre, descending,
+):
+    snapshot = CatalogSnapshot(str(snapshot_path))
+    assert iterate(snapshot, genre, descending) == expected(genre, descending)
+    page = snapshot.page(genre, descending, size=2, offset=1)
+    assert [film.uuid for film in page] == expected(genre, descending)[1:3]
+
+
+def test_films_are_read_back(snapshot_path):
+    snapshot = CatalogSnapshot(str(snapshot_path))
+    assert snapshot.films_count == len(FILMS)
+    for film_uuid, title, rating, _ in FILMS:
+        film = snapshot.film(snapshot.find(film_uuid))
+        assert (film.uuid, film.title, film.imdb_rating) == (
+            film_uuid, title, rating,
+        )
+    assert snapshot.find(str(uuid.UUID(int=99))) is None
+    assert len(snapshot.page(str(uuid.UUID(int=99)), True, size=2)) == 0
+
+
+def test_unsupported_snapshot_is_rejected(tmp_path):
+    path = tmp_path / 'catalog.bin'
+    path.write_bytes(b'XCAT' + build_snapshot(FILMS)[4:])
+    with pytest.raises(ValueError):
+        CatalogSnapshot(str(path))
+
+
+def test_version_changes_with_snapshot(snapshot_path):
+    FilmCatalog._path = str(snapshot_path)
+    FilmCatalog._snapshot = None
+    try:
+        assert FilmCatalog.reload()
+        version = FilmCatalog.get_version()
+        assert not FilmCatalog.reload()
+        snapshot_path.write_bytes(build_snapshot(FILMS[:3]))
+        stat = snapshot_path.stat()
+        os.utime(snapshot_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        assert FilmCatalog.reload()
+        assert FilmCatalog.get_version() not in ('', version)
+    finally:
+        FilmCatalog._path = None
+        FilmCatalog._snapshot = None
+    assert FilmCatalog.get_version() == ''
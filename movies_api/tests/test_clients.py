@@ -0,0 +1,43 @@
+import asyncio
+
+from elastic_transport import AiohttpHttpNode, NodeConfig
+
+from core.metrics import CLIENT_POOL_IN_USE, CLIENT_POOL_WAITING
+from db.clients import MeteredAiohttpHttpNode
+
+
+def gauges() -> tuple[float, float]:
+    return (
+        CLIENT_POOL_IN_USE.labels('elastic')._value.get(),
+        CLIENT_POOL_WAITING.labels('elastic')._value.get(),
+    )
+
+
+def test_elastic_requests_over_node_connections_are_waiting(monkeypatch):
+    release = None
+
+    async def perform_request(self, method, target, **kwargs):
+        await release.wait()
+        return target
+
+    monkeypatch.setattr(AiohttpHttpNode, 'perform_request', perform_request)
+    node = MeteredAiohttpHttpNode(
+        NodeConfig('http', 'localhost', 9200, connections_per_node=2),
+    )
+    initial = gauges()
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        requests = [
+            asyncio.create_task(node.perform_request('GET', f'/{i}'))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        saturated = gauges()
+        release.set()
+        await asyncio.gather(*requests)
+        return saturated
+
+    assert asyncio.run(scenario()) == (initial[0] + 2, initial[1] + 1)
+    assert gauges() == initial
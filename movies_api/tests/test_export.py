@@ -0,0 +1,103 @@
+import asyncio
+
+import fakeredis.aioredis
+import orjson
+from elasticsearch import NotFoundError
+
+from services.data_services import ElasticService, RedisService
+from services.films import FilmService
+
+FILMS = [{'uuid': f'f{i}', 'title': f'Film {i}'} for i in range(5)]
+
+
+class Response(dict):
+    @property
+    def body(self):
+        return self
+
+
+class FakeElastic:
+    """Point-in-time of FILMS, records opened and closed ones."""
+
+    def __init__(self, films: list | None = FILMS) -> None:
+        # None if index doesn't exist.
+        self.films = films
+        self.opened = []
+        self.closed = []
+
+    async def count(self, index):
+        if self.films is None:
+            raise NotFoundError(404, 'index_not_found_exception', {})
+        return Response({'count': len(self.films)})
+
+    async def open_point_in_time(self, index, keep_alive):
+        self.opened.append(f'pit{len(self.opened)}')
+        return Response({'id': self.opened[-1]})
+
+    async def close_point_in_time(self, id):
+        self.closed.append(id)
+
+    async def search(self, size, pit, search_after=None, **kwargs):
+        start = search_after[0] + 1 if search_after else 0
+        hits = [
+            {'_source': film, 'sort': [start + offset]}
+            for offset, film in enumerate(self.films[start:start + size])
+        ]
+        return Response({'pit_id': pit['id'], 'hits': {'hits': hits}})
+
+
+def make_service(elastic: FakeElastic) -> FilmService:
+    return FilmService(
+        RedisService(fakeredis.aioredis.FakeRedis()), ElasticService(elastic),
+    )
+
+
+def test_films_are_exported_and_point_in_time_closed(monkeypatch):
+    monkeypatch.setattr('services.films.EXPORT_BATCH_SIZE', 2)
+    elastic = FakeElastic()
+
+    async def scenario():
+        chunks = await make_service(elastic).export_films(['uuid'])
+        return [chunk async for chunk in chunks]
+
+    chunks = asyncio.run(scenario())
+    assert len(chunks) == 3
+    lines = b''.join(chunks).splitlines()
+    assert [orjson.loads(line)['uuid'] for line in lines] == [
+        film['uuid'] for film in FILMS
+    ]
+    assert elastic.opened == elastic.closed == ['pit0']
+
+
+def test_point_in_time_is_not_opened_until_streaming_starts():
+    elastic = FakeElastic()
+
+    async def scenario():
+        chunks = await make_service(elastic).export_films(['uuid'])
+        assert chunks is not None
+        await chunks.aclose()
+
+    asyncio.run(scenario())
+    assert elastic.opened == []
+
+
+def test_point_in_time_is_closed_when_streaming_stops(monkeypatch):
+    monkeypatch.setattr('services.films.EXPORT_BATCH_SIZE', 2)
+    elastic = FakeElastic()
+
+    async def scenario():
+        chunks = await make_service(elastic).export_films(['uuid'])
+        await chunks.__anext__()
+        # Client disconnected after the first chunk.
+        await chunks.aclose()
+
+    asyncio.run(scenario())
+    assert elastic.opened == elastic.closed == ['pit0']
+
+
+def test_nothing_to_export():
+    async def scenario(films):
+        return await make_service(FakeElastic(films)).export_films(['uuid'])
+
+    assert asyncio.run(scenario([])) is None
+    assert asyncio.run(scenario(None)) is None
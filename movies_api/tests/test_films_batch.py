@@ -0,0 +1,97 @@
+import asyncio
+
+import fakeredis.aioredis
+import pytest
+from fastapi import HTTPException
+
+from api.v1.films import get_films_batch
+from api.v1.utils import check_batch_size
+from core.config import FILMS_BATCH_MAX_SIZE
+from services.data_services import ElasticService, RedisService
+from services.films import FilmService
+
+FILMS = {
+    f'f{i}': {
+        'uuid': f'f{i}',
+        'title': f'Film {i}',
+        'description': f'About film {i}',
+        'imdb_rating': float(i),
+    }
+    for i in range(5)
+}
+
+
+class FakeElastic:
+    """Finds FILMS by _id, returns docs in unspecified (reversed) order."""
+
+    def __init__(self) -> None:
+        self.mget_ids = []
+
+    async def mget(self, index, ids, source_includes):
+        self.mget_ids.append(list(ids))
+        return {'docs': [
+            {
+                '_id': item_id,
+                'found': item_id in FILMS,
+                '_source': {
+                    key: value for key, value in FILMS.get(item_id, {}).items()
+                    if key in source_includes
+                },
+            }
+            for item_id in reversed(ids)
+        ]}
+
+
+@pytest.fixture
+def film_service():
+    return FilmService(
+        RedisService(fakeredis.aioredis.FakeRedis()),
+        ElasticService(FakeElastic()),
+    )
+
+
+def test_films_are_returned_in_the_order_of_ids(film_service):
+    ids = ['f3', 'missing', 'f0', 'f4']
+
+    async def scenario():
+        return [
+            await film_service.get_films_by_ids(ids) for _ in range(2)
+        ]
+
+    fetched, cached = asyncio.run(scenario())
+    for films in (fetched, cached):
+        assert list(films) == ids
+        assert films['missing'] is None
+        assert [films[i].title for i in ('f3', 'f0', 'f4')] == [
+            'Film 3', 'Film 0', 'Film 4',
+        ]
+    # The second lookup is served from cache, 'missing' too.
+    assert film_service.elastic.elastic.mget_ids == [ids]
+
+
+def test_only_cache_misses_are_fetched(film_service):
+    async def scenario():
+        await film_service.get_films_by_ids(['f1', 'f2'])
+        return await film_service.get_films_by_ids(['f2', 'f0', 'f1'])
+
+    films = asyncio.run(scenario())
+    assert list(films) == ['f2', 'f0', 'f1']
+    assert film_service.elastic.elastic.mget_ids == [['f1', 'f2'], ['f0']]
+
+
+def test_batch_response_keeps_order_and_duplicates(film_service):
+    ids = ['f2', 'missing', 'f2', 'f1']
+    items = asyncio.run(get_films_batch(ids, film_service))
+    assert [item.uuid for item in items] == ids
+    assert [item.found for item in items] == [True, False, True, True]
+    assert items[1].film is None
+    assert items[0].film.title == items[2].film.title == 'Film 2'
+    # Duplicated id is fetched once.
+    assert film_service.elastic.elastic.mget_ids == [['f2', 'missing', 'f1']]
+
+
+def test_batch_size_is_limited():
+    check_batch_size(['f0'] * FILMS_BATCH_MAX_SIZE)
+    with pytest.raises(HTTPException) as error:
+        check_batch_size(['f0'] * (FILMS_BATCH_MAX_SIZE + 1))
+    assert error.value.status_code == 422
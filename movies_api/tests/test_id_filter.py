@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from services.bloom import BloomFilter
+from services.id_filter import DocumentIdFilters
+from services.invalidation import CacheInvalidationListener
+
+
+class FakeElastic:
+    """Index ids source for filters, scan can be paused in the middle."""
+
+    def __init__(self, ids: list[str]) -> None:
+        self.ids = ids
+        self.scanning = asyncio.Event()
+        self.resume = asyncio.Event()
+        self.resume.set()
+
+    async def count_in_elastic(self, index: str) -> int:
+        return len(self.ids)
+
+    async def scan_ids_in_elastic(self, index: str):
+        for document_id in list(self.ids):
+            self.scanning.set()
+            await self.resume.wait()
+            yield document_id
+
+
+@pytest.fixture
+def id_filters():
+    yield DocumentIdFilters
+    DocumentIdFilters._filters = {}
+    DocumentIdFilters._pending = {}
+    DocumentIdFilters._rebuild = None
+
+
+def init_filters(elastic: FakeElastic) -> None:
+    DocumentIdFilters.init(
+        elastic, ['movies'], error_rate=0.01, rebuild_interval=3600,
+    )
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    bloom.update(f'id{i}' for i in range(1000))
+    assert all(f'id{i}' in bloom for i in range(1000))
+    false_positives = sum(f'other{i}' in bloom for i in range(10000))
+    assert false_positives < 300
+    assert not bloom.is_saturated
+    bloom.add('one more')
+    assert bloom.is_saturated
+
+
+def test_ids_added_while_building_are_kept(id_filters):
+    async def scenario():
+        elastic = FakeElastic(['f1', 'f2'])
+        elastic.resume.clear()
+        init_filters(elastic)
+        await elastic.scanning.wait()
+        assert id_filters.might_exist('movies', 'f3')
+        id_filters.add('movies', ['f3'])
+        elastic.resume.set()
+        await asyncio.sleep(0.01)
+        assert id_filters.might_exist('movies', 'f2')
+        assert id_filters.might_exist('movies', 'f3')
+        assert not id_filters.might_exist('movies', 'f4')
+        await id_filters.stop()
+
+    asyncio.run(scenario())
+
+
+def test_reset_discards_filters_and_rebuilds_them(id_filters):
+    async def scenario():
+        elastic = FakeElastic(['f1'])
+        init_filters(elastic)
+        await asyncio.sleep(0.01)
+        assert not id_filters.might_exist('movies', 'f2')
+
+        # Filter is being rebuilt when notifications are lost, ids of
+        # documents indexed meanwhile are never reported.
+        elastic.scanning.clear()
+        elastic.resume.clear()
+        id_filters.request_rebuild()
+        await elastic.scanning.wait()
+        id_filters.reset()
+        elastic.ids.append('f2')
+        assert id_filters.might_exist('movies', 'f2')
+        elastic.resume.set()
+        await asyncio.sleep(0.01)
+        assert id_filters.might_exist('movies', 'f2')
+        assert not id_filters.might_exist('movies', 'f3')
+        await id_filters.stop()
+
+    asyncio.run(scenario())
+
+
+def test_saturated_filter_is_rebuilt(id_filters):
+    async def scenario():
+        elastic = FakeElastic(['f1'])
+        init_filters(elastic)
+        await asyncio.sleep(0.01)
+        capacity = id_filters._filters['movies'].capacity
+        new_ids = [f'n{i}' for i in range(capacity)]
+        elastic.ids.extend(new_ids)
+        id_filters.add('movies', new_ids)
+        await asyncio.sleep(0.01)
+        assert id_filters._filters['movies'].capacity > capacity
+        await id_filters.stop()
+
+    asyncio.run(scenario())
+
+
+def test_lost_notifications_reset_filters(id_filters):
+    async def scenario():
+        init_filters(FakeElastic(['f1']))
+        await asyncio.sleep(0.01)
+        assert not id_filters.might_exist('movies', 'f2')
+        listener = CacheInvalidationListener(None, 'keys', 'entities')
+        listener.reset_local_state()
+        assert id_filters.might_exist('movies', 'f2')
+        await asyncio.sleep(0.01)
+        assert not id_filters.might_exist('movies', 'f2')
+        await id_filters.stop()
+
+    asyncio.run(scenario())
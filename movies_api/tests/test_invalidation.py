@@ -0,0 +1,81 @@
+import asyncio
+
+import fakeredis.aioredis
+
+from models.base_models import Base
+from services.cache import cache
+from services.data_services import RedisService
+from services.invalidation import CacheInvalidationListener
+from tests.utils import make_request
+
+
+class Item(Base):
+    pass
+
+
+def test_tag_ttl_is_never_shortened():
+    async def scenario():
+        service = RedisService(fakeredis.aioredis.FakeRedis())
+        await service.set_raw('long', b'1', expire=3600, tags=['f1'])
+        await service.set_raw('short', b'2', expire=30, tags=['f1'])
+        assert await service.redis.ttl('cache_tag:f1') > 30
+        await service.set_raw('longer', b'3', expire=7200, tags=['f1'])
+        assert await service.redis.ttl('cache_tag:f1') > 3600
+        assert await service.invalidate_tags(['f1']) == 3
+
+    asyncio.run(scenario())
+
+
+def test_entities_message_invalidates_lists_of_index(view_cache):
+    films = [Item(uuid='f1')]
+
+    @cache(
+        expire=60,
+        indexes=('movies',),
+        serialize_collection=True,
+        list_tags=True,
+    )
+    async def film_list(request):
+        return list(films)
+
+    @cache(expire=60, indexes=('movies',), serialize_collection=True)
+    async def similar_films(request, film_id: str):
+        return [Item(uuid='f3')]
+
+    @cache(expire=60, indexes=('movies',))
+    async def film_details(request, film_id: str):
+        return Item(uuid=film_id)
+
+    async def scenario():
+        service = view_cache(xfetch_beta=0)
+        listener = CacheInvalidationListener(
+            service.redis, 'keys', 'entities', tagged_services=[service],
+        )
+        first = await film_list(request=make_request())
+        await film_details(
+            request=make_request({'film_id': 'f1'}), film_id='f1',
+        )
+        await similar_films(
+            request=make_request({'film_id': 'f1'}), film_id='f1',
+        )
+        # A new film isn't in any cached payload yet.
+        films.append(Item(uuid='f2'))
+        await listener.handle_entities_message(
+            b'{"index": "movies", "ids": ["f2"]}'
+        )
+        second = await film_list(request=make_request())
+        assert first.body != second.body
+        # Collections of given entities are kept, as details are.
+        assert len(await service.redis.keys('response_cache:*')) == 3
+        # Lists of other indexes are kept.
+        await listener.handle_entities_message(
+            b'{"index": "genres", "ids": ["g1"]}'
+        )
+        assert len(await service.redis.keys('response_cache:*')) == 3
+        # Collections are invalidated by their entities.
+        await listener.handle_entities_message(
+            b'{"index": "movies", "ids": ["f3"]}'
+        )
+        assert len(await service.redis.keys('response_cache:*')) == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,75 @@
+import asyncio
+
+import fakeredis
+import fakeredis.aioredis
+
+from services.data_services import RedisService
+from services.invalidation import CacheInvalidationListener
+from services.local_cache import LocalCache
+
+CHANNEL = 'cache_invalidation:keys'
+
+
+def make_worker(server: fakeredis.FakeServer):
+    redis = fakeredis.aioredis.FakeRedis(server=server)
+    local_cache = LocalCache(max_size_bytes=1024, ttl=60)
+    service = RedisService(redis, local_cache, invalidation_channel=CHANNEL)
+    listener = CacheInvalidationListener(
+        redis, CHANNEL, 'entities', local_cache=local_cache,
+    )
+    return service, listener
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(max_size_bytes=10, ttl=60)
+    cache.set('a', b'12345')
+    cache.set('b', b'12345')
+    assert cache.get('a') == b'12345'
+    cache.set('c', b'12345')
+    assert cache.get('b') is None
+    assert cache.get('a') == b'12345'
+    assert cache.size_bytes == 10
+
+
+def test_local_cache_never_outlives_redis_ttl():
+    cache = LocalCache(max_size_bytes=10, ttl=60)
+    cache.set('a', b'1', expire=0)
+    assert cache.get('a') is None
+
+
+def test_overwrite_drops_key_from_local_tiers_of_other_workers():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        writer, writer_listener = make_worker(server)
+        reader, reader_listener = make_worker(server)
+        await writer.set_raw('key', b'old', expire=60)
+        assert await reader.get_raw('key') == b'old'
+
+        pubsub = writer.redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(CHANNEL)
+        await writer.set_raw('key', b'new', expire=60)
+        message = None
+        while message is None:
+            message = await pubsub.get_message(timeout=1)
+        await pubsub.close()
+
+        for listener in (writer_listener, reader_listener):
+            listener.handle_keys_message(message['data'])
+        # Writer keeps its fresh local copy, reader re-reads Redis.
+        assert writer.local_cache.get('key') == b'new'
+        assert reader.local_cache.get('key') is None
+        assert await reader.get_raw('key') == b'new'
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_drops_key_from_all_tiers():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        service, _ = make_worker(server)
+        await service.set_raw('key', b'value', expire=60, tags=['f1'])
+        assert await service.invalidate_tags(['f1']) == 1
+        assert service.local_cache.get('key') is None
+        assert await service.get_raw('key') is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+from elasticsearch import NotFoundError
+
+from models.data_models import FilmShort
+from services.data_services import ElasticService, SearchTimeoutError
+from services.pagination import Cursor
+
+FILMS = [
+    {'uuid': f'f{i}', 'title': f'Film {i}', 'imdb_rating': float(i % 3)}
+    for i in range(7)
+]
+SORT = [{'imdb_rating': {'order': 'desc'}}, {'uuid': {'order': 'asc'}}]
+
+
+class Response(dict):
+    @property
+    def body(self):
+        return self
+
+
+class FakeElastic:
+    """Sorts films by -imdb_rating, uuid, point-in-time adds doc number."""
+
+    def __init__(self) -> None:
+        self.calls = []
+        self.expired = set()
+        self.timed_out = False
+
+    async def open_point_in_time(self, index, keep_alive):
+        self.calls.append('open_pit')
+        return Response({'id': f'pit{len(self.calls)}'})
+
+    async def search(self, size, sort, search_after=None, pit=None, **kwargs):
+        self.calls.append('search_pit' if pit else 'search')
+        if pit and pit['id'] in self.expired:
+            raise NotFoundError(404, 'search_context_missing_exception', {})
+        films = sorted(
+            enumerate(FILMS),
+            key=lambda item: (-item[1]['imdb_rating'], item[1]['uuid']),
+        )
+        hits = []
+        for doc, film in films:
+            values = [film['imdb_rating'], film['uuid']]
+            if pit:
+                values.append(doc)
+            hits.append({'_source': film, 'sort': values})
+        if search_after is not None:
+            assert len(search_after) == len(sort) + bool(pit)
+            position = (-search_after[0], *search_after[1:])
+            hits = [
+                hit for hit in hits
+                if (-hit['sort'][0], *hit['sort'][1:]) > position
+            ]
+        if self.timed_out:
+            # Shards which haven't answered in time are missing.
+            hits = hits[:1]
+        response = {'timed_out': self.timed_out, 'hits': {'hits': hits[:size]}}
+        if pit:
+            response['pit_id'] = pit['id']
+        return Response(response)
+
+
+def search_page(elastic, cursor=None, keep_alive='1m'):
+    service = ElasticService(elastic)
+    return asyncio.run(service.search_page_in_elastic(
+        FilmShort, {'index': 'movies', 'size': 3}, SORT,
+        cursor=cursor, keep_alive=keep_alive,
+    ))
+
+
+def iterate(elastic, keep_alive='1m'):
+    uuids, cursor = [], None
+    while True:
+        page = search_page(elastic, cursor, keep_alive)
+        uuids.extend(film.uuid for film in page)
+        cursor = page.next_cursor
+        if cursor is None:
+            return uuids
+        # Cursors reach clients encoded.
+        cursor = Cursor.decode(cursor.encode())
+
+
+def test_cursor_survives_encoding():
+    cursor = Cursor([4.5, 'f1', 12], pit_id='pit')
+    decoded = Cursor.decode(cursor.encode())
+    assert decoded.search_after == [4.5, 'f1', 12]
+    assert decoded.pit_id == 'pit'
+    assert Cursor.decode(Cursor(['f1']).encode()).pit_id is None
+
+
+@pytest.mark.parametrize('value', ['', 'not base64!', 'e30=', 'W10='])
+def test_malformed_cursor_is_rejected(value):
+    with pytest.raises(ValueError):
+        Cursor.decode(value)
+
+
+def test_first_page_does_not_open_point_in_time():
+    elastic = FakeElastic()
+    page = search_page(elastic)
+    assert elastic.calls == ['search']
+    assert page.next_cursor.pit_id is None
+
+
+def test_point_in_time_is_opened_for_the_next_page():
+    elastic = FakeElastic()
+    assert iterate(elastic) == ['f2', 'f5', 'f1', 'f4', 'f0', 'f3', 'f6']
+    assert elastic.calls == ['search', 'open_pit', 'search_pit', 'search_pit']
+
+
+def test_second_page_starts_right_after_cursor_hit():
+    elastic = FakeElastic()
+    first = search_page(elastic)
+    second = search_page(elastic, first.next_cursor)
+    assert first.next_cursor.search_after[-1] == first[-1].uuid
+    assert second[0].uuid not in {film.uuid for film in first}
+    assert second.next_cursor.pit_id == 'pit2'
+    assert len(second.next_cursor.search_after) == 3
+
+
+def test_expired_point_in_time_continues_in_live_index():
+    elastic = FakeElastic()
+    first = search_page(elastic)
+    second = search_page(elastic, first.next_cursor)
+    elastic.expired.add(second.next_cursor.pit_id)
+    third = search_page(elastic, second.next_cursor)
+    assert [film.uuid for film in third] == ['f6']
+    assert elastic.calls[-2:] == ['search_pit', 'search']
+
+
+def test_pages_without_point_in_time():
+    elastic = FakeElastic()
+    assert len(iterate(elastic, keep_alive='')) == len(FILMS)
+    assert 'open_pit' not in elastic.calls
+
+
+def test_timed_out_page_is_not_returned():
+    elastic = FakeElastic()
+    elastic.timed_out = True
+    with pytest.raises(SearchTimeoutError):
+        search_page(elastic)
+
+
+def test_timed_out_search_is_not_returned():
+    elastic = FakeElastic()
+    elastic.timed_out = True
+    service = ElasticService(elastic)
+    with pytest.raises(SearchTimeoutError):
+        asyncio.run(service.search_in_elastic(
+            FilmShort, {'index': 'movies', 'size': 3, 'sort': SORT},
+        ))
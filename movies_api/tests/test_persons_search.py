@@ -0,0 +1,45 @@
+import asyncio
+
+import fakeredis.aioredis
+
+from api.v1.utils import PaginateQueryParams
+from services.data_services import ElasticService, RedisService
+from services.persons import PersonService
+
+PERSON = {
+    'uuid': 'p1',
+    'full_name': 'George Lucas',
+    'roles': [{'role': 'director', 'film_ids': ['f1']}],
+}
+
+
+class Response(dict):
+    @property
+    def body(self):
+        return self
+
+
+class FakeElastic:
+    """Returns PERSON, records search params."""
+
+    def __init__(self) -> None:
+        self.params = []
+
+    async def search(self, **params):
+        self.params.append(params)
+        return Response({'hits': {'hits': [{'_source': PERSON, 'sort': []}]}})
+
+
+def test_search_does_not_fetch_films_summaries():
+    elastic = FakeElastic()
+    service = PersonService(
+        RedisService(fakeredis.aioredis.FakeRedis()), ElasticService(elastic),
+    )
+    page = asyncio.run(service.get_persons_by_query(
+        'lucas', PaginateQueryParams(page_number=1, page_size=10, cursor=None),
+    ))
+    assert [person.uuid for person in page] == ['p1']
+    assert page[0].roles[0].films == []
+    source_includes = elastic.params[0]['source_includes']
+    assert 'roles.film_ids' in source_includes
+    assert not {'roles', 'roles.films'} & set(source_includes)
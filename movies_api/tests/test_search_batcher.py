@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+from elasticsearch import ApiError, NotFoundError
+
+from services.search_batcher import SearchBatcher, to_msearch
+
+
+class Response(dict):
+    meta = None
+
+    @property
+    def body(self):
+        return self
+
+
+class FakeElastic:
+    """Answers every search with hits named after its index."""
+
+    def __init__(self, errors: dict = None) -> None:
+        self.calls = []
+        self.errors = errors or {}
+        self.fail = None
+
+    @staticmethod
+    def answer(index):
+        return {'hits': {'hits': [{'_id': index}]}}
+
+    async def search(self, index, **kwargs):
+        self.calls.append(('search', index))
+        return Response(self.answer(index))
+
+    async def msearch(self, searches):
+        headers = searches[::2]
+        self.calls.append(('msearch', [header['index'] for header in headers]))
+        if self.fail is not None:
+            raise self.fail
+        responses = []
+        for header in headers:
+            if header['index'] in self.errors:
+                status = self.errors[header['index']]
+                responses.append({
+                    'error': {'type': 'index_not_found_exception'},
+                    'status': status,
+                })
+            else:
+                responses.append(self.answer(header['index']))
+        return Response({'responses': responses})
+
+
+def search_all(batcher, indexes):
+    async def scenario():
+        return await asyncio.gather(
+            *(batcher.search({'index': index}) for index in indexes),
+            return_exceptions=True,
+        )
+
+    return asyncio.run(scenario())
+
+
+def test_search_params_are_converted_to_msearch():
+    header, body = to_msearch({
+        'index': 'movies',
+        'from_': 10,
+        'size': 5,
+        'source_includes': ['uuid'],
+        'body': {'query': {'match_all': {}}},
+    })
+    assert header == {'index': 'movies'}
+    assert body == {
+        'query': {'match_all': {}},
+        'from': 10,
+        'size': 5,
+        '_source': {'includes': ['uuid']},
+    }
+
+
+def test_concurrent_searches_are_sent_in_one_msearch():
+    elastic = FakeElastic()
+    results = search_all(SearchBatcher(elastic), ['a', 'b', 'c'])
+    assert elastic.calls == [('msearch', ['a', 'b', 'c'])]
+    assert results == [FakeElastic.answer(index) for index in 'abc']
+
+
+def test_single_search_is_sent_as_search():
+    elastic = FakeElastic()
+    results = search_all(SearchBatcher(elastic), ['a'])
+    assert elastic.calls == [('search', 'a')]
+    assert results == [FakeElastic.answer('a')]
+
+
+def test_full_batch_is_sent_without_waiting_window():
+    elastic = FakeElastic()
+    batcher = SearchBatcher(elastic, window=60, max_batch=2)
+    search_all(batcher, ['a', 'b'])
+    assert elastic.calls == [('msearch', ['a', 'b'])]
+
+
+def test_item_errors_are_raised_to_their_callers():
+    elastic = FakeElastic(errors={'missing': 404, 'broken': 500})
+    results = search_all(SearchBatcher(elastic), ['a', 'missing', 'broken'])
+    assert results[0] == FakeElastic.answer('a')
+    assert isinstance(results[1], NotFoundError)
+    assert isinstance(results[2], ApiError)
+    assert not isinstance(results[2], NotFoundError)
+
+
+def test_msearch_failure_is_raised_to_all_callers():
+    elastic = FakeElastic()
+    elastic.fail = ConnectionError('elastic is down')
+    results = search_all(SearchBatcher(elastic), ['a', 'b'])
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+@pytest.mark.parametrize('count', [3, 7])
+def test_searches_over_max_batch_are_split(count):
+    elastic = FakeElastic()
+    indexes = [str(i) for i in range(count)]
+    results = search_all(SearchBatcher(elastic, max_batch=3), indexes)
+    assert results == [FakeElastic.answer(index) for index in indexes]
+    assert [
+        index for _, batch in elastic.calls
+        for index in (batch if isinstance(batch, list) else [batch])
+    ] == indexes
@@ -0,0 +1,103 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Similar films are computed by ETL, imported from the ETL package.
+pytest.importorskip('scipy')
+sys.path.insert(0, str(Path(__file__).parents[2] / 'postgres_to_es'))
+from postgres_to_es.similarity import (  # noqa: E402
+    SimilarFilmsUpdater,
+    build_feature_matrix,
+    top_k_similar,
+)
+
+FILMS = {
+    'f0': {'genre': ['g1'], 'directors': ['d1'], 'actors': ['a1']},
+    'f1': {'genre': ['g1'], 'directors': ['d1']},
+    'f2': {'genre': ['g1'], 'actors': ['a2']},
+    'f3': {'genre': ['g2']},
+    'f4': {'genre': ['g1'], 'actors': ['a1', 'a3']},
+}
+# Similar films ordered by similarity desc, f3 shares nothing.
+SIMILAR = {
+    'f0': ['f1', 'f4', 'f2'],
+    'f1': ['f0', 'f2', 'f4'],
+    'f2': ['f1', 'f4', 'f0'],
+    'f3': [],
+    'f4': ['f0', 'f2', 'f1'],
+}
+
+
+def features(film: dict) -> list[str]:
+    return [
+        f'{group}:{uuid}' for group, uuids in film.items() for uuid in uuids
+    ]
+
+
+@pytest.mark.parametrize('block_size', [1, 2, 512])
+def test_similar_films_are_ordered_by_similarity(block_size):
+    ids = list(FILMS)
+    matrix = build_feature_matrix([features(film) for film in FILMS.values()])
+    similar = {
+        ids[row]: [ids[similar_row] for similar_row in similar_rows]
+        for row, similar_rows in top_k_similar(matrix, 10, block_size)
+    }
+    assert similar == SIMILAR
+
+
+def test_film_is_never_its_own_neighbour():
+    # Equal films are the most similar ones, but not to themselves.
+    matrix = build_feature_matrix([['genre:g1']] * 3 + [['genre:g2']])
+    similar = dict(top_k_similar(matrix, 2))
+    assert similar == {0: [1, 2], 1: [0, 2], 2: [0, 1], 3: []}
+
+
+def test_top_k_limits_similar_films():
+    matrix = build_feature_matrix([features(film) for film in FILMS.values()])
+    similar = dict(top_k_similar(matrix, 1))
+    assert similar == {0: [1], 1: [0], 2: [1], 3: [], 4: [0]}
+    assert list(top_k_similar(build_feature_matrix([['genre:g1']]), 1)) == []
+
+
+class FakeElasticManager:
+    """Movies documents of FILMS, records bulk actions."""
+
+    def __init__(self, similar_ids: dict[str, list[str]]) -> None:
+        self.similar_ids = similar_ids
+        self.actions = []
+
+    def put_mapping(self, index_name, properties):
+        pass
+
+    def scan(self, index_name, source_includes):
+        for uuid, film in FILMS.items():
+            source = {
+                group: [{'uuid': item} for item in items]
+                for group, items in film.items()
+            }
+            source['similar_ids'] = self.similar_ids.get(uuid, [])
+            yield {'_id': uuid, '_source': source}
+
+    def bulk(self, actions):
+        self.actions.extend(actions)
+
+
+class FakeNotifier:
+    def __init__(self) -> None:
+        self.published = []
+
+    def publish_changes(self, index_name, ids):
+        self.published.extend(ids)
+
+
+def test_updater_stores_changed_similar_films_only():
+    # f0 is up to date, f1 is outdated, others are new.
+    es = FakeElasticManager({'f0': SIMILAR['f0'], 'f1': ['f2']})
+    notifier = FakeNotifier()
+    updater = SimilarFilmsUpdater(es, top_k=10, notifier=notifier)
+    assert updater.update() == 3
+    assert {
+        action['_id']: action['doc']['similar_ids'] for action in es.actions
+    } == {uuid: SIMILAR[uuid] for uuid in ('f1', 'f2', 'f4')}
+    assert sorted(notifier.published) == ['f1', 'f2', 'f4']
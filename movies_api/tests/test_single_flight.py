@@ -0,0 +1,117 @@
+import asyncio
+
+import fakeredis.aioredis
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_are_coalesced():
+    calls = 0
+
+    async def func():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(
+            *(flight.do('key', func) for _ in range(10))
+        )
+        assert results == [1] * 10
+        # Key is released after the call, next call runs func again.
+        assert await flight.do('key', func) == 2
+
+    asyncio.run(scenario())
+
+
+def test_leader_exception_is_raised_to_followers():
+    async def func():
+        await asyncio.sleep(0.01)
+        raise ValueError('backend failed')
+
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(
+            *(flight.do('key', func) for _ in range(3)),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+
+    asyncio.run(scenario())
+
+
+def test_follower_runs_func_when_leader_times_out():
+    calls = []
+
+    async def slow():
+        calls.append('slow')
+        await asyncio.sleep(0.2)
+        return 'slow'
+
+    async def fast():
+        calls.append('fast')
+        return 'fast'
+
+    async def scenario():
+        flight = SingleFlight(timeout=0.01)
+        leader = asyncio.create_task(flight.do('key', slow))
+        await asyncio.sleep(0)
+        assert await flight.do('key', fast) == 'fast'
+        assert await leader == 'slow'
+
+    asyncio.run(scenario())
+    assert calls == ['slow', 'fast']
+
+
+def test_follower_runs_func_when_leader_is_cancelled():
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def fast():
+        return 'fast'
+
+    async def scenario():
+        flight = SingleFlight()
+        leader = asyncio.create_task(flight.do('key', slow))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do('key', fast))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == 'fast'
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(scenario())
+
+
+def test_redis_lock_coalesces_calls_of_workers():
+    stored = {}
+    calls = 0
+
+    async def func():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        stored['key'] = 'value'
+        return 'value'
+
+    async def load():
+        return stored.get('key')
+
+    async def scenario():
+        redis = fakeredis.aioredis.FakeRedis()
+        workers = [
+            SingleFlight(lock_redis=redis, poll_interval=0.01)
+            for _ in range(2)
+        ]
+        results = await asyncio.gather(
+            *(worker.do('key', func, load=load) for worker in workers)
+        )
+        assert results == ['value', 'value']
+        assert not await redis.exists('single_flight:key')
+
+    asyncio.run(scenario())
+    assert calls == 1
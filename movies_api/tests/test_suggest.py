@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+from services.suggest import (
+    PrefixIndex,
+    Suggestion,
+    normalize,
+    person_suggestion,
+)
+
+FILMS = [
+    Suggestion('f1', 'The Dark Knight', 9.0),
+    Suggestion('f2', 'Star Wars: A New Hope', 8.6),
+    Suggestion('f3', 'Star Trek', 7.9),
+    Suggestion('f4', 'Dark Star', 6.4),
+    Suggestion('f5', 'Knight and Day', 6.3),
+]
+
+
+def uuids(suggestions):
+    return [suggestion.uuid for suggestion in suggestions]
+
+
+def brute_force(items, prefix, limit):
+    """Items with a word starting a tail with prefix, best scored first."""
+
+    prefix = normalize(prefix)
+    matched = []
+    for item in items:
+        words = normalize(item.text).split()
+        tails = (' '.join(words[start:]) for start in range(len(words)))
+        if any(tail.startswith(prefix) for tail in tails):
+            matched.append(item)
+    return sorted(matched, key=lambda item: -item.score)[:limit]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Star Wars: A New Hope', 'star wars a new hope'),
+    ('  ÉCOLE   des  Femmes ', 'école des femmes'),
+    ('Straße', 'strasse'),
+    ('!!!', ''),
+])
+def test_normalize(text, expected):
+    assert normalize(text) == expected
+
+
+def test_any_word_prefix_matches():
+    index = PrefixIndex(FILMS)
+    assert uuids(index.search('kni')) == ['f1', 'f5']
+    assert uuids(index.search('star')) == ['f2', 'f3', 'f4']
+    assert uuids(index.search('dark k')) == ['f1']
+    assert uuids(index.search('STAR wars:')) == ['f2']
+
+
+def test_no_matches():
+    index = PrefixIndex(FILMS)
+    assert index.search('zz') == []
+    assert index.search('') == []
+    assert index.search(' ?! ') == []
+    assert index.search('knight star') == []
+
+
+def test_limit_is_capped_by_top_k():
+    index = PrefixIndex(FILMS, top_k=2)
+    assert uuids(index.search('star')) == ['f2', 'f3']
+    assert uuids(index.search('star', limit=1)) == ['f2']
+    assert uuids(index.search('star', limit=5)) == ['f2', 'f3']
+
+
+def test_item_with_repeated_word_is_suggested_once():
+    index = PrefixIndex([Suggestion('f1', 'New York, New York', 7.0)])
+    assert uuids(index.search('new')) == ['f1']
+
+
+@pytest.mark.parametrize('dense_threshold', [0, 2, 64])
+def test_dense_prefixes_rank_as_brute_force(dense_threshold):
+    rng = random.Random(7)
+    words = ['star', 'stage', 'dark', 'day', 'knight', 'night', 'new', 'no']
+    items = [
+        Suggestion(
+            f'f{i}',
+            ' '.join(rng.choices(words, k=rng.randint(1, 4))),
+            float(i),
+        )
+        for i in range(200)
+    ]
+    index = PrefixIndex(items, top_k=5, dense_threshold=dense_threshold)
+    for prefix in ['s', 'st', 'sta', 'n', 'ni', 'no', 'd', 'star d', 'x']:
+        for limit in [1, 3, None]:
+            assert uuids(index.search(prefix, limit)) == uuids(
+                brute_force(items, prefix, limit or 5)
+            ), (prefix, limit)
+
+
+def test_person_score_counts_distinct_films():
+    suggestion = person_suggestion({
+        'uuid': 'p1',
+        'full_name': 'George Lucas',
+        'roles': [
+            {'role': 'director', 'film_ids': ['f1', 'f2']},
+            {'role': 'writer', 'film_ids': ['f2', 'f3']},
+        ],
+    })
+    assert suggestion == Suggestion('p1', 'George Lucas', 3)
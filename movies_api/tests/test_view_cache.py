@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+import orjson
+
+from models.base_models import Base
+from services.admission import CacheAdmission
+from services.cache import CacheAPIResponse, cache, collect_tags, etag_matches
+from services.cache_entry import CacheEntry
+from tests.utils import make_request
+
+
+class Item(Base):
+    value: int
+
+
+def counting_view(**cache_kwargs):
+    calls = []
+
+    @cache(**cache_kwargs)
+    async def view(request, item_id: str):
+        calls.append(item_id)
+        return Item(uuid=item_id, value=len(calls))
+
+    return view, calls
+
+
+async def expire_entry(service, key: str) -> None:
+    """Make stored entry stale keeping it in Redis."""
+
+    entry = CacheEntry.decode(await service.redis.get(key))
+    entry.soft_expire_at = time.time() - 1
+    await service.redis.set(key, entry.encode())
+    service.local_cache = None
+
+
+def test_second_call_is_served_from_cache(view_cache):
+    view, calls = counting_view(expire=60)
+
+    async def scenario():
+        view_cache(xfetch_beta=0)
+        first = await view(request=make_request(), item_id='a')
+        second = await view(request=make_request(), item_id='a')
+        assert first.body == second.body
+        assert orjson.loads(second.body) == {'uuid': 'a', 'value': 1}
+        await view(request=make_request(), item_id='b')
+
+    asyncio.run(scenario())
+    assert calls == ['a', 'b']
+
+
+def test_stale_entry_is_served_while_refreshed(view_cache):
+    view, calls = counting_view(expire=60)
+
+    async def scenario():
+        service = view_cache(xfetch_beta=0, stale_period=60)
+        await view(request=make_request(), item_id='a')
+        key, = await service.redis.keys('response_cache:*')
+        await expire_entry(service, key)
+        stale = await view(request=make_request(), item_id='a')
+        assert orjson.loads(stale.body)['value'] == 1
+        await asyncio.gather(*CacheAPIResponse._background_tasks)
+        fresh = await view(request=make_request(), item_id='a')
+        assert orjson.loads(fresh.body)['value'] == 2
+
+    asyncio.run(scenario())
+    assert calls == ['a', 'a']
+
+
+def test_stale_entry_is_recomputed_without_stale_period(view_cache):
+    view, calls = counting_view(expire=60)
+
+    async def scenario():
+        service = view_cache(xfetch_beta=0, stale_period=0)
+        await view(request=make_request(), item_id='a')
+        key, = await service.redis.keys('response_cache:*')
+        await expire_entry(service, key)
+        response = await view(request=make_request(), item_id='a')
+        assert orjson.loads(response.body)['value'] == 2
+
+    asyncio.run(scenario())
+
+
+def test_not_modified_when_etag_matches(view_cache):
+    view, _ = counting_view(expire=60)
+
+    async def scenario():
+        view_cache(xfetch_beta=0)
+        response = await view(request=make_request(), item_id='a')
+        etag = response.headers['etag']
+        revalidated = await view(
+            request=make_request(headers={'If-None-Match': f'W/{etag}'}),
+            item_id='a',
+        )
+        assert revalidated.status_code == 304
+        assert revalidated.headers['etag'] == etag
+
+    asyncio.run(scenario())
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', 'abc')
+    assert etag_matches('"x", W/"abc"', 'abc')
+    assert etag_matches('*', 'abc')
+    assert not etag_matches('"abd"', 'abc')
+    assert not etag_matches(None, 'abc')
+
+
+def test_collect_tags():
+    data = [
+        Item(uuid='a', value=1),
+        {'uuid': 'b', 'roles': [{'film_ids': ['c', 'd']}]},
+    ]
+    assert collect_tags(data) == {'a', 'b', 'c', 'd'}
+
+
+def test_large_entry_is_stored_with_shortened_ttl(view_cache):
+    view, _ = counting_view(expire=600)
+    admission = CacheAdmission(
+        min_frequency=1, large_entry_bytes=10, max_entry_bytes=1024,
+    )
+
+    async def scenario():
+        service = view_cache(
+            xfetch_beta=0, jitter=0, stale_period=30, admission=admission,
+        )
+        response = await view(request=make_request(), item_id='a')
+        key, = await service.redis.keys('response_cache:*')
+        entry = CacheEntry.decode(await service.redis.get(key))
+        expire = admission.expire_for_size(len(entry.payload), 600)
+        assert len(response.body) > 10 and expire < 600
+        # Both soft TTL and Redis TTL use the shortened TTL.
+        assert abs(entry.soft_expire_at - time.time() - expire) < 1
+        assert expire + 30 - 1 <= await service.redis.ttl(key) <= expire + 30
+
+    asyncio.run(scenario())
+
+
+def test_source_version_is_folded_into_key(view_cache):
+    version = '1'
+    view, calls = counting_view(expire=60, versions=(lambda: version,))
+
+    async def scenario():
+        nonlocal version
+        view_cache(xfetch_beta=0)
+        await view(request=make_request(), item_id='a')
+        await view(request=make_request(), item_id='a')
+        version = '2'
+        response = await view(request=make_request(), item_id='a')
+        assert orjson.loads(response.body)['value'] == 2
+
+    asyncio.run(scenario())
+    assert calls == ['a', 'a']
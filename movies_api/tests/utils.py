@@ -0,0 +1,16 @@
+from fastapi import Request
+
+
+def make_request(path_params: dict = None, headers: dict = None) -> Request:
+    """Build GET request as views get it."""
+
+    return Request({
+        'type': 'http',
+        'method': 'GET',
+        'path_params': path_params or {},
+        'headers': [
+            (name.lower().encode(), value.encode())
+            for name, value in (headers or {}).items()
+        ],
+        'query_string': b'',
+    })
@@ -0,0 +1,177 @@
+import math
+import os
+import struct
+
+import numpy as np
+
+from postgres_to_es.esmanager import ElasticManager
+from postgres_to_es.logger import logger
+
+# Snapshot file layout, must be kept in sync with movies_api reader
+# (movies_api/src/services/catalog.py). All numbers are little endian.
+#
+# Header: magic, format version, films count, genres count, then offset and
+# length in bytes of every section in SECTIONS order. Films (rows) are
+# ordered by imdb_rating desc (films without rating last) and uuid asc,
+# so rows are the pre-sorted 'sort=-imdb_rating' sequence. Ratings are
+# compared with float32 precision, as Elasticsearch compares float fields.
+MAGIC = b'MCAT'
+FORMAT_VERSION = 1
+UUID_SIZE = 36
+SECTIONS = (
+    'ratings',        # float64[films], NaN if film has no rating
+    'uuids',          # char[films][UUID_SIZE]
+    'title_offsets',  # uint32[films + 1], offsets in titles
+    'titles',         # utf-8 titles
+    'asc_order',      # uint32[films], rows ordered by imdb_rating asc
+    'uuid_order',     # uint32[films], rows ordered by uuid
+    'genre_uuids',    # char[genres][UUID_SIZE], sorted
+    'genre_offsets',  # uint32[genres + 1], offsets in genre_* arrays
+    'genre_desc',     # uint32[], rows of every genre, imdb_rating desc
+    'genre_asc',      # uint32[], rows of every genre, imdb_rating asc
+)
+HEADER = struct.Struct('<4sIII' + 'QQ' * len(SECTIONS))
+ALIGNMENT = 8
+
+
+def _uint32(values) -> bytes:
+    return np.asarray(values, dtype='<u4').tobytes()
+
+
+def build_snapshot(
+    films: list[tuple[str, str, float | None, list[str]]],
+) -> bytes:
+    """
+    Build catalog snapshot.
+
+    Args:
+        films: list of (uuid, title, imdb_rating, genres uuids) of films,
+            uuids must be UUID_SIZE ascii strings.
+
+    Returns:
+        Snapshot file content.
+    """
+    def desc_key(film):
+        rating = film[2]
+        return rating is None, -np.float32(rating or 0.0), film[0]
+
+    def asc_key(row):
+        rating = films[row][2]
+        return rating is None, np.float32(rating or 0.0), films[row][0]
+
+    films = sorted(films, key=desc_key)
+    rows = range(len(films))
+    genre_rows: dict[str, list[int]] = {}
+    for row, (_, _, _, genres) in enumerate(films):
+        for genre in set(genres):
+            genre_rows.setdefault(genre, []).append(row)
+    genre_uuids = sorted(genre_rows)
+
+    titles = [title.encode() for _, title, _, _ in films]
+    genre_offsets = np.cumsum(
+        [0] + [len(genre_rows[genre]) for genre in genre_uuids]
+    )
+    sections = {
+        'ratings': np.array(
+            [math.nan if film[2] is None else film[2] for film in films],
+            dtype='<f8',
+        ).tobytes(),
+        'uuids': b''.join(uuid.encode() for uuid, _, _, _ in films),
+        'title_offsets': _uint32(
+            np.cumsum([0] + [len(title) for title in titles])
+        ),
+        'titles': b''.join(titles),
+        'asc_order': _uint32(sorted(rows, key=asc_key)),
+        'uuid_order': _uint32(sorted(rows, key=lambda row: films[row][0])),
+        'genre_uuids': b''.join(genre.encode() for genre in genre_uuids),
+        'genre_offsets': _uint32(genre_offsets),
+        # Rows of a genre are ascending, i.e. in imdb_rating desc order.
+        'genre_desc': _uint32([
+            row for genre in genre_uuids for row in genre_rows[genre]
+        ]),
+        'genre_asc': _uint32([
+            row for genre in genre_uuids
+            for row in sorted(genre_rows[genre], key=asc_key)
+        ]),
+    }
+
+    position = HEADER.size
+    layout, body = [], []
+    for name in SECTIONS:
+        padding = -position % ALIGNMENT
+        body.append(b'\0' * padding)
+        position += padding
+        layout.extend((position, len(sections[name])))
+        body.append(sections[name])
+        position += len(sections[name])
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(films), len(genre_uuids), *layout,
+    )
+    return header + b''.join(body)
+
+
+class CatalogSnapshotWriter:
+    """
+    Write compact columnar snapshot of films catalog for API workers.
+
+    API workers memory-map the snapshot read-only (one copy in page cache
+    for all workers) to serve popular films pages without Elasticsearch.
+    Snapshot is replaced atomically, so readers see either the old or the
+    new version.
+    """
+
+    source_fields: tuple[str, ...] = (
+        'uuid', 'title', 'imdb_rating', 'genre.uuid',
+    )
+
+    def __init__(
+        self,
+        es_manager: ElasticManager,
+        path: str,
+        index_name: str = 'movies',
+    ) -> None:
+        self.es: ElasticManager = es_manager
+        self.path: str = path
+        self.index_name: str = index_name
+
+    def write(self) -> bool:
+        """
+        Write snapshot of all films of index.
+
+        Returns:
+            True if snapshot changed.
+        """
+        films = []
+        for hit in self.es.scan(self.index_name, list(self.source_fields)):
+            source = hit.get('_source', {})
+            if len(hit['_id']) != UUID_SIZE or not hit['_id'].isascii():
+                logger.warning("Film %s is not added to catalog.", hit['_id'])
+                continue
+            films.append((
+                hit['_id'],
+                source.get('title') or '',
+                source.get('imdb_rating'),
+                [
+                    genre['uuid'] for genre in source.get('genre') or []
+                    if len(genre['uuid']) == UUID_SIZE
+                ],
+            ))
+        snapshot = build_snapshot(films)
+
+        try:
+            with open(self.path, 'rb') as file:
+                if file.read() == snapshot:
+                    return False
+        except FileNotFoundError:
+            pass
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(snapshot)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+        logger.info(
+            "Catalog snapshot of %s films written to %s.",
+            len(films), self.path,
+        )
+        return True
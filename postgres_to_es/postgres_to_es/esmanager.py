@@ -1,11 +1,13 @@
 import json
 from http import HTTPStatus
+from typing import Iterator
 
 import elasticsearch
 from elasticsearch import Elasticsearch
-from elasticsearch.helpers import bulk
+from elasticsearch.helpers import bulk, scan
 
 from postgres_to_es.logger import logger
+from postgres_to_es.notifier import CacheNotifier
 from postgres_to_es.retry import backoff
 from postgres_to_es.state import State
 
@@ -18,6 +20,16 @@ def load_es_mapping(path: str, file_name: str) -> dict:
         return json.loads(data)
 
 
+def get_layout_version(mappings: dict) -> int | None:
+    """
+    Get version of documents layout of index mappings.
+
+    The version is bumped in schema when documents change incompatibly
+    (e.g. a document per entity instead of a document per entity role).
+    """
+    return mappings.get('_meta', {}).get('layout_version')
+
+
 class ElasticManager:
     """Class adapter for Elasticmanager"""
 
@@ -25,15 +37,39 @@ class ElasticManager:
         self.client: Elasticsearch = Elasticsearch(es_url)
 
     @backoff(logger=logger)
-    def create_index(self, index_name: str, schema: dict) -> None:
-        if not self.client.indices.exists(index=index_name):
-            self.client.options(
-                ignore_status=HTTPStatus.BAD_REQUEST
-            ).indices.create(
-                index=index_name,
-                mappings=schema['mappings'],
-                settings=schema['settings'],
+    def create_index(self, index_name: str, schema: dict) -> bool:
+        """
+        Create index if it doesn't exist.
+
+        Index whose '_meta.layout_version' mapping differs from the schema
+        one is dropped and created again, documents of its old layout can't
+        be updated in place.
+
+        Returns:
+            True if index was created.
+        """
+        if self.client.indices.exists(index=index_name):
+            layout_version = self.get_layout_version(index_name)
+            if layout_version == get_layout_version(schema['mappings']):
+                return False
+            logger.warning(
+                "Index %s layout %s is outdated, recreate index.",
+                index_name, layout_version,
             )
+            self.client.indices.delete(index=index_name)
+        self.client.options(
+            ignore_status=HTTPStatus.BAD_REQUEST
+        ).indices.create(
+            index=index_name,
+            mappings=schema['mappings'],
+            settings=schema['settings'],
+        )
+        return True
+
+    def get_layout_version(self, index_name: str) -> int | None:
+        """Get layout version of existing index mapping."""
+        response = self.client.indices.get_mapping(index=index_name)
+        return get_layout_version(response[index_name]['mappings'])
 
     @backoff(elasticsearch.TransportError, logger=logger)
     def index_doc(
@@ -44,6 +80,35 @@ class ElasticManager:
     ) -> None:
         self.client.create(index=index_name, document=document, id=doc_id)
 
+    @backoff(elasticsearch.TransportError, logger=logger)
+    def put_mapping(self, index_name: str, properties: dict) -> None:
+        """Add fields to mapping of existing index."""
+        self.client.indices.put_mapping(
+            index=index_name, properties=properties,
+        )
+
+    def scan(
+        self,
+        index_name: str,
+        source_includes: list[str],
+    ) -> Iterator[dict]:
+        """
+        Iterate over all documents of index.
+
+        Args:
+            index_name: str Index name.
+            source_includes: list[str] Fields of _source to fetch.
+
+        Returns:
+            Iterator of hits.
+        """
+        return scan(
+            self.client,
+            index=index_name,
+            query={'_source': source_includes},
+            size=1000,
+        )
+
     @backoff(elasticsearch.TransportError, logger=logger)
     def bulk(self, chunk: list[dict]) -> None:
         """
@@ -68,14 +133,21 @@ class ElasticUploader:
         table_names: tuple[str, ...],
         index_name: str,
         index_schema: dict,
+        notifier: CacheNotifier | None = None,
     ) -> None:
         self.es: ElasticManager = es_manager
         self.state: State = state
         self.table_names: tuple[str, ...] = table_names
         self.index_name: str = index_name
-        self.es.create_index(
+        self.notifier: CacheNotifier | None = notifier
+        self.index_created: bool = self.es.create_index(
             index_name=index_name, schema=index_schema
         )
+        if not self.index_created:
+            # Existing index might miss fields added to schema since.
+            self.es.put_mapping(
+                index_name, index_schema['mappings']['properties'],
+            )
 
     def bulk_upload(self, chunk: list[dict]) -> None:
         """
@@ -94,6 +166,10 @@ class ElasticUploader:
             return
         self._update_state()
         logger.info("Chunk of %s docs was indexed successfully.", len(chunk))
+        if self.notifier is not None:
+            self.notifier.publish_changes(
+                self.index_name, [doc['_id'] for doc in chunk],
+            )
 
     def _update_state(self) -> None:
         """
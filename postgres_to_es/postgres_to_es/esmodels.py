@@ -30,13 +30,28 @@ class MoviesIndexRecord(BaseModel):
     writers_names: list[str] = []
 
 
+class FilmSummary(BaseModel):
+    """Compact film representation as part of PersonsIndexRecord."""
+
+    uuid: str
+    title: str
+    imdb_rating: float = None
+
+
+class PersonRole(BaseModel):
+    """Person's role with related films as part of PersonsIndexRecord."""
+
+    role: str
+    film_ids: list[str] = []
+    films: list[FilmSummary] = []
+
+
 class PersonsIndexRecord(BaseModel):
     """Class represents record that satisfy 'persons' index document schema."""
 
     uuid: str
     full_name: str
-    role: str
-    film_ids: list[str] = []
+    roles: list[PersonRole] = []
 
 
 class GenresIndexRecord(Genre):
@@ -1,6 +1,7 @@
 import datetime
 import time
 
+from postgres_to_es.catalog import CatalogSnapshotWriter
 from postgres_to_es.dbmanager import DbManager
 from postgres_to_es.esmanager import (
     ElasticManager,
@@ -8,12 +9,14 @@ from postgres_to_es.esmanager import (
     load_es_mapping,
 )
 from postgres_to_es.logger import logger
+from postgres_to_es.notifier import CacheNotifier
 from postgres_to_es.pgloader import (
     MoviesIndexDataLoader,
     GenresIndexDataLoader,
     PersonsIndexDataLoader,
 )
 from postgres_to_es.settings import pg_dsn, settings
+from postgres_to_es.similarity import SimilarFilmsUpdater
 from postgres_to_es.state import JsonFileStorage, State
 from postgres_to_es.transformer import (
     MoviesIndexTransformer,
@@ -32,8 +35,9 @@ class ETL:
         db: DbManager,
         state: State,
         es_manager: ElasticManager,
-        chunk_size: int
-    ) -> None:
+        chunk_size: int,
+        notifier: CacheNotifier | None = None,
+    ) -> tuple[set[str], set[str]]:
         """
         Manage index, scan tables changes by modified field.
         Args:
@@ -41,10 +45,13 @@ class ETL:
             state: State State class instance.
             es_manager: ElasticManager
             chunk_size: int Query limit, how many records to select at once.
+            notifier: CacheNotifier Notifier of API about changed documents.
 
         Returns:
-            None
+            Names of indexes with uploaded documents and names of indexes
+            rebuilt from scratch.
         """
+        changed_indexes, rebuilt_indexes = set(), set()
         scan_data = (
             (
                 "movies",
@@ -60,7 +67,7 @@ class ETL:
             ),
             (
                 "persons",
-                ("person",),
+                ("person", "film_work"),
                 PersonsIndexTransformer,
                 PersonsIndexDataLoader
             )
@@ -84,8 +91,12 @@ class ETL:
                 index_schema=load_es_mapping(
                     settings.elasticsearch_schema_path,
                     f'{index_name}.json'
-                )
+                ),
+                notifier=notifier,
             )
+            if es_uploader.index_created:
+                # Index (re)created, e.g. its layout version was bumped.
+                from_modified = datetime.datetime.min
             pgloader = pgloader_class(
                 db=db,
                 state=state,
@@ -111,9 +122,20 @@ class ETL:
                     len(clear_chunk)
                 )
                 es_uploader.bulk_upload(clear_chunk)
+                changed_indexes.add(index_name)
 
             self.update_last_scan_date(state, index_name, table_names)
+            index_rebuilt = any((
+                es_uploader.index_created,
+                from_modified == datetime.datetime.min,
+            ))
+            if index_rebuilt:
+                rebuilt_indexes.add(index_name)
+            if notifier is not None and index_rebuilt:
+                # Index was rebuilt from scratch, drop its API cache.
+                notifier.bump_generation(index_name)
             logger.info("Tables scan complete.")
+        return changed_indexes, rebuilt_indexes
 
     def update_last_scan_date(
         self,
@@ -150,13 +172,46 @@ class ETL:
             state = State(state_storage)
             db = DbManager(pg_dsn)
             es_manager = ElasticManager(settings.elasticsearch_url)
+            notifier = CacheNotifier(
+                settings.redis_url,
+                settings.cache_entities_channel,
+                settings.cache_generation_prefix,
+            )
+            similar_films_updater = SimilarFilmsUpdater(
+                es_manager,
+                top_k=settings.similar_films_top_k,
+                block_size=settings.similar_films_block_size,
+                notifier=notifier,
+            )
+            similar_films_due_at = time.monotonic()
+            catalog_writer = None
+            if settings.catalog_snapshot_path:
+                catalog_writer = CatalogSnapshotWriter(
+                    es_manager, settings.catalog_snapshot_path,
+                )
+            catalog_written = False
             while True:
-                self.scan_tables(
+                changed_indexes, rebuilt_indexes = self.scan_tables(
                     db=db,
                     state=state,
                     es_manager=es_manager,
-                    chunk_size=settings.limit
+                    chunk_size=settings.limit,
+                    notifier=notifier,
                 )
+                if settings.similar_films_interval and any((
+                    time.monotonic() >= similar_films_due_at,
+                    # Recreated index has lost similar films of all films.
+                    'movies' in rebuilt_indexes,
+                )):
+                    similar_films_updater.update()
+                    similar_films_due_at = (
+                        time.monotonic() + settings.similar_films_interval
+                    )
+                if catalog_writer is not None and (
+                    not catalog_written or 'movies' in changed_indexes
+                ):
+                    catalog_writer.write()
+                    catalog_written = True
                 logger.info(
                     "Sleep for %s seconds, waiting for next scan cycle.",
                     settings.scan_delay
@@ -0,0 +1,100 @@
+import json
+from typing import Iterable
+
+import redis
+
+from postgres_to_es.logger import logger
+from postgres_to_es.retry import backoff
+
+# Notifications are best effort, indexing is not blocked while Redis is
+# down, cached data expires by TTL then.
+NOTIFY_MAX_TRIES = 5
+
+
+class CacheNotifier:
+    """
+    Notify API services about changed documents over Redis pub/sub, so
+    they invalidate cached data related to these documents.
+
+    Notifications are disabled if 'redis_url' is not set.
+
+    After a full index rebuild the whole API cache of the index is dropped
+    at once by bumping its cache generation counter.
+
+    Redis is retried NOTIFY_MAX_TRIES times, then the notification is
+    logged and skipped.
+    """
+
+    def __init__(
+        self,
+        redis_url: str | None,
+        entities_channel: str,
+        generation_prefix: str = 'cache_generation:',
+    ) -> None:
+        self.entities_channel: str = entities_channel
+        self.generation_prefix: str = generation_prefix
+        self.client: redis.Redis | None = None
+        if redis_url:
+            self.client = redis.Redis.from_url(redis_url)
+
+    def publish_changes(self, index_name: str, ids: Iterable[str]) -> None:
+        """
+        Publish ids of changed documents.
+
+        Args:
+            index_name: str Elasticsearch index name.
+            ids: Iterable[str] Changed documents ids.
+
+        Returns:
+            None
+        """
+        if self.client is None:
+            return
+        message = json.dumps({'index': index_name, 'ids': sorted(ids)})
+        try:
+            self._publish(message)
+        except redis.exceptions.ConnectionError as e:
+            logger.error(
+                "Changes of %s index are not published: %s", index_name, e,
+            )
+
+    def bump_generation(self, index_name: str) -> None:
+        """
+        Start new cache generation of index.
+
+        Args:
+            index_name: str Elasticsearch index name.
+
+        Returns:
+            None
+        """
+        if self.client is None:
+            return
+        try:
+            generation = self._incr(f'{self.generation_prefix}{index_name}')
+        except redis.exceptions.ConnectionError as e:
+            logger.error(
+                "Cache generation of %s index is not bumped: %s",
+                index_name, e,
+            )
+            return
+        logger.info(
+            "Cache generation of %s index bumped to %s.",
+            index_name, generation,
+        )
+
+    @backoff(
+        redis.exceptions.ConnectionError,
+        logger=logger,
+        max_tries=NOTIFY_MAX_TRIES,
+    )
+    def _publish(self, message: str) -> None:
+        self.client.publish(self.entities_channel, message)
+
+    @backoff(
+        redis.exceptions.ConnectionError,
+        logger=logger,
+        max_tries=NOTIFY_MAX_TRIES,
+    )
+    def _incr(self, key: str) -> int:
+        return self.client.incr(key)
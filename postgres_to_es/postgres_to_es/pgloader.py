@@ -46,6 +46,27 @@ class BaseDataLoader(ABC):
             list(fw_updated_unique_ids)
         )
 
+    def skip_currently_processed_ids(self, table_name: str) -> None:
+        """
+        Move ids selected in current iteration to already processed ones,
+        as their chunk has nothing to index.
+
+        :param table_name: Table name, where ids from.
+        :return: None
+        """
+        current_key = (
+            f'{self.index_name}:{table_name}:current_iteration_selected_ids'
+        )
+        processed_key = (
+            f'{self.index_name}:{table_name}:already_processed_ids'
+        )
+        processed_ids = self.state.get_state(processed_key) or []
+        processed_ids.extend(self.state.get_state(current_key) or [])
+        self.state.set_state(
+            processed_key, [str(id_) for id_ in processed_ids],
+        )
+        self.state.set_state(current_key, [])
+
     def load_already_processed_ids(self, table_name: str) -> list[str]:
         """
         Read already processed ids list from persistent storage.
@@ -320,23 +341,53 @@ class PersonsIndexDataLoader(BaseDataLoader):
 
     sql_rich_clause_template = """
     select
-        p.id "uuid",
-        p.full_name,
-        pfw."role",
-        array_agg(distinct concat(fw.id)) "film_ids"
+        pr."uuid",
+        pr.full_name,
+        jsonb_agg(jsonb_build_object(
+            'role', pr."role",
+            'film_ids', pr.film_ids,
+            'films', pr.films
+        ) order by pr."role") "roles"
+    from (
+        select
+            p.id "uuid",
+            p.full_name,
+            pfw."role",
+            array_agg(distinct concat(fw.id)) "film_ids",
+            coalesce(
+                jsonb_agg(distinct jsonb_build_object(
+                    'uuid', fw.id,
+                    'title', fw.title,
+                    'imdb_rating', fw.rating
+                )) filter (where fw.id is not null),
+                '[]'
+            ) "films"
+        from
+            "content".person_film_work pfw
+        left join "content".film_work fw on
+            fw.id = pfw.film_work_id
+        left join "content".person p on
+            pfw.person_id = p.id
+        where
+            {where_clause}
+        group by
+            pfw."role" ,
+            p.full_name,
+            p.id
+    ) pr
+    group by
+        pr.full_name,
+        pr."uuid"
+    order by pr."uuid"
+    """
+
+    sql_select_persons_ids_template = """
+    select distinct
+        pfw.person_id id
     from
-        "content".person_film_work pfw
-    left join "content".film_work fw on
-        fw.id = pfw.film_work_id
-    left join "content".person p on
-        pfw.person_id = p.id
+        content.person_film_work pfw
     where
-        {where_clause}
-    group by
-        pfw."role" ,
-        p.full_name,
-        p.id
-    order by p.id
+        pfw.film_work_id in ({film_ids})
     """
 
     def __init__(self, *args, **kwargs) -> None:
@@ -354,27 +405,66 @@ class PersonsIndexDataLoader(BaseDataLoader):
             limit: int
 
         Returns:
-            List of DictRow records with person data and aggregated film_ids
-            field.
+            List of DictRow records with person data and roles field of
+            person's roles with film_ids and films summaries.
         """
-        persons_updated_ids = set()
-        for table_name in self.table_names:
-            already_processed_ids = self.load_already_processed_ids(table_name)
-            persons_updated_ids = self.get_entities_ids(
-                table_name=table_name,
-                modified_from=modified_from,
-                processed_ids=already_processed_ids,
-                limit=limit,
-            )
-            self.store_currently_processed_ids(
-                persons_updated_ids, table_name
-            )
-        return self.get_merged_data(persons_updated_ids)
+        # Changed films may have no persons and changed persons may have no
+        # roles, an empty chunk would stop the caller while entities remain,
+        # so chunks are read until persons are found or entities exhausted.
+        while True:
+            persons_updated_ids = set()
+            entities_found = False
+            for table_name in self.table_names:
+                already_processed_ids = self.load_already_processed_ids(
+                    table_name
+                )
+                entity_ids = self.get_entities_ids(
+                    table_name=table_name,
+                    modified_from=modified_from,
+                    processed_ids=already_processed_ids,
+                    limit=limit,
+                )
+                self.store_currently_processed_ids(entity_ids, table_name)
+                entities_found = entities_found or bool(entity_ids)
+                if table_name == 'person':
+                    persons_updated_ids.update(entity_ids)
+                elif modified_from != datetime.datetime.min:
+                    # Films summaries embedded into persons of changed films
+                    # must be refreshed, on first upload all persons are
+                    # loaded.
+                    persons_updated_ids.update(
+                        self.get_persons_ids(entity_ids)
+                    )
+            data = self.get_merged_data(list(persons_updated_ids))
+            if data or not entities_found:
+                return data
+            for table_name in self.table_names:
+                self.skip_currently_processed_ids(table_name)
+
+    def get_persons_ids(self, film_ids: list[str]) -> list[str]:
+        """
+        Get ids of persons related to filmworks.
+
+        Not limited, all persons of the films must be refreshed, their number
+        is bounded by the films chunk size.
+        Args:
+            film_ids: list[str] List of filmworks ids
+
+        Returns: list
+            persons ids
+        """
+        if not film_ids:
+            return []
+        sql_text = self.sql_select_persons_ids_template.format(
+            film_ids=','.join(['%s' for _ in film_ids]),
+        )
+        persons_ids = self.db.protected_execute(sql_text, *film_ids)
+        return [_['id'] for _ in persons_ids]
 
     def get_merged_data(self, persons_ids: list[str]) -> list[DictRow]:
         """
-        Get enriched person rows with additional film_ids fields attached
-        and grouped by roles.
+        Get enriched person rows with person's roles attached, a row per
+        person.
         Args:
             persons_ids: list[str] List of persons ids
 
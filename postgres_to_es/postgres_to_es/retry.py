@@ -10,6 +10,7 @@ def backoff(
         border_sleep_time: int = 10,
         command: str = None,
         logger: logging.Logger = None,
+        max_tries: int = None,
 ):
     """
     Retry decorator with exp() formula.
@@ -21,6 +22,8 @@ def backoff(
         command: str Name of callable to call if exc occurs.
         logger: logger.warning(fmt, delay) will be called on failed attempts.
                    default: None, logging is disabled.
+        max_tries: int Number of attempts, after which exc is raised.
+                   default: None, retry forever.
     Returns:
         Wrapped func result.
     """
@@ -33,6 +36,8 @@ def backoff(
                 try:
                     return func(*args, **kwargs)
                 except exc:
+                    if max_tries is not None and n + 1 >= max_tries:
+                        raise
                     t = start_sleep_time * factor ** n
                     if t > border_sleep_time:
                         t = border_sleep_time
@@ -19,7 +19,29 @@ class Settings(BaseSettings):
     )
     elasticsearch_schema_path: str = './postgres_to_es/assets/'
     limit: int = Field(25, env=['chunk_size', 'limit'])
+    # API cache invalidation, disabled if redis_url is not set.
+    redis_url: str = Field(None, env='redis_url')
+    cache_entities_channel: str = Field(
+        'cache_invalidation:entities',
+        env='cache_entities_channel',
+    )
+    cache_generation_prefix: str = Field(
+        'cache_generation:',
+        env='cache_generation_prefix',
+    )
     scan_delay: int = Field(30, env=['scan_delay', 'etl_sleep'])
+    # Similar films precomputation, disabled if interval is 0.
+    similar_films_interval: int = Field(
+        60 * 60,
+        env='similar_films_interval',
+    )
+    similar_films_top_k: int = Field(10, env='similar_films_top_k')
+    similar_films_block_size: int = Field(
+        512,
+        env='similar_films_block_size',
+    )
+    # Films catalog snapshot for API workers, disabled if path is not set.
+    catalog_snapshot_path: str = Field(None, env='catalog_snapshot_path')
 
     class Config:
         env_file = "./.env.postgres_to_es.develop"
@@ -0,0 +1,186 @@
+from typing import Iterator
+
+import elasticsearch
+import numpy as np
+from scipy import sparse
+
+from postgres_to_es.esmanager import ElasticManager
+from postgres_to_es.logger import logger
+from postgres_to_es.notifier import CacheNotifier
+
+# Weights of film features groups in similarity.
+FEATURE_WEIGHTS: dict[str, float] = {
+    'genre': 1.0,
+    'directors': 1.5,
+    'actors': 1.0,
+    'writers': 1.0,
+}
+
+
+def build_feature_matrix(
+    films_features: list[list[str]],
+) -> sparse.csr_matrix:
+    """
+    Build TF-IDF like matrix of films features.
+
+    Rare features (e.g. a person starred in few films) weigh more than
+    common ones (e.g. popular genre), rows are L2 normalized, so the product
+    of two rows is cosine similarity of films.
+
+    Args:
+        films_features: list[list[str]] Features of every film, feature is
+            '{group}:{uuid}' string.
+
+    Returns:
+        Sparse matrix films x features.
+    """
+    feature_index: dict[str, int] = {}
+    rows, columns, values = [], [], []
+    for row, features in enumerate(films_features):
+        for feature in set(features):
+            column = feature_index.setdefault(feature, len(feature_index))
+            rows.append(row)
+            columns.append(column)
+            values.append(FEATURE_WEIGHTS[feature.partition(':')[0]])
+    matrix = sparse.csr_matrix(
+        (np.array(values, dtype=np.float32), (rows, columns)),
+        shape=(len(films_features), len(feature_index)),
+    )
+    films_count = max(len(films_features), 1)
+    document_frequency = np.bincount(
+        matrix.indices, minlength=matrix.shape[1],
+    )
+    idf = np.log(films_count / np.maximum(document_frequency, 1)) + 1.0
+    matrix = matrix @ sparse.diags(idf.astype(np.float32))
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1))).ravel()
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1 / norms) @ matrix)
+
+
+def top_k_similar(
+    matrix: sparse.csr_matrix,
+    top_k: int,
+    block_size: int = 512,
+) -> Iterator[tuple[int, list[int]]]:
+    """
+    Find top K most similar rows of every row.
+
+    Similarities are computed by blocks of rows (block x all rows matrix
+    product), so memory is bounded by 'block_size' * rows count.
+
+    Args:
+        matrix: sparse.csr_matrix Normalized features matrix.
+        top_k: int Number of similar rows to find.
+        block_size: int Number of rows processed at once.
+
+    Returns:
+        Iterator of (row, similar rows ordered by similarity desc), rows
+        without common features are not included.
+    """
+    rows_count = matrix.shape[0]
+    top_k = min(top_k, rows_count - 1)
+    if top_k <= 0:
+        return
+    transposed = matrix.T.tocsc()
+    for start in range(0, rows_count, block_size):
+        stop = min(start + block_size, rows_count)
+        scores = (matrix[start:stop] @ transposed).toarray()
+        # Film is not similar to itself.
+        scores[np.arange(stop - start), np.arange(start, stop)] = 0
+        candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind='stable')
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        candidate_scores = np.take_along_axis(candidate_scores, order, axis=1)
+        for offset in range(stop - start):
+            similar = candidates[offset][candidate_scores[offset] > 0]
+            yield start + offset, similar.tolist()
+
+
+class SimilarFilmsUpdater:
+    """
+    Compute top K similar films of the whole catalog and store them in
+    'similar_ids' field of movies documents.
+
+    Films are similar if they share genres and persons, see
+    build_feature_matrix(). Only documents whose similar films changed are
+    updated and reported to the API cache notifier.
+    """
+
+    source_fields: tuple[str, ...] = (
+        'similar_ids',
+        *(f'{group}.uuid' for group in FEATURE_WEIGHTS),
+    )
+
+    def __init__(
+        self,
+        es_manager: ElasticManager,
+        index_name: str = 'movies',
+        top_k: int = 10,
+        block_size: int = 512,
+        chunk_size: int = 500,
+        notifier: CacheNotifier | None = None,
+    ) -> None:
+        self.es: ElasticManager = es_manager
+        self.index_name: str = index_name
+        self.top_k: int = top_k
+        self.block_size: int = block_size
+        self.chunk_size: int = chunk_size
+        self.notifier: CacheNotifier | None = notifier
+
+    def update(self) -> int:
+        """
+        Recompute similar films of all films.
+
+        Returns:
+            Number of updated documents.
+        """
+        self.es.put_mapping(
+            self.index_name, {'similar_ids': {'type': 'keyword'}},
+        )
+        ids, films_features, current = [], [], []
+        for hit in self.es.scan(self.index_name, list(self.source_fields)):
+            source = hit.get('_source', {})
+            ids.append(hit['_id'])
+            current.append(source.get('similar_ids') or [])
+            films_features.append([
+                f'{group}:{item["uuid"]}'
+                for group in FEATURE_WEIGHTS
+                for item in source.get(group) or []
+            ])
+        if not ids:
+            return 0
+
+        matrix = build_feature_matrix(films_features)
+        changed = []
+        for row, similar_rows in top_k_similar(
+            matrix, self.top_k, self.block_size,
+        ):
+            similar_ids = [ids[similar_row] for similar_row in similar_rows]
+            if similar_ids != current[row]:
+                changed.append((ids[row], similar_ids))
+
+        for start in range(0, len(changed), self.chunk_size):
+            chunk = changed[start:start + self.chunk_size]
+            try:
+                self.es.bulk([
+                    {
+                        '_op_type': 'update',
+                        '_index': self.index_name,
+                        '_id': doc_id,
+                        'doc': {'similar_ids': similar_ids},
+                    }
+                    for doc_id, similar_ids in chunk
+                ])
+            except elasticsearch.helpers.BulkIndexError as e:
+                # Documents deleted since scan, the rest are updated.
+                logger.error(e)
+            if self.notifier is not None:
+                self.notifier.publish_changes(
+                    self.index_name, [doc_id for doc_id, _ in chunk],
+                )
+        logger.info(
+            "Similar films of %s films computed, %s documents updated.",
+            len(ids), len(changed),
+        )
+        return len(changed)
@@ -57,11 +57,16 @@ class BaseTransformer(ABC):
         Returns: dict
             Row with fields ready to send for bulk index.
         """
+        doc_id = data['uuid']
+        if self.op_type == 'update':
+            # Partial update keeps fields which are not built from
+            # Postgresql, e.g. computed by other ETL stages.
+            data = {'doc': data, 'doc_as_upsert': True}
         data.update(
             {
                 '_op_type': self.op_type,
                 '_index': self.index_name,
-                '_id': data['uuid'],
+                '_id': doc_id,
             }
         )
         return data
@@ -71,6 +76,11 @@ class MoviesIndexTransformer(BaseTransformer):
     """Transform logic from dirty PGSQL query results to fill 'movies'
     index for Elasticsearch."""
 
+    @property
+    def op_type(self) -> str:
+        # Keep 'similar_ids' set by SimilarFilmsUpdater.
+        return "update"
+
     @property
     def index_name(self):
         return "movies"
@@ -143,8 +153,3 @@ class PersonsIndexTransformer(BaseTransformer):
     def transform_row(self, dirty_row: DictRow) -> dict:
         es_record = PersonsIndexRecord(**dirty_row)
         return es_record.dict()
-
-    def _add_fields_for_bulk_index(self, data: dict) -> dict:
-        data = super()._add_fields_for_bulk_index(data)
-        data['_id'] = data['uuid'] + ':' + data['role']
-        return data